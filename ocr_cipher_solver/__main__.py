@@ -1,35 +1,363 @@
 import pathlib
-
-from PIL import Image
-
-from ocr_cipher_solver.ciphers import CaesarianCipher
-from ocr_cipher_solver.ocr import OCR
-from ocr_cipher_solver.outputs.save_image import SaveImage
-from ocr_cipher_solver.outputs.show_image import ShowImage
-from ocr_cipher_solver.pipeline import ImagePipeline
-from ocr_cipher_solver.reconstructor import Reconstructor
+import sys
 
 
 if __name__ == '__main__':
 
     import argparse
 
+    # run HTTP service instead, with its own arguments
+    if sys.argv[1:2] == ['serve']:
+        from ocr_cipher_solver.server import main as serve
+
+        sys.exit(serve(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(prog='OCR Cipher Solver')
 
-    parser.add_argument('img_path', type=pathlib.Path)
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument('img_path', type=pathlib.Path, nargs='?')
+    input_group.add_argument(
+        '--batch', type=pathlib.Path, metavar='DIR',
+        help='run every image in DIR through a single pipeline',
+    )
+    parser.add_argument('--cipher', choices=('caesar', 'atbash', 'keyword'), default='caesar')
     parser.add_argument('--shift', type=int, default=0)
-    parser.add_argument('--save_path', type=pathlib.Path)
+    parser.add_argument('--keyword', default='', help='keyword for the keyword cipher')
+    parser.add_argument(
+        '--solve', nargs='?', const='caesar', choices=('caesar', 'substitution'),
+        help='decipher the image instead of enciphering it, finding the key automatically',
+    )
+    parser.add_argument(
+        '--restarts', type=int, default=16,
+        help='number of random keys the substitution solver starts hill climbing from',
+    )
+    parser.add_argument(
+        '--solver_workers', type=int, default=1,
+        help='number of processes the substitution solver runs restarts in (0 to use all CPUs)',
+    )
+    parser.add_argument(
+        '--save_path', type=pathlib.Path,
+        help='output image path, or output directory in batch mode (defaults to DIR)',
+    )
+    parser.add_argument(
+        '--multipage', action='store_true',
+        help='save every page (of every image in batch mode) into one multi-page TIFF or PDF file '
+        'at --save_path, instead of one image per page',
+    )
+    parser.add_argument(
+        '--save_format', choices=('png', 'jpeg', 'webp', 'ppm', 'bmp', 'tiff'),
+        help='format to save images in (defaults to PNG, or the format of --save_path\'s '
+        'extension), PPM, BMP and TIFF are saved uncompressed',
+    )
+    parser.add_argument(
+        '--compress_level', type=int, choices=range(10), metavar='{0..9}',
+        help='PNG compression level, 0 saves fastest and 9 saves the smallest files',
+    )
+    parser.add_argument('--quality', type=int, help='JPEG or WebP quality, from 0 to 100')
+    parser.add_argument(
+        '--save_workers', type=int, default=0,
+        help='number of threads saving images in the background while the next images are run '
+        '(0 to save each image before running the next)',
+    )
+    parser.add_argument(
+        '--text_output', type=pathlib.Path, metavar='FILE',
+        help='save recognized and enciphered characters with their bounding boxes to a JSON Lines '
+        '(.jsonl, appended to) or Parquet (.parquet, requires pyarrow) file, without '
+        'reconstructing or saving images unless --save_path (or --show) is given',
+    )
     parser.add_argument("--show", action="store_true")
+    parser.add_argument(
+        '--no_sample_colors', action='store_true',
+        help='draw characters black on white instead of in colors sampled from the image',
+    )
+    parser.add_argument(
+        '--runs', choices=('char', 'word', 'line'), default='char',
+        help='draw each character, or each word or line in one font with a single draw call',
+    )
+    parser.add_argument(
+        '--font_metrics', type=pathlib.Path, metavar='NPZ',
+        help='font metrics table to load, built and saved there on first use',
+    )
+    parser.add_argument(
+        '--ocr_backend', choices=('pytesseract', 'libtesseract'), default='pytesseract',
+        help='run the tesseract binary per image, or keep tesseract loaded in-process',
+    )
+    parser.add_argument(
+        '--ocr_tile_size', type=int, default=0, metavar='PIXELS',
+        help='read images larger than PIXELS in overlapping tiles, in parallel (0 to disable)',
+    )
+    parser.add_argument(
+        '--ocr_cache_dir', type=pathlib.Path, metavar='DIR',
+        help='directory OCR results are cached in, so images seen before skip OCR '
+        '(defaults to ~/.cache/ocr_cipher_solver/ocr)',
+    )
+    parser.add_argument(
+        '--no_ocr_cache', action='store_true',
+        help='run OCR on every image, without reading or writing cached results',
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='number of worker processes to use in batch mode (0 to use all CPUs)',
+    )
+    parser.add_argument(
+        '--max_in_flight', type=int,
+        help='maximum number of images queued for workers (defaults to twice the worker count)',
+    )
+    parser.add_argument(
+        '--stream', action='store_true',
+        help='in batch mode, run each stage in its own threads, overlapping stages across images',
+    )
+    parser.add_argument(
+        '--ocr_workers', type=int, default=1,
+        help='number of OCR threads when streaming',
+    )
+    parser.add_argument(
+        '--unordered', action='store_true',
+        help='report batch results as they complete instead of in input order',
+    )
+
+    parser.add_argument(
+        '--report', type=pathlib.Path, metavar='JSONL',
+        help='append a report of stage timings, cache hit rates, and memory use per image to JSONL',
+    )
+    parser.add_argument(
+        '--metrics', type=pathlib.Path, metavar='PROM',
+        help='write stage timings and cache hit totals over all images to PROM, in Prometheus '
+        'format',
+    )
+    parser.add_argument(
+        '--profile', type=pathlib.Path, metavar='PSTATS',
+        help='profile the run with cProfile, dumping stats to PSTATS (worker processes not '
+        'included)',
+    )
 
     args = parser.parse_args()
 
-    # initialize pipeline
+    if args.restarts < 1:
+        parser.error('--restarts must be at least 1')
+
+    # multi-page files are written one page at a time, in order
+    if args.multipage and (
+        args.save_path is None or args.save_path.suffix.lower() not in ('.tif', '.tiff', '.pdf')
+    ):
+        parser.error('--multipage requires a --save_path ending in .tif, .tiff or .pdf')
+    if args.multipage and (args.stream or args.workers != 1):
+        parser.error('--multipage cannot be combined with --stream or --workers')
+    if args.multipage and (
+        args.save_format or args.compress_level is not None or args.quality is not None
+        or args.save_workers
+    ):
+        parser.error('--multipage pages are saved in the format of --save_path, one at a time')
+    if args.text_output is not None and args.workers != 1:
+        parser.error('--text_output cannot be combined with --workers')
+    if args.save_workers and args.workers != 1:
+        parser.error('--save_workers cannot be combined with --workers (workers save images)')
+
+    # in batch mode, save images into a directory named after their source image (DIR by
+    # default), unless only characters are saved
+    if args.batch is not None and args.save_path is None and args.text_output is None:
+        args.save_path = args.batch
+    if args.save_path is None and args.text_output is None and not args.show:
+        parser.error('--save_path is required unless --batch, --show or --text_output is given')
+
+    # import pipeline stages only once arguments are parsed, and optional ones only if used, so
+    # --help and argument errors are quick
+    import dataclasses
+    from typing import Tuple
+    from typing import Type
+    from typing import Union
+
+    from PIL import Image
+
+    from ocr_cipher_solver.ciphers.base import Encipherer
+    from ocr_cipher_solver.ocr import OCR
+    from ocr_cipher_solver.ocr_cache import DEFAULT_CACHE_DIR
+    from ocr_cipher_solver.ocr_cache import OCRCache
+    from ocr_cipher_solver.outputs import PipelineOutput
+    from ocr_cipher_solver.outputs.save_image import SaveImage
+    from ocr_cipher_solver.pipeline import ImagePipeline
+    from ocr_cipher_solver.reconstructor import Reconstructor
+    from ocr_cipher_solver.utils import font_utils
+
+    # load font metrics table used for fitting fonts to characters
+    if args.font_metrics is not None:
+        font_utils.set_font_metrics(font_utils.FontMetrics.load_or_build(args.font_metrics))
+
+    # create cipher (or solver)
+    cipher: Encipherer
+    if args.solve == 'caesar':
+        from ocr_cipher_solver.solvers import CaesarSolver
+
+        cipher, suffix = CaesarSolver(), '_solved'
+    elif args.solve == 'substitution':
+        from ocr_cipher_solver.solvers import SubstitutionSolver
+
+        cipher = SubstitutionSolver(
+            num_restarts=args.restarts, num_workers=args.solver_workers or None,
+        )
+        suffix = '_solved'
+    elif args.cipher == 'atbash':
+        from ocr_cipher_solver.ciphers import AtbashCipher
+
+        cipher, suffix = AtbashCipher(), '_enciphered_atbash'
+    elif args.cipher == 'keyword':
+        from ocr_cipher_solver.ciphers import KeywordCipher
+
+        cipher, suffix = KeywordCipher(args.keyword), f'_enciphered_keyword_{args.keyword}'
+    else:
+        from ocr_cipher_solver.ciphers import CaesarianCipher
+
+        cipher, suffix = CaesarianCipher(shift=args.shift), f'_enciphered_{args.shift}'
+
+    # save images, if there is a path to save them to
+    outputs: Tuple[PipelineOutput, ...] = ()
+    if args.save_path is not None:
+        if args.multipage:
+            from ocr_cipher_solver.outputs.save_pages import SavePages
+
+            outputs += (SavePages(args.save_path),)
+        else:
+            # pages of multi-page images are saved into a directory, named after their page
+            if args.batch is None and not args.save_path.is_dir():
+                with Image.open(args.img_path) as img:
+                    if getattr(img, 'n_frames', 1) > 1:
+                        parser.error(
+                            f'{args.img_path} has several pages, pass --multipage or a directory '
+                            'as --save_path',
+                        )
+            try:
+                outputs += (
+                    SaveImage(
+                        args.save_path, suffix=suffix, format=args.save_format,
+                        compress_level=args.compress_level, quality=args.quality,
+                        num_workers=args.save_workers,
+                    ),
+                )
+            except ValueError as error:
+                parser.error(str(error))
+
+    # create OCR stage, caching results of the whole (possibly tiled) image
+    ocr_cache = None if args.no_ocr_cache else OCRCache(args.ocr_cache_dir or DEFAULT_CACHE_DIR)
+    ocr_backend: Type[OCR] = OCR
+    if args.ocr_backend == 'libtesseract':
+        from ocr_cipher_solver.libtesseract import LibTesseractOCR
+
+        ocr_backend = LibTesseractOCR
+    ocr: OCR
+    if args.ocr_tile_size:
+        from ocr_cipher_solver.tiled_ocr import TiledOCR
+
+        ocr = TiledOCR(ocr_backend(), tile_size=args.ocr_tile_size, cache=ocr_cache)
+    else:
+        ocr = ocr_backend(cache=ocr_cache)
+
+    # create other output heads
+    if args.text_output is not None:
+        from ocr_cipher_solver.outputs.save_characters import SaveCharacters
+
+        try:
+            outputs += (SaveCharacters(args.text_output),)
+        except (ValueError, ImportError) as error:
+            parser.error(str(error))
+    if args.show:
+        from ocr_cipher_solver.outputs.show_image import ShowImage
+
+        outputs += (ShowImage(),)
+
+    # group characters into runs drawn in one font, if requested
+    run_level = None
+    if args.runs != 'char':
+        from ocr_cipher_solver.reconstructor.text_runs import RunLevel
+
+        run_level = RunLevel.Word if args.runs == 'word' else RunLevel.Line
+
+    # initialize pipeline (images are opened only for the pipeline, so they can be drawn onto)
     pipeline = ImagePipeline(
-        OCR(),
-        CaesarianCipher(shift=args.shift),
-        Reconstructor(),
-        (SaveImage(args.save_path), ShowImage()) if args.show else (SaveImage(args.save_path),)
+        ocr,
+        cipher,
+        Reconstructor(
+            sample_colors=not args.no_sample_colors, in_place=True, run_level=run_level,
+        ),
+        outputs,
+        instrument=args.report is not None or args.metrics is not None,
     )
 
-    # run pipeline
-    pipeline.run_pipeline(Image.open(args.img_path))
+    profiler = None
+    if args.profile is not None:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    # run pipeline, on every page of the image (one page at a time)
+    results = []
+    if args.batch is None:
+        for result in pipeline.run_frames(args.img_path):
+            results.append(dataclasses.replace(result, reconstructed_image=None))
+            if result.source is not None and result.source != args.img_path:
+                print(f'{result.source.name}: {result.num_chars} chars in {result.elapsed:.3f}s')
+            if args.solve == 'caesar':
+                assert isinstance(cipher, CaesarSolver)
+                print(f'solved with shift {cipher.shift}')
+            elif args.solve == 'substitution':
+                assert isinstance(cipher, SubstitutionSolver) and cipher.key is not None
+                print(
+                    f'solved with key {"".join(cipher.key.values())} (for {"".join(cipher.key)})',
+                )
+    else:
+        import time
+
+        from ocr_cipher_solver.parallel import ParallelImagePipeline
+        from ocr_cipher_solver.streaming import StreamingImagePipeline
+        from ocr_cipher_solver.utils import find_images
+
+        runner: Union[ImagePipeline, ParallelImagePipeline, StreamingImagePipeline]
+        if args.stream:
+            runner = StreamingImagePipeline(
+                pipeline, stage_workers={'ocr': args.ocr_workers}, max_in_flight=args.max_in_flight,
+                ordered=not args.unordered,
+            )
+        elif args.workers == 1:
+            runner = pipeline
+        else:
+            runner = ParallelImagePipeline(
+                pipeline, num_workers=args.workers or None, max_in_flight=args.max_in_flight,
+                ordered=not args.unordered,
+            )
+
+        num_images, num_chars, start = 0, 0, time.perf_counter()
+        for result in runner.run_many(find_images(args.batch)):
+            results.append(dataclasses.replace(result, reconstructed_image=None))
+            num_images += 1
+            num_chars += result.num_chars
+            print(f'{result.source}: {result.num_chars} chars in {result.elapsed:.3f}s')
+
+    # finish outputs (e.g. close multi-page files, or wait for images saved in the background)
+    for output in pipeline.outputs:
+        output.close()
+    ocr.close()
+    if args.solve == 'substitution':
+        assert isinstance(cipher, SubstitutionSolver)
+        cipher.close()
+
+    if args.batch is not None:
+        total = time.perf_counter() - start
+        print(
+            f'processed {num_images} images ({num_chars} chars) in {total:.3f}s: '
+            f'{num_images / total if total else 0.0:.2f} images/s, '
+            f'{num_chars / total if total else 0.0:.1f} chars/s',
+        )
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+
+    # write instrumentation reports (not available when streaming)
+    reports = [result.report for result in results if result.report is not None]
+    if args.report is not None:
+        with args.report.open('a') as report_file:
+            report_file.writelines(f'{report.to_json()}\n' for report in reports)
+    if args.metrics is not None:
+        from ocr_cipher_solver.instrumentation import to_prometheus
+
+        args.metrics.write_text(to_prometheus(reports))
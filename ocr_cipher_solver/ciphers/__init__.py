@@ -1,2 +1,5 @@
 from .base import Encipherer
 from .caesar import CaesarianCipher
+from .substitution import AtbashCipher
+from .substitution import KeywordCipher
+from .substitution import SubstitutionCipher
@@ -0,0 +1,148 @@
+"""Substitution ciphers, applied through precomputed translation tables."""
+import string
+from typing import Dict
+from typing import Mapping
+
+import numpy as np
+
+from ocr_cipher_solver.ciphers.base import Encipherer
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+
+
+def alphabet_mapping(alphabet: str) -> Dict[str, str]:
+    """Creates mapping from the lowercase alphabet onto a cipher alphabet, for both cases.
+
+    Parameters
+    ----------
+    alphabet : str
+        cipher alphabet, the 26 lowercase letters in substituted order
+
+    Returns
+    -------
+    Dict[str, str]
+        mapping of lowercase and uppercase letters to their substitutes
+    """
+    if sorted(alphabet) != list(string.ascii_lowercase):
+        raise ValueError(
+            f'Cipher alphabet must be a permutation of the lowercase letters, got {alphabet!r}.',
+        )
+
+    return {
+        **dict(zip(string.ascii_lowercase, alphabet)),
+        **dict(zip(string.ascii_uppercase, alphabet.upper())),
+    }
+
+
+class SubstitutionCipher(Encipherer):
+    """Substitutes characters according to a mapping; unmapped characters are left unchanged."""
+
+    def __init__(self, mapping: Mapping[str, str]):
+        """Creates substitution cipher, compiling mapping into translation tables.
+
+        Parameters
+        ----------
+        mapping : Mapping[str, str]
+            mapping of characters to their substitutes (both single characters)
+        """
+        for char, substitute in mapping.items():
+            if len(char) != 1 or len(substitute) != 1:
+                raise ValueError(
+                    f'Cannot substitute {char!r} with {substitute!r}, both must be single '
+                    'characters.',
+                )
+
+        self._mapping = dict(mapping)
+
+        # codepoint lookup table, identity for unmapped codepoints
+        self._table = np.arange(max(map(ord, self._mapping), default=-1) + 1, dtype=np.uint32)
+        self._table[[ord(char) for char in self._mapping]] = [
+            ord(char) for char in self._mapping.values()
+        ]
+
+        # string translation table, for enciphering plain text
+        self._translation = str.maketrans(self._mapping)
+
+    @property
+    def mapping(self) -> Dict[str, str]:
+        """Mapping of characters to their substitutes."""
+        return dict(self._mapping)
+
+    def translate(self, text: str) -> str:
+        """Enciphers plain text.
+
+        Parameters
+        ----------
+        text : str
+            text to encipher
+
+        Returns
+        -------
+        str
+            enciphered text
+        """
+        return text.translate(self._translation)
+
+    def translate_codepoints(self, codepoints: np.ndarray) -> np.ndarray:
+        """Enciphers array of codepoints with a single table lookup.
+
+        Parameters
+        ----------
+        codepoints : np.ndarray
+            uint32 array of codepoints to encipher
+
+        Returns
+        -------
+        np.ndarray
+            uint32 array of enciphered codepoints
+        """
+        if len(self._table) == 0:
+            return codepoints
+
+        in_table = codepoints < len(self._table)
+        return np.where(in_table, self._table[np.where(in_table, codepoints, 0)], codepoints)
+
+    def run(self, pos_char_set: PositionalCharacterSet) -> PositionalCharacterSet:
+        """Runs substitution on provided positional character set and returns ciphered set.
+
+        Bounding boxes of the ciphered set are shared with the input set.
+
+        Parameters
+        ----------
+        pos_char_set : PositionalCharacterSet
+            input positional character set
+
+        Returns
+        -------
+        PositionalCharacterSet
+            ciphered positional character set
+        """
+        if not isinstance(pos_char_set, PositionalCharacterSet):
+            pos_char_set = PositionalCharacterSet.from_characters(pos_char_set)
+
+        return pos_char_set.with_codepoints(self.translate_codepoints(pos_char_set.codepoints))
+
+
+class AtbashCipher(SubstitutionCipher):
+    """Atbash cipher implementation (reverses the alphabet)."""
+
+    def __init__(self):
+        """Creates atbash cipher."""
+        super().__init__(alphabet_mapping(string.ascii_lowercase[::-1]))
+
+
+class KeywordCipher(SubstitutionCipher):
+    """Keyword cipher implementation."""
+
+    def __init__(self, keyword: str):
+        """Creates keyword cipher, whose alphabet starts with the keyword's letters.
+
+        Parameters
+        ----------
+        keyword : str
+            keyword to build cipher alphabet from (non-letters and repeated letters are ignored)
+        """
+        letters = [char for char in keyword.lower() if char in string.ascii_lowercase]
+        alphabet = ''.join(dict.fromkeys(letters + list(string.ascii_lowercase)))
+
+        super().__init__(alphabet_mapping(alphabet))
+        self._keyword = keyword
@@ -1,8 +1,17 @@
 from __future__ import annotations
 
 import dataclasses
+import struct
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import overload
 from typing import Tuple
+from typing import Union
+
+import numpy as np
 
 from .bounding_box import BoundingBox
 from .character import Character
@@ -52,4 +61,322 @@ class PositionalCharacter:
         )
 
 
-PositionalCharacterSet = List[PositionalCharacter]
+def _to_codepoints(chars: List[Character]) -> np.ndarray:
+    """Converts characters to array of unicode codepoints.
+
+    Parameters
+    ----------
+    chars : List[Character]
+        characters to convert, each of length one
+
+    Returns
+    -------
+    np.ndarray
+        uint32 array of codepoints
+    """
+    codepoints = np.frombuffer(''.join(chars).encode('utf-32-le'), dtype='<u4').astype(np.uint32)
+    if len(codepoints) != len(chars):
+        lengths = {len(char) for char in chars} - {1}
+        raise ValueError(
+            f'Character cannot be longer than length one, has length {lengths.pop()}.',
+        )
+    return codepoints
+
+
+# header of serialized character sets: magic, number of characters, image width, image height
+_SET_HEADER = struct.Struct('<4sIII')
+_SET_MAGIC = b'PCS1'
+
+
+@dataclasses.dataclass(eq=False)
+class PositionalCharacterSet:
+    """Set of positional characters, stored as a codepoint column and bounding box columns.
+
+    Bounding box columns use the same coordinates as BoundingBox. Iterating over or indexing the
+    set gives PositionalCharacter views of its rows.
+    """
+    codepoints: np.ndarray
+    left: np.ndarray
+    top: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+    img_width: int
+    img_height: int
+
+    def __post_init__(self):
+        """Converts columns to arrays and checks that they are of equal length."""
+        self.codepoints = np.asarray(self.codepoints, dtype=np.uint32)
+        self.left = np.asarray(self.left, dtype=np.int32)
+        self.top = np.asarray(self.top, dtype=np.int32)
+        self.width = np.asarray(self.width, dtype=np.int32)
+        self.height = np.asarray(self.height, dtype=np.int32)
+
+        columns = (self.codepoints, self.left, self.top, self.width, self.height)
+        lengths = {len(column) for column in columns}
+        if len(lengths) != 1:
+            raise ValueError(
+                f'Character set columns must have the same length, have lengths {lengths}.',
+            )
+
+    @classmethod
+    def from_characters(
+        cls, chars: Iterable[PositionalCharacter], image_shape: Tuple[int, int] = (0, 0),
+    ) -> PositionalCharacterSet:
+        """Creates character set from positional characters.
+
+        Parameters
+        ----------
+        chars : Iterable[PositionalCharacter]
+            positional characters to store in set
+        image_shape : Tuple[int, int]
+            shape of image, by default taken from the first character's bounding box
+
+        Returns
+        -------
+        PositionalCharacterSet
+            character set containing characters
+        """
+        chars = list(chars)
+        if chars:
+            image_shape = (chars[0].bounding_box.img_width, chars[0].bounding_box.img_height)
+
+        return cls(
+            _to_codepoints([char.character for char in chars]),
+            np.array([char.bounding_box.left for char in chars], dtype=np.int32),
+            np.array([char.bounding_box.top for char in chars], dtype=np.int32),
+            np.array([char.bounding_box.width for char in chars], dtype=np.int32),
+            np.array([char.bounding_box.height for char in chars], dtype=np.int32),
+            *image_shape,
+        )
+
+    @classmethod
+    def from_tesseract_chars(
+        cls, chars: Dict[str, List[Any]], image_shape: Tuple[int, int],
+    ) -> PositionalCharacterSet:
+        """Creates character set from pytesseract character set.
+
+        Parameters
+        ----------
+        chars : Dict[str, List[Any]]
+            pytesseract character set, with char, left, bottom, right, and top lists
+        image_shape : Tuple[int, int]
+            shape of image
+
+        Returns
+        -------
+        PositionalCharacterSet
+            character set constructed from tesseract characters
+        """
+        left = np.asarray(chars['left'], dtype=np.int32)
+        top = np.asarray(chars['top'], dtype=np.int32)
+
+        return cls(
+            _to_codepoints(chars['char']),
+            left,
+            top,
+            np.asarray(chars['right'], dtype=np.int32) - left,
+            top - np.asarray(chars['bottom'], dtype=np.int32),
+            *image_shape,
+        )
+
+    @classmethod
+    def concatenate(
+        cls, char_sets: Iterable[PositionalCharacterSet], image_shape: Tuple[int, int],
+    ) -> PositionalCharacterSet:
+        """Joins character sets read from the same image into one set, in order.
+
+        Parameters
+        ----------
+        char_sets : Iterable[PositionalCharacterSet]
+            character sets to join, with bounding boxes in image coordinates
+        image_shape : Tuple[int, int]
+            shape of image
+
+        Returns
+        -------
+        PositionalCharacterSet
+            character set containing the characters of every set
+        """
+        char_sets = list(char_sets)
+
+        def join(column: str) -> np.ndarray:
+            return np.concatenate([getattr(char_set, column) for char_set in char_sets] or [[]])
+
+        return cls(
+            join('codepoints'), join('left'), join('top'), join('width'), join('height'),
+            *image_shape,
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> PositionalCharacterSet:
+        """Creates character set from its serialized form.
+
+        Parameters
+        ----------
+        data : bytes
+            character set serialized by to_bytes
+
+        Returns
+        -------
+        PositionalCharacterSet
+            deserialized character set
+        """
+        if len(data) < _SET_HEADER.size:
+            raise ValueError(
+                f'Serialized character set is truncated, got {len(data)} bytes of its header.',
+            )
+        magic, num_chars, img_width, img_height = _SET_HEADER.unpack_from(data)
+        if magic != _SET_MAGIC:
+            raise ValueError(f'Data is not a serialized character set, starts with {magic!r}.')
+
+        # five 4-byte columns per character
+        if len(data) != _SET_HEADER.size + 5 * 4 * num_chars:
+            raise ValueError(
+                f'Serialized character set has {len(data)} bytes, expected {num_chars} characters.',
+            )
+
+        columns = np.frombuffer(data, dtype='<u4', offset=_SET_HEADER.size).copy()
+        codepoints, left, top, width, height = columns.reshape(5, num_chars)
+        return cls(
+            codepoints, left.view('<i4'), top.view('<i4'), width.view('<i4'), height.view('<i4'),
+            img_width, img_height,
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serializes character set as a header followed by its little-endian columns.
+
+        Returns
+        -------
+        bytes
+            serialized character set
+        """
+        return _SET_HEADER.pack(_SET_MAGIC, len(self), self.img_width, self.img_height) + b''.join(
+            column.astype(dtype).tobytes()
+            for column, dtype in (
+                (self.codepoints, '<u4'),
+                (self.left, '<i4'),
+                (self.top, '<i4'),
+                (self.width, '<i4'),
+                (self.height, '<i4'),
+            )
+        )
+
+    @property
+    def image_shape(self) -> Tuple[int, int]:
+        """Shape of image characters were read from."""
+        return self.img_width, self.img_height
+
+    @property
+    def text(self) -> str:
+        """Characters of set, joined into a string."""
+        return self.codepoints.astype('<u4').tobytes().decode('utf-32-le')
+
+    def with_codepoints(self, codepoints: np.ndarray) -> PositionalCharacterSet:
+        """Creates character set with new characters in the same bounding boxes.
+
+        Bounding box columns are shared with this set, not copied.
+
+        Parameters
+        ----------
+        codepoints : np.ndarray
+            codepoints of new characters, one per character in this set
+
+        Returns
+        -------
+        PositionalCharacterSet
+            character set with new characters
+        """
+        return dataclasses.replace(self, codepoints=codepoints)
+
+    def changed_from(self, other: PositionalCharacterSet) -> np.ndarray:
+        """Finds characters that differ from the character at the same index of another set.
+
+        Parameters
+        ----------
+        other : PositionalCharacterSet
+            set to compare with, such as the set this set was enciphered from
+
+        Returns
+        -------
+        np.ndarray
+            boolean mask of characters whose codepoint or bounding box differs, all True if the
+            sets are of different lengths
+        """
+        if len(self) != len(other):
+            return np.ones(len(self), dtype=bool)
+
+        return (
+            (self.codepoints != other.codepoints)
+            | (self.left != other.left)
+            | (self.top != other.top)
+            | (self.width != other.width)
+            | (self.height != other.height)
+        )
+
+    def bounding_box(self, index: int) -> BoundingBox:
+        """Gets bounding box of character.
+
+        Parameters
+        ----------
+        index : int
+            index of character
+
+        Returns
+        -------
+        BoundingBox
+            bounding box of character
+        """
+        return BoundingBox(
+            int(self.left[index]), int(self.top[index]),
+            int(self.width[index]), int(self.height[index]),
+            self.img_width, self.img_height,
+        )
+
+    def __len__(self) -> int:
+        return len(self.codepoints)
+
+    def __iter__(self) -> Iterator[PositionalCharacter]:
+        for codepoint, left, top, width, height in zip(
+            self.codepoints.tolist(), self.left.tolist(), self.top.tolist(),
+            self.width.tolist(), self.height.tolist(),
+        ):
+            yield PositionalCharacter(
+                chr(codepoint),
+                BoundingBox(left, top, width, height, self.img_width, self.img_height),
+            )
+
+    @overload
+    def __getitem__(self, index: int) -> PositionalCharacter:
+        ...
+
+    @overload
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> PositionalCharacterSet:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return PositionalCharacter(chr(self.codepoints[index]), self.bounding_box(index))
+
+        return dataclasses.replace(
+            self,
+            codepoints=self.codepoints[index],
+            left=self.left[index],
+            top=self.top[index],
+            width=self.width[index],
+            height=self.height[index],
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PositionalCharacterSet):
+            return NotImplemented
+
+        return self.image_shape == other.image_shape and all(
+            np.array_equal(column, other_column)
+            for column, other_column in (
+                (self.codepoints, other.codepoints),
+                (self.left, other.left),
+                (self.top, other.top),
+                (self.width, other.width),
+                (self.height, other.height),
+            )
+        )
@@ -0,0 +1,229 @@
+"""Defines per-stage timing and resource reports of pipeline runs."""
+import contextlib
+import contextvars
+import dataclasses
+import json
+import pathlib
+import sys
+import time
+from typing import ContextManager
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+
+@dataclasses.dataclass
+class StageTiming:
+    """Time spent in a stage, summed over its calls.
+
+    CPU time is that of the calling thread, so work done in other processes (such as the tesseract
+    binary run by pytesseract) only shows up in wall time.
+    """
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+
+
+@dataclasses.dataclass
+class CacheStats:
+    """Hits and misses of a cache during a run."""
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """Fraction of lookups that hit, None if there were no lookups."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+
+class Timings:
+    """Collects stage timings of a run."""
+
+    def __init__(self):
+        self.stages: Dict[str, StageTiming] = {}
+
+    @contextlib.contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """Adds wall and CPU time spent in the context to a stage.
+
+        Parameters
+        ----------
+        stage : str
+            name of stage, nested stages are named after their parent (e.g. reconstruct.colors)
+        """
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            timing = self.stages.setdefault(stage, StageTiming())
+            timing.wall += time.perf_counter() - wall_start
+            timing.cpu += time.thread_time() - cpu_start
+            timing.calls += 1
+
+
+# timings collected by the run in progress in the current context, if it is instrumented
+_active_timings: contextvars.ContextVar[Optional[Timings]] = contextvars.ContextVar(
+    'active_timings', default=None,
+)
+
+
+def timed(stage: str) -> ContextManager[None]:
+    """Times the context as a stage of the instrumented run in progress, if any.
+
+    Parameters
+    ----------
+    stage : str
+        name of stage
+
+    Returns
+    -------
+    ContextManager[None]
+        context measuring the stage, which does nothing outside instrumented runs
+    """
+    timings = _active_timings.get()
+    if timings is None:
+        return contextlib.nullcontext()
+    return timings.measure(stage)
+
+
+@contextlib.contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """Collects timings of stages run in the context.
+
+    Yields
+    ------
+    Timings
+        timings of stages run in the context
+    """
+    timings = Timings()
+    token = _active_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _active_timings.reset(token)
+
+
+def peak_rss() -> Optional[int]:
+    """Gets peak resident set size of the process so far.
+
+    Returns
+    -------
+    Optional[int]
+        peak memory use in bytes, None where it can't be measured
+    """
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # reported in kilobytes on Linux, bytes on macOS
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+@dataclasses.dataclass
+class RunReport:
+    """Structured report of one pipeline run."""
+    source: Optional[pathlib.Path]
+    num_chars: int
+    elapsed: float
+    stages: Dict[str, StageTiming]
+    caches: Dict[str, CacheStats]
+    peak_rss: Optional[int]
+
+    def to_dict(self) -> dict:
+        """Converts report to a JSON-serializable dictionary.
+
+        Returns
+        -------
+        dict
+            report, with cache hit rates
+        """
+        return {
+            'source': str(self.source) if self.source is not None else None,
+            'num_chars': self.num_chars,
+            'elapsed': self.elapsed,
+            'stages': {name: dataclasses.asdict(timing) for name, timing in self.stages.items()},
+            'caches': {
+                name: dict(dataclasses.asdict(stats), hit_rate=stats.hit_rate)
+                for name, stats in self.caches.items()
+            },
+            'peak_rss': self.peak_rss,
+        }
+
+    def to_json(self) -> str:
+        """Converts report to a single line of JSON.
+
+        Returns
+        -------
+        str
+            report as JSON, without newlines
+        """
+        return json.dumps(self.to_dict())
+
+
+def to_prometheus(reports: Iterable[RunReport], prefix: str = 'ocr_cipher_solver') -> str:
+    """Aggregates reports into metrics in the Prometheus text exposition format.
+
+    Parameters
+    ----------
+    reports : Iterable[RunReport]
+        reports of runs to aggregate
+    prefix : str
+        prefix of metric names
+
+    Returns
+    -------
+    str
+        run, character, stage time, and cache lookup totals, and peak memory use
+    """
+    num_runs, num_chars = 0, 0
+    stages: Dict[str, StageTiming] = {}
+    caches: Dict[str, CacheStats] = {}
+    max_rss = None
+    for report in reports:
+        num_runs += 1
+        num_chars += report.num_chars
+        for name, timing in report.stages.items():
+            total = stages.setdefault(name, StageTiming())
+            total.wall += timing.wall
+            total.cpu += timing.cpu
+            total.calls += timing.calls
+        for name, stats in report.caches.items():
+            total_stats = caches.setdefault(name, CacheStats())
+            total_stats.hits += stats.hits
+            total_stats.misses += stats.misses
+        if report.peak_rss is not None:
+            max_rss = max(max_rss or 0, report.peak_rss)
+
+    lines = [
+        f'# TYPE {prefix}_runs_total counter',
+        f'{prefix}_runs_total {num_runs}',
+        f'# TYPE {prefix}_chars_total counter',
+        f'{prefix}_chars_total {num_chars}',
+    ]
+    stage_metrics = (
+        ('stage_wall_seconds', 'wall'), ('stage_cpu_seconds', 'cpu'), ('stage_calls', 'calls'),
+    )
+    for metric, field in stage_metrics:
+        lines.append(f'# TYPE {prefix}_{metric}_total counter')
+        lines.extend(
+            f'{prefix}_{metric}_total{{stage="{name}"}} {getattr(timing, field)}'
+            for name, timing in sorted(stages.items())
+        )
+    for metric, field in (('cache_hits', 'hits'), ('cache_misses', 'misses')):
+        lines.append(f'# TYPE {prefix}_{metric}_total counter')
+        lines.extend(
+            f'{prefix}_{metric}_total{{cache="{name}"}} {getattr(stats, field)}'
+            for name, stats in sorted(caches.items())
+        )
+    if max_rss is not None:
+        lines += [f'# TYPE {prefix}_peak_rss_bytes gauge', f'{prefix}_peak_rss_bytes {max_rss}']
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,338 @@
+"""Defines an OCR backend that calls libtesseract in-process, through its C API."""
+import ctypes
+import ctypes.util
+import os
+import shlex
+import threading
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+from .data_formats import PositionalCharacterSet
+from .ocr import OCR
+from .ocr_cache import OCRCache
+from .utils.image_buffer import image_pixels
+
+
+# tesseract page iterator level of single symbols (characters)
+RIL_SYMBOL = 4
+
+# image modes passed to tesseract as-is, with their number of bytes per pixel
+_BYTES_PER_PIXEL = {'L': 1, 'RGB': 3, 'RGBA': 4}
+
+_LIBRARY_NAMES = ('tesseract', 'tesseract-5', 'tesseract50', 'tesseract41', 'tesseract40')
+
+# signatures of the C API functions used, as (name, result type, argument types)
+_C_API = (
+    ('TessVersion', ctypes.c_char_p, ()),
+    ('TessBaseAPICreate', ctypes.c_void_p, ()),
+    ('TessBaseAPIInit3', ctypes.c_int, (ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p)),
+    ('TessBaseAPISetVariable', ctypes.c_int, (ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p)),
+    ('TessBaseAPISetPageSegMode', None, (ctypes.c_void_p, ctypes.c_int)),
+    (
+        'TessBaseAPISetImage', None,
+        (ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int),
+    ),
+    ('TessBaseAPIRecognize', ctypes.c_int, (ctypes.c_void_p, ctypes.c_void_p)),
+    ('TessBaseAPIGetIterator', ctypes.c_void_p, (ctypes.c_void_p,)),
+    ('TessBaseAPIClear', None, (ctypes.c_void_p,)),
+    ('TessBaseAPIEnd', None, (ctypes.c_void_p,)),
+    ('TessBaseAPIDelete', None, (ctypes.c_void_p,)),
+    ('TessResultIteratorGetPageIterator', ctypes.c_void_p, (ctypes.c_void_p,)),
+    ('TessResultIteratorGetUTF8Text', ctypes.c_void_p, (ctypes.c_void_p, ctypes.c_int)),
+    ('TessResultIteratorNext', ctypes.c_int, (ctypes.c_void_p, ctypes.c_int)),
+    ('TessResultIteratorDelete', None, (ctypes.c_void_p,)),
+    ('TessDeleteText', None, (ctypes.c_void_p,)),
+    (
+        'TessPageIteratorBoundingBox', ctypes.c_int,
+        (ctypes.c_void_p, ctypes.c_int) + (ctypes.POINTER(ctypes.c_int),) * 4,
+    ),
+)
+
+
+def load_library(library_path: Optional[str] = None) -> ctypes.CDLL:
+    """Loads libtesseract and declares the signatures of its C API functions.
+
+    Parameters
+    ----------
+    library_path : Optional[str]
+        path of the tesseract shared library, by default found on the library search path
+
+    Returns
+    -------
+    ctypes.CDLL
+        loaded tesseract library
+    """
+    if library_path is None:
+        library_path = next(filter(None, map(ctypes.util.find_library, _LIBRARY_NAMES)), None)
+    if library_path is None:
+        raise OSError('libtesseract could not be found, pass its path as library_path.')
+
+    lib = ctypes.CDLL(library_path)
+    for name, restype, argtypes in _C_API:
+        function = getattr(lib, name)
+        function.restype = restype
+        function.argtypes = argtypes
+
+    return lib
+
+
+def parse_config(config: str) -> Tuple[Optional[int], Dict[str, str]]:
+    """Parses the subset of tesseract command line options supported in-process.
+
+    Parameters
+    ----------
+    config : str
+        tesseract options, as passed to pytesseract (--psm N and -c name=value)
+
+    Returns
+    -------
+    Tuple[Optional[int], Dict[str, str]]
+        page segmentation mode (None if not set) and tesseract variables
+    """
+    page_seg_mode = None
+    variables = {}
+
+    args = shlex.split(config)
+    while args:
+        arg = args.pop(0)
+        if arg == '--psm' and args:
+            page_seg_mode = int(args.pop(0))
+        elif arg == '-c' and args and '=' in args[0]:
+            name, value = args.pop(0).split('=', 1)
+            variables[name] = value
+        else:
+            raise ValueError(f'Unsupported tesseract option for libtesseract backend: {arg!r}.')
+
+    return page_seg_mode, variables
+
+
+def symbols_to_char_set(
+    symbols: Iterable[Tuple[str, int, int, int, int]], image_size: Tuple[int, int],
+) -> PositionalCharacterSet:
+    """Converts recognized symbols to a character set, in the same coordinates as image_to_boxes.
+
+    Symbols of several characters (such as ligatures) are split into equal width characters.
+
+    Parameters
+    ----------
+    symbols : Iterable[Tuple[str, int, int, int, int]]
+        text of each symbol, with its left, top, right, and bottom pixel coordinates (measured from
+        the top left of the image)
+    image_size : Tuple[int, int]
+        width and height of image
+
+    Returns
+    -------
+    PositionalCharacterSet
+        character set read from image, with positions
+    """
+    img_height = image_size[1]
+    chars: Dict[str, List] = {'char': [], 'left': [], 'bottom': [], 'right': [], 'top': []}
+    for text, left, top, right, bottom in symbols:
+        for i, char in enumerate(text):
+            chars['char'].append(char)
+            chars['left'].append(left + (right - left) * i // len(text))
+            chars['right'].append(left + (right - left) * (i + 1) // len(text))
+
+            # tesseract boxes are measured from the bottom of the image
+            chars['bottom'].append(img_height - bottom)
+            chars['top'].append(img_height - top)
+
+    return PositionalCharacterSet.from_tesseract_chars(chars, image_size)
+
+
+class LibTesseractOCR(OCR):
+    """OCR stage that keeps tesseract engines loaded in-process, passing pixel buffers directly.
+
+    Each thread gets its own engine, created on first use and kept until close is called. Engines
+    aren't pickled, so a copy of this stage sent to a worker process creates its own.
+    """
+
+    def __init__(
+        self,
+        lang: str = 'eng',
+        config: str = '',
+        cache: Optional[OCRCache] = None,
+        library_path: Optional[str] = None,
+        tessdata_path: Optional[str] = None,
+    ):
+        """Creates libtesseract OCR stage.
+
+        Parameters
+        ----------
+        lang : str
+            tesseract language(s) to recognize
+        config : str
+            additional tesseract options, --psm N and -c name=value are supported
+        cache : Optional[OCRCache]
+            cache of OCR results, images already recognized with the same configuration skip OCR
+        library_path : Optional[str]
+            path of the tesseract shared library, by default found on the library search path
+        tessdata_path : Optional[str]
+            tesseract data directory, by default TESSDATA_PREFIX or tesseract's built-in path
+        """
+        super().__init__(lang, config, cache)
+        self.library_path = library_path
+        self.tessdata_path = tessdata_path
+
+        # check options up front, rather than on first use in a worker
+        self._page_seg_mode, self._variables = parse_config(config)
+        self._init_engines()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for name in ('_lib', '_engines', '_local', '_lock'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._init_engines()
+
+    def cache_config(self) -> Tuple[str, ...]:
+        """Gets everything besides the image that OCR results depend on, used in cache keys.
+
+        Returns
+        -------
+        Tuple[str, ...]
+            OCR backend name, engine version, language, and options
+        """
+        return type(self).__name__, self._get_lib().TessVersion().decode(), self.lang, self.config
+
+    def close(self):
+        """Ends and deletes every engine created by this stage."""
+        with self._lock:
+            for engine in self._engines:
+                self._lib.TessBaseAPIEnd(engine)
+                self._lib.TessBaseAPIDelete(engine)
+            self._engines.clear()
+            self._local = threading.local()
+
+    def _init_engines(self):
+        """Initializes (empty) per-process engine state."""
+        self._lib: Optional[ctypes.CDLL] = None
+        self._engines: List[int] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _get_lib(self) -> ctypes.CDLL:
+        """Gets tesseract library, loading it on first use."""
+        with self._lock:
+            if self._lib is None:
+                self._lib = load_library(self.library_path)
+            return self._lib
+
+    def _get_engine(self) -> int:
+        """Gets this thread's engine, creating and initializing it on first use."""
+        engine = getattr(self._local, 'engine', None)
+        if engine is not None:
+            return engine
+
+        lib = self._get_lib()
+        engine = lib.TessBaseAPICreate()
+        datapath = self.tessdata_path or os.environ.get('TESSDATA_PREFIX')
+        datapath_arg = datapath.encode() if datapath else None
+        if lib.TessBaseAPIInit3(engine, datapath_arg, self.lang.encode()) != 0:
+            lib.TessBaseAPIDelete(engine)
+            raise RuntimeError(f'Could not initialize tesseract with language {self.lang!r}.')
+
+        try:
+            if self._page_seg_mode is not None:
+                lib.TessBaseAPISetPageSegMode(engine, self._page_seg_mode)
+            for name, value in self._variables.items():
+                if not lib.TessBaseAPISetVariable(engine, name.encode(), value.encode()):
+                    raise ValueError(f'Unknown tesseract variable {name!r}.')
+        except Exception:
+            # engine isn't tracked yet, so free it here rather than leak it
+            lib.TessBaseAPIDelete(engine)
+            raise
+
+        with self._lock:
+            self._engines.append(engine)
+        self._local.engine = engine
+        return engine
+
+    def _recognize(self, input_image: Image.Image) -> PositionalCharacterSet:
+        """Recognizes characters in image with this thread's tesseract engine.
+
+        Parameters
+        ----------
+        input_image : Image.Image
+            image to run OCR on
+
+        Returns
+        -------
+        PositionalCharacterSet
+            character set read from image, with positions
+        """
+        lib = self._get_lib()
+        engine = self._get_engine()
+
+        # pass pixels to tesseract without encoding them
+        if input_image.mode not in _BYTES_PER_PIXEL:
+            input_image = input_image.convert('RGB')
+        bytes_per_pixel = _BYTES_PER_PIXEL[input_image.mode]
+        pixels = np.ascontiguousarray(image_pixels(input_image))
+        lib.TessBaseAPISetImage(
+            engine, pixels.ctypes.data_as(ctypes.c_char_p), input_image.width, input_image.height,
+            bytes_per_pixel, bytes_per_pixel * input_image.width,
+        )
+
+        try:
+            if lib.TessBaseAPIRecognize(engine, None) != 0:
+                raise RuntimeError('tesseract failed to recognize image.')
+            symbols = self._read_symbols(lib, lib.TessBaseAPIGetIterator(engine))
+        finally:
+            # release image and results, keeping the loaded model
+            lib.TessBaseAPIClear(engine)
+
+        return symbols_to_char_set(symbols, input_image.size)
+
+    @staticmethod
+    def _read_symbols(
+        lib: ctypes.CDLL, result_iter: Optional[int],
+    ) -> List[Tuple[str, int, int, int, int]]:
+        """Reads text and bounding box of every recognized symbol.
+
+        Parameters
+        ----------
+        lib : ctypes.CDLL
+            tesseract library
+        result_iter : Optional[int]
+            tesseract result iterator, None if nothing was recognized
+
+        Returns
+        -------
+        List[Tuple[str, int, int, int, int]]
+            text of each symbol, with its left, top, right, and bottom pixel coordinates
+        """
+        if not result_iter:
+            return []
+
+        symbols = []
+        left, top, right, bottom = (ctypes.c_int() for _ in range(4))
+        try:
+            page_iter = lib.TessResultIteratorGetPageIterator(result_iter)
+            while True:
+                text_ptr = lib.TessResultIteratorGetUTF8Text(result_iter, RIL_SYMBOL)
+                has_box = lib.TessPageIteratorBoundingBox(
+                    page_iter, RIL_SYMBOL, *map(ctypes.byref, (left, top, right, bottom)),
+                )
+                if text_ptr:
+                    text = ctypes.string_at(text_ptr).decode('utf-8')
+                    lib.TessDeleteText(text_ptr)
+                    if has_box and text.strip():
+                        symbols.append((text, left.value, top.value, right.value, bottom.value))
+
+                if not lib.TessResultIteratorNext(result_iter, RIL_SYMBOL):
+                    break
+        finally:
+            lib.TessResultIteratorDelete(result_iter)
+
+        return symbols
@@ -1,13 +1,34 @@
 """Defines the OCR class, which transforms an image of text to characters and bounding boxes."""
-import numpy as np
-import pytesseract
+import os
+import shutil
+from typing import Optional
+from typing import Tuple
+
 from PIL import Image
 
 from . import utils
 from .data_formats import PositionalCharacterSet
+from .ocr_cache import OCRCache
+from .utils.image_buffer import image_pixels
 
 
 class OCR:
+    def __init__(self, lang: str = 'eng', config: str = '', cache: Optional[OCRCache] = None):
+        """Creates OCR stage.
+
+        Parameters
+        ----------
+        lang : str
+            tesseract language(s) to recognize
+        config : str
+            additional tesseract options
+        cache : Optional[OCRCache]
+            cache of OCR results, images already recognized with the same configuration skip OCR
+        """
+        self.lang = lang
+        self.config = config
+        self.cache = cache
+
     def run(self, input_image: Image.Image) -> PositionalCharacterSet:
         """Runs OCR on image, returns positional character set.
 
@@ -21,9 +42,71 @@ class OCR:
         PositionalCharacterSet
             character set read from image, with positions
         """
+        if self.cache is None:
+            return self._recognize(input_image)
+
+        # look up result of recognizing the same pixels with the same configuration
+        key = self.cache.key(input_image, self.cache_config())
+        char_set = self.cache.get(key)
+        if char_set is None:
+            char_set = self._recognize(input_image)
+            self.cache.put(key, char_set)
+
+        return char_set
+
+    def cache_config(self) -> Tuple[str, ...]:
+        """Gets everything besides the image that OCR results depend on, used in cache keys.
+
+        The tesseract binary is identified by its path, size and modification time rather than by
+        its version, so looking up cached results neither imports pytesseract nor runs tesseract,
+        while reinstalling or upgrading tesseract still misses the cache.
+
+        Returns
+        -------
+        Tuple[str, ...]
+            OCR backend name, engine identity, language, and options
+        """
+        return type(self).__name__, _tesseract_identity(), self.lang, self.config
+
+    def close(self):
+        """Releases resources held by this stage once it has run on every image."""
+        pass
+
+    def _recognize(self, input_image: Image.Image) -> PositionalCharacterSet:
+        """Recognizes characters in image with tesseract.
+
+        Parameters
+        ----------
+        input_image : Image.Image
+            image to run OCR on
+
+        Returns
+        -------
+        PositionalCharacterSet
+            character set read from image, with positions
+        """
+        import pytesseract
+
         # perform OCR on input image
         recognized_characters = pytesseract.image_to_boxes(
-            np.asarray(input_image), output_type=pytesseract.Output.DICT,
+            image_pixels(input_image), lang=self.lang, config=self.config,
+            output_type=pytesseract.Output.DICT,
         )
 
         return utils.convert_to_pos_char_set(recognized_characters, input_image.size)
+
+
+def _tesseract_identity() -> str:
+    """Identifies the tesseract binary on the search path by its path, size and modification time.
+
+    Returns
+    -------
+    str
+        identity of the tesseract binary, or 'missing' if it isn't installed
+    """
+    path = shutil.which('tesseract')
+    if path is None:
+        return 'missing'
+
+    stat = os.stat(path)
+    return f'{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
@@ -0,0 +1,176 @@
+"""Defines an on-disk cache of OCR results, keyed by image content and OCR configuration."""
+import hashlib
+import os
+import pathlib
+import tempfile
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+from .data_formats import PositionalCharacterSet
+from .utils.image_buffer import image_pixels
+
+
+DEFAULT_CACHE_DIR = pathlib.Path(
+    os.environ.get('XDG_CACHE_HOME', pathlib.Path.home().joinpath('.cache')),
+).joinpath('ocr_cipher_solver', 'ocr')
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+_ENTRY_SUFFIX = '.pcs'
+
+
+class OCRCache:
+    """Content-addressed cache of OCR results, evicting least recently used results when full.
+
+    Entries are stored one file per key, written atomically, so a cache directory can be shared by
+    several processes. The total size of entries is scanned once, then kept up to date as results
+    are stored, so the directory is only scanned again once the cache seems full (entries stored by
+    other processes are picked up then).
+    """
+
+    def __init__(
+        self,
+        cache_dir: pathlib.Path = DEFAULT_CACHE_DIR,
+        max_size: int = DEFAULT_MAX_SIZE,
+        bypass: bool = False,
+    ):
+        """Creates OCR cache.
+
+        Parameters
+        ----------
+        cache_dir : pathlib.Path
+            directory to store cached results in, created if it doesn't exist
+        max_size : int
+            maximum total size of cached results in bytes
+        bypass : bool
+            whether to ignore cached results (fresh results are still stored)
+        """
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_size = max_size
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._size = self._scan()[1]
+
+    @staticmethod
+    def key(image: Image.Image, config: Iterable[str]) -> str:
+        """Computes cache key of OCR result.
+
+        Parameters
+        ----------
+        image : Image.Image
+            image OCR is run on, hashed by its decoded pixels
+        config : Iterable[str]
+            everything else the OCR result depends on (engine, version, language, options)
+
+        Returns
+        -------
+        str
+            hex digest identifying the OCR result
+        """
+        digest = hashlib.sha256()
+        for part in config:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(f'{image.mode}:{image.width}x{image.height}\0'.encode('ascii'))
+        if image.mode in ('L', 'RGB', 'RGBA'):
+            # hash pixels in place, their layout matches tobytes for these modes
+            digest.update(np.ascontiguousarray(image_pixels(image)).data)
+        else:
+            digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[PositionalCharacterSet]:
+        """Gets cached OCR result, marking it as recently used.
+
+        Parameters
+        ----------
+        key : str
+            cache key of OCR result
+
+        Returns
+        -------
+        Optional[PositionalCharacterSet]
+            cached character set, or None if it isn't cached (or the cache is bypassed)
+        """
+        if self.bypass:
+            self.misses += 1
+            return None
+
+        path = self._entry_path(key)
+        try:
+            char_set = PositionalCharacterSet.from_bytes(path.read_bytes())
+            os.utime(path)
+        except (OSError, ValueError):
+            # missing, concurrently evicted, or corrupt entries are treated as misses
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return char_set
+
+    def put(self, key: str, char_set: PositionalCharacterSet):
+        """Stores OCR result, then evicts least recently used results past the size limit.
+
+        Parameters
+        ----------
+        key : str
+            cache key of OCR result
+        char_set : PositionalCharacterSet
+            character set to store
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = char_set.to_bytes()
+
+        # write to a temporary file first, so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        # only scan the cache directory once the stored results seem to exceed the size limit
+        self._size += len(data)
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Removes least recently used results until the cache fits its size limit."""
+        entries, total_size = self._scan()
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+        self._size = total_size
+
+    def clear(self):
+        """Removes every cached result."""
+        for path in self.cache_dir.glob(f'*/*{_ENTRY_SUFFIX}'):
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, pathlib.Path]], int]:
+        """Lists cached results by last use time, size and path, and their total size."""
+        entries = []
+        total_size = 0
+        for path in self.cache_dir.glob(f'*/*{_ENTRY_SUFFIX}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+        return entries, total_size
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        """Gets path of cache entry, sharded by the first two characters of its key."""
+        return self.cache_dir.joinpath(key[:2], f'{key}{_ENTRY_SUFFIX}')
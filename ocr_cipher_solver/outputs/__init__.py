@@ -1 +1,2 @@
+from .base import OutputInput
 from .base import PipelineOutput
@@ -1,21 +1,47 @@
 import abc
+import enum
+import pathlib
+from typing import Optional
 
 from PIL import Image
 
 from ocr_cipher_solver.data_formats.positional_character import PositionalCharacterSet
 
 
+class OutputInput(enum.Flag):
+    """Inputs an output head can use."""
+    Image = enum.auto()
+    CharacterSet = enum.auto()
+
+
 class PipelineOutput(abc.ABC):
     """Pipeline output base class."""
+
+    # inputs the output head uses, pipelines skip reconstruction if no output head uses images
+    inputs: OutputInput = OutputInput.Image | OutputInput.CharacterSet
+
     @abc.abstractmethod
-    def run(self, output_image: Image.Image, enciphered_positional_character_set: PositionalCharacterSet):
+    def run(
+        self,
+        output_image: Optional[Image.Image],
+        enciphered_positional_character_set: PositionalCharacterSet,
+        source: Optional[pathlib.Path] = None,
+        input_char_set: Optional[PositionalCharacterSet] = None,
+    ):
         """Runs output operation on output image.
 
         Parameters
         ----------
-        output_image : Image.Image
-            image to run output operation on
+        output_image : Optional[Image.Image]
+            image to run output operation on, None if the pipeline doesn't reconstruct images
         enciphered_char_set : PositionalCharacterSet
             enciphered character set to run output operation on
+        source : Optional[pathlib.Path]
+            path of the image the output was created from, if known
+        input_char_set : Optional[PositionalCharacterSet]
+            character set recognized in the input image, before it was enciphered, if known
         """
         raise NotImplementedError
+
+    def close(self):
+        """Finishes output once the pipeline has run on every image (e.g. closes open files)."""
@@ -0,0 +1,175 @@
+import json
+import pathlib
+import threading
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from ocr_cipher_solver.data_formats.positional_character import PositionalCharacterSet
+from ocr_cipher_solver.outputs.base import OutputInput
+from ocr_cipher_solver.outputs.base import PipelineOutput
+
+# file types characters can be saved to
+CHARACTER_FORMATS = {'.jsonl': 'JSONL', '.parquet': 'Parquet'}
+
+# bounding box columns, in the same coordinates as BoundingBox
+_BOX_COLUMNS = ('left', 'top', 'width', 'height')
+
+
+class SaveCharacters(PipelineOutput):
+    """Saves recognized and enciphered characters and their bounding boxes, without the image.
+
+    JSON Lines files get one record per image, holding the image's source and size, its input_text
+    and output_text (the recognized text, and the text the encipherer mapped it to, which is the
+    ciphertext when enciphering and the plaintext when solving) and a list per bounding box column.
+    Records are appended to the file, so it may collect several runs. Parquet files (which need
+    pyarrow) get one row per character, with source, index, input_text, output_text, bounding box
+    and image size columns, and are replaced.
+
+    Records are buffered and written batch_size images at a time, the last ones once the output is
+    closed.
+    """
+
+    inputs = OutputInput.CharacterSet
+
+    def __init__(self, save_path: pathlib.Path, batch_size: int = 64):
+        """Creates character saver.
+
+        Parameters
+        ----------
+        save_path : pathlib.Path
+            path of JSON Lines (.jsonl) or Parquet (.parquet) file to save characters to
+        batch_size : int
+            number of images whose characters are buffered before they are written
+        """
+        try:
+            self._format = CHARACTER_FORMATS[save_path.suffix.lower()]
+        except KeyError:
+            raise ValueError(
+                f'Cannot save characters to {save_path}, expected one of '
+                f'{sorted(CHARACTER_FORMATS)} files.',
+            ) from None
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be positive, got {batch_size}.')
+
+        # fail early if the Parquet writer isn't installed
+        if self._format == 'Parquet':
+            try:
+                import pyarrow.parquet  # noqa: F401
+            except ImportError:
+                raise ImportError('Saving characters to Parquet files requires pyarrow.') from None
+
+        self._save_path = save_path
+        self._batch_size = batch_size
+        self._records: List[Dict[str, Any]] = []
+        self._parquet_writer = None
+        self._num_images = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.update(_records=[], _parquet_writer=None, _lock=None)
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def num_images(self) -> int:
+        """Number of images whose characters were saved (or buffered) so far."""
+        return self._num_images
+
+    def run(
+        self,
+        output_image: Optional[Image.Image],
+        enciphered_positional_character_set: PositionalCharacterSet,
+        source: Optional[pathlib.Path] = None,
+        input_char_set: Optional[PositionalCharacterSet] = None,
+    ):
+        """Buffers characters of image, writing them once batch_size images are buffered.
+
+        Parameters
+        ----------
+        output_image : Optional[Image.Image]
+            image to run output operation on (not used)
+        enciphered_char_set : PositionalCharacterSet
+            enciphered character set to run output operation on
+        source : Optional[pathlib.Path]
+            path of the image the output was created from, if known
+        input_char_set : Optional[PositionalCharacterSet]
+            character set recognized in the input image, before it was enciphered, if known
+        """
+        char_set = enciphered_positional_character_set
+        record: Dict[str, Any] = {
+            'source': None if source is None else str(source),
+            'image_width': char_set.img_width,
+            'image_height': char_set.img_height,
+            'input_text': None if input_char_set is None else input_char_set.text,
+            'output_text': char_set.text,
+        }
+        record.update((column, getattr(char_set, column).tolist()) for column in _BOX_COLUMNS)
+
+        with self._lock:
+            self._records.append(record)
+            self._num_images += 1
+            if len(self._records) >= self._batch_size:
+                self._flush()
+
+    def close(self):
+        """Writes buffered characters and closes file."""
+        with self._lock:
+            self._flush()
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+                self._parquet_writer = None
+
+    def _flush(self):
+        """Writes buffered records, in one write (or Parquet row group)."""
+        records, self._records = self._records, []
+        if not records:
+            return
+
+        if self._format == 'JSONL':
+            with self._save_path.open('a') as f:
+                f.write(''.join(f'{json.dumps(record)}\n' for record in records))
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # one row per character, with columns of each record repeated for its characters
+        lengths = [len(record['output_text']) for record in records]
+        columns: Dict[str, Any] = {
+            'source': [
+                record['source'] for record, length in zip(records, lengths) for _ in range(length)
+            ],
+            'index': np.concatenate([np.arange(length) for length in lengths]),
+            'input_text': [
+                char for record, length in zip(records, lengths)
+                for char in (record['input_text'] or [None] * length)
+            ],
+            'output_text': [char for record in records for char in record['output_text']],
+        }
+        for column in _BOX_COLUMNS:
+            columns[column] = np.concatenate(
+                [record[column] for record in records],
+            ).astype(np.int32)
+        for column in ('image_width', 'image_height'):
+            columns[column] = np.repeat([record[column] for record in records], lengths)
+
+        # types are given explicitly, so row groups match even if a batch has no input text
+        schema = pa.schema(
+            [('source', pa.string()), ('index', pa.int32())]
+            + [(column, pa.string()) for column in ('input_text', 'output_text')]
+            + [(column, pa.int32()) for column in _BOX_COLUMNS + ('image_width', 'image_height')],
+        )
+        table = pa.table(columns, schema=schema)
+
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(str(self._save_path), schema)
+        self._parquet_writer.write_table(table)
@@ -1,26 +1,219 @@
+import concurrent.futures
+import functools
 import pathlib
+import threading
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 from PIL import Image
 
 from ocr_cipher_solver.data_formats.positional_character import PositionalCharacterSet
+from ocr_cipher_solver.outputs.base import OutputInput
 from ocr_cipher_solver.outputs.base import PipelineOutput
 
+# extensions of images saved into a directory, by format (PPM, BMP and TIFF are uncompressed)
+FORMAT_EXTENSIONS = {
+    'PNG': '.png', 'JPEG': '.jpg', 'WEBP': '.webp', 'PPM': '.ppm', 'BMP': '.bmp', 'TIFF': '.tif',
+}
+
+# formats each encoder option applies to
+_COMPRESS_LEVEL_FORMATS = ('PNG',)
+_QUALITY_FORMATS = ('JPEG', 'WEBP')
+
 
 class SaveImage(PipelineOutput):
-    """Saves image."""
+    """Saves image, optionally encoding it in background threads while the pipeline moves on."""
+
+    inputs = OutputInput.Image
+
+    def __init__(
+        self,
+        save_path: pathlib.Path,
+        suffix: str = '_enciphered',
+        format: Optional[str] = None,
+        compress_level: Optional[int] = None,
+        quality: Optional[int] = None,
+        num_workers: int = 0,
+        max_in_flight: Optional[int] = None,
+    ):
+        """Creates image saver.
+
+        Parameters
+        ----------
+        save_path : pathlib.Path
+            path to save image to, or directory to save images into (named after their source)
+        suffix : str
+            suffix appended to source file name when saving into a directory
+        format : Optional[str]
+            format to save images in (one of FORMAT_EXTENSIONS), by default PNG when saving into a
+            directory, or the format of save_path's extension
+        compress_level : Optional[int]
+            PNG compression level, from 0 (uncompressed, fastest) to 9 (smallest)
+        quality : Optional[int]
+            JPEG or WebP quality, from 0 to 100
+        num_workers : int
+            number of threads encoding and writing images in the background (0 to save images
+            synchronously in run)
+        max_in_flight : Optional[int]
+            maximum number of images queued or being written before run blocks, by default twice
+            the number of workers
+        """
+        if format is not None and format.upper() not in FORMAT_EXTENSIONS:
+            raise ValueError(
+                f'Cannot save images as {format}, expected one of {sorted(FORMAT_EXTENSIONS)}.',
+            )
+        self._format = None if format is None else format.upper()
+
+        # check encoder options apply to the format images are saved in
+        save_format = self._format or (
+            'PNG' if save_path.is_dir() else Image.registered_extensions().get(
+                save_path.suffix.lower(),
+            )
+        )
+        if compress_level is not None and save_format not in _COMPRESS_LEVEL_FORMATS:
+            raise ValueError(f'compress_level applies to PNG images, not {save_format}.')
+        if quality is not None and save_format not in _QUALITY_FORMATS:
+            raise ValueError(f'quality applies to JPEG and WebP images, not {save_format}.')
+
+        self._save_options: Dict[str, Any] = {}
+        if compress_level is not None:
+            self._save_options['compress_level'] = compress_level
+        if quality is not None:
+            self._save_options['quality'] = quality
+
+        if num_workers < 0:
+            raise ValueError(f'num_workers must not be negative, got {num_workers}.')
+        self._num_workers = num_workers
+        self._max_in_flight = max_in_flight or 2 * num_workers
+        if num_workers and self._max_in_flight < 1:
+            raise ValueError(f'max_in_flight must be positive, got {self._max_in_flight}.')
 
-    def __init__(self, save_path: pathlib.Path):
         self._save_path = save_path
+        self._suffix = suffix
+
+        # background writer state, created on first use (so the saver can be sent to worker
+        # processes before it is used)
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._in_flight: Optional[threading.BoundedSemaphore] = None
+        self._errors: List[Tuple[pathlib.Path, BaseException]] = []
+        self._lock = threading.Lock()
 
-    def run(self, output_image: Image.Image, enciphered_positional_character_set: PositionalCharacterSet):
-        """Saves output image.
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.update(_executor=None, _in_flight=None, _errors=[], _lock=None)
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_save_path(self, source: Optional[pathlib.Path] = None) -> pathlib.Path:
+        """Gets path to save image to.
 
         Parameters
         ----------
-        output_image : Image.Image
-            image to run output operation on
+        source : Optional[pathlib.Path]
+            path of the image the output was created from, if known
+
+        Returns
+        -------
+        pathlib.Path
+            path to save output image to
+        """
+        if source is not None and self._save_path.is_dir():
+            extension = FORMAT_EXTENSIONS[self._format or 'PNG']
+            return self._save_path.joinpath(f'{source.stem}{self._suffix}{extension}')
+
+        return self._save_path
+
+    def run(
+        self,
+        output_image: Optional[Image.Image],
+        enciphered_positional_character_set: PositionalCharacterSet,
+        source: Optional[pathlib.Path] = None,
+        input_char_set: Optional[PositionalCharacterSet] = None,
+    ):
+        """Saves output image, or queues it to be saved by a background thread.
+
+        Queued images are copied first, so the pipeline may reuse or draw on the image it passed
+        in. Errors of background writes are raised by the next call to run, or by close.
+
+        Parameters
+        ----------
+        output_image : Optional[Image.Image]
+            image to run output operation on, required as it is the image saved
         enciphered_char_set : PositionalCharacterSet
             enciphered character set to run output operation on
+        source : Optional[pathlib.Path]
+            path of the image the output was created from, if known
+        input_char_set : Optional[PositionalCharacterSet]
+            character set recognized in the input image, before it was enciphered, if known
         """
-        # save output image
-        output_image.save(self._save_path)
+        if output_image is None:
+            raise ValueError(f'Cannot save {self.get_save_path(source)} without an image.')
+
+        save_path = self.get_save_path(source)
+        if not self._num_workers:
+            # save output image
+            self._save(output_image, save_path)
+            return
+
+        self._raise_errors()
+
+        # wait for a free slot, so at most max_in_flight images are held in memory
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._num_workers, thread_name_prefix='save_image',
+                )
+                self._in_flight = threading.BoundedSemaphore(self._max_in_flight)
+            executor, in_flight = self._executor, self._in_flight
+        assert in_flight is not None
+        in_flight.acquire()
+
+        # queue copy of output image to be encoded and written
+        try:
+            future = executor.submit(self._save, output_image.copy(), save_path)
+        except BaseException:
+            in_flight.release()
+            raise
+        future.add_done_callback(functools.partial(self._finish, in_flight, save_path))
+
+    def close(self):
+        """Waits for queued images to be written, raising the first error of any of them."""
+        with self._lock:
+            executor, self._executor, self._in_flight = self._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        self._raise_errors()
+
+    def _save(self, image: Image.Image, save_path: pathlib.Path):
+        """Encodes and writes image."""
+        image.save(save_path, format=self._format, **self._save_options)
+
+    def _finish(
+        self,
+        in_flight: threading.BoundedSemaphore,
+        save_path: pathlib.Path,
+        future: concurrent.futures.Future,
+    ):
+        """Frees slot of written image, recording the error it failed with, if any."""
+        in_flight.release()
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                self._errors.append((save_path, error))
+
+    def _raise_errors(self):
+        """Raises first error of background writes, forgetting the others."""
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            save_path, error = errors[0]
+            raise RuntimeError(
+                f'Could not save {save_path} ({len(errors)} images failed to save).',
+            ) from error
@@ -0,0 +1,85 @@
+import pathlib
+from typing import Optional
+
+from PIL import Image
+from PIL import TiffImagePlugin
+
+from ocr_cipher_solver.data_formats.positional_character import PositionalCharacterSet
+from ocr_cipher_solver.outputs.base import OutputInput
+from ocr_cipher_solver.outputs.base import PipelineOutput
+
+# file types that can hold several pages
+PAGE_FORMATS = {'.tif': 'TIFF', '.tiff': 'TIFF', '.pdf': 'PDF'}
+
+
+class SavePages(PipelineOutput):
+    """Saves images as pages of a single multi-page TIFF or PDF file, appending each as it comes."""
+
+    inputs = OutputInput.Image
+
+    def __init__(self, save_path: pathlib.Path):
+        """Creates multi-page image saver.
+
+        Parameters
+        ----------
+        save_path : pathlib.Path
+            path of TIFF or PDF file to save pages to, replaced if it exists
+        """
+        try:
+            self._format = PAGE_FORMATS[save_path.suffix.lower()]
+        except KeyError:
+            raise ValueError(
+                f'Cannot save pages to {save_path}, expected one of {sorted(PAGE_FORMATS)} files.',
+            ) from None
+
+        self._save_path = save_path
+        self._tiff_writer: Optional[TiffImagePlugin.AppendingTiffWriter] = None
+        self._num_pages = 0
+
+    @property
+    def num_pages(self) -> int:
+        """Number of pages saved so far."""
+        return self._num_pages
+
+    def run(
+        self,
+        output_image: Optional[Image.Image],
+        enciphered_positional_character_set: PositionalCharacterSet,
+        source: Optional[pathlib.Path] = None,
+        input_char_set: Optional[PositionalCharacterSet] = None,
+    ):
+        """Appends output image to file as its next page.
+
+        Parameters
+        ----------
+        output_image : Optional[Image.Image]
+            image to run output operation on, required as pages are images
+        enciphered_char_set : PositionalCharacterSet
+            enciphered character set to run output operation on
+        source : Optional[pathlib.Path]
+            path of the image the output was created from, if known
+        input_char_set : Optional[PositionalCharacterSet]
+            character set recognized in the input image, before it was enciphered, if known
+        """
+        if output_image is None:
+            raise ValueError(f'Cannot save page {self._num_pages + 1} without an image.')
+
+        if self._format == 'PDF':
+            # PDF pages are appended as incremental updates of the file
+            output_image.save(self._save_path, format='PDF', append=self._num_pages > 0)
+        else:
+            # keep TIFF file open, each page is written as a new image file directory
+            if self._tiff_writer is None:
+                self._tiff_writer = TiffImagePlugin.AppendingTiffWriter(
+                    str(self._save_path), new=True,
+                )
+            output_image.save(self._tiff_writer, format='TIFF')
+            self._tiff_writer.newFrame()
+
+        self._num_pages += 1
+
+    def close(self):
+        """Closes file, once every page is saved."""
+        if self._tiff_writer is not None:
+            self._tiff_writer.close()
+            self._tiff_writer = None
@@ -1,22 +1,40 @@
+import pathlib
+from typing import Optional
+
 from PIL import Image
 
-from ocr_cipher_solver import outputs
 from ocr_cipher_solver.data_formats.positional_character import PositionalCharacterSet
+from ocr_cipher_solver.outputs.base import OutputInput
 from ocr_cipher_solver.outputs.base import PipelineOutput
 
 
 class ShowImage(PipelineOutput):
     """Shows image."""
 
-    def run(self, output_image: Image.Image, enciphered_positional_character_set: PositionalCharacterSet):
+    inputs = OutputInput.Image
+
+    def run(
+        self,
+        output_image: Optional[Image.Image],
+        enciphered_positional_character_set: PositionalCharacterSet,
+        source: Optional[pathlib.Path] = None,
+        input_char_set: Optional[PositionalCharacterSet] = None,
+    ):
         """Shows output image.
 
         Parameters
         ----------
-        output_image : Image.Image
-            image to run output operation on
+        output_image : Optional[Image.Image]
+            image to run output operation on, required as it is the image shown
         enciphered_char_set : PositionalCharacterSet
             enciphered character set to run output operation on
+        source : Optional[pathlib.Path]
+            path of the image the output was created from, if known
+        input_char_set : Optional[PositionalCharacterSet]
+            character set recognized in the input image, before it was enciphered, if known
         """
+        if output_image is None:
+            raise ValueError('Cannot show output without an image.')
+
         # show output image
-        output_image.show()
+        output_image.show(title=None if source is None else source.name)
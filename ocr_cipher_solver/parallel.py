@@ -0,0 +1,160 @@
+"""Defines parallel execution of the image processing pipeline across processes."""
+import collections
+import concurrent.futures
+import dataclasses
+import os
+import pathlib
+from typing import Deque
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Set
+
+from .pipeline import ImagePipeline
+from .pipeline import PipelineResult
+from .pipeline import iter_frames
+from .utils import font_utils
+
+
+# pipeline owned by the current worker process, set once by the pool initializer
+_worker_pipeline: Optional[ImagePipeline] = None
+
+
+def _init_worker(pipeline: ImagePipeline, font_metrics: font_utils.FontMetrics):
+    """Initializes worker process with its own copy of the pipeline and font metrics.
+
+    Parameters
+    ----------
+    pipeline : ImagePipeline
+        pipeline to run in this worker, its stages (and their caches) live for the worker's lifetime
+    font_metrics : font_utils.FontMetrics
+        font metrics table from the parent process, so rows it already computed (or loaded) are
+        shared with every worker
+    """
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+    font_utils.set_font_metrics(font_metrics)
+
+
+def _run_in_worker(img_path: pathlib.Path, index: int) -> PipelineResult:
+    """Runs worker's pipeline on frame of image file.
+
+    Parameters
+    ----------
+    img_path : pathlib.Path
+        path of image to run pipeline with
+    index : int
+        index of frame to run pipeline with
+
+    Returns
+    -------
+    PipelineResult
+        pipeline result, without the reconstructed image (output heads already consumed it)
+    """
+    assert _worker_pipeline is not None, 'worker pipeline was not initialized'
+    result = _worker_pipeline.run_file(img_path, index)
+
+    # don't send reconstructed image back to the parent process
+    return dataclasses.replace(result, reconstructed_image=None)
+
+
+class ParallelImagePipeline:
+    """Runs an image pipeline over many images in a pool of worker processes."""
+
+    def __init__(
+        self,
+        pipeline: ImagePipeline,
+        num_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        ordered: bool = True,
+    ):
+        """Creates parallel pipeline runner.
+
+        Parameters
+        ----------
+        pipeline : ImagePipeline
+            pipeline to run, copied once into each worker process
+        num_workers : Optional[int]
+            number of worker processes, by default the number of CPUs
+        max_in_flight : Optional[int]
+            maximum number of images submitted but not yet consumed, by default twice the number
+            of workers
+        ordered : bool
+            whether to yield results in input order (otherwise, as they complete)
+        """
+        self._pipeline = pipeline
+        self._num_workers = num_workers or os.cpu_count() or 1
+        self._max_in_flight = max_in_flight or 2 * self._num_workers
+        self._ordered = ordered
+
+        if self._max_in_flight < 1:
+            raise ValueError(f'max_in_flight must be positive, got {self._max_in_flight}.')
+
+    def run_many(self, img_paths: Iterable[pathlib.Path]) -> Iterator[PipelineResult]:
+        """Runs pipeline on every frame of many image files in parallel, one frame per task.
+
+        Parameters
+        ----------
+        img_paths : Iterable[pathlib.Path]
+            paths of images to run pipeline with, consumed lazily as work completes
+
+        Yields
+        ------
+        PipelineResult
+            result of running pipeline on each frame of each image, in input order if ordered is
+            set
+        """
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self._num_workers,
+            initializer=_init_worker,
+            initargs=(self._pipeline, font_utils.get_font_metrics()),
+        ) as executor:
+            frames = iter_frames(img_paths)
+            in_flight: Deque[concurrent.futures.Future] = collections.deque()
+
+            try:
+                # fill pool up to in-flight limit
+                for img_path, index in frames:
+                    in_flight.append(executor.submit(_run_in_worker, img_path, index))
+                    if len(in_flight) >= self._max_in_flight:
+                        break
+
+                while in_flight:
+                    # wait for next result, keeping the pool topped up as results are consumed
+                    for future in self._next_done(in_flight):
+                        yield future.result()
+
+                        next_frame = next(frames, None)
+                        if next_frame is not None:
+                            in_flight.append(executor.submit(_run_in_worker, *next_frame))
+            finally:
+                # don't run queued work if the consumer stops early or a worker fails
+                for future in in_flight:
+                    future.cancel()
+
+    def _next_done(
+        self, in_flight: Deque[concurrent.futures.Future],
+    ) -> Iterator[concurrent.futures.Future]:
+        """Removes and yields the next completed futures from the in-flight queue.
+
+        Parameters
+        ----------
+        in_flight : Deque[concurrent.futures.Future]
+            queue of submitted futures, in input order
+
+        Yields
+        ------
+        concurrent.futures.Future
+            completed futures, in input order if ordered is set
+        """
+        if self._ordered:
+            future = in_flight.popleft()
+            concurrent.futures.wait((future,))
+            yield future
+            return
+
+        done: Set[concurrent.futures.Future]
+        done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            in_flight.remove(future)
+        yield from done
@@ -1,16 +1,91 @@
 """Defines the image processing pipeline."""
+import asyncio
+import concurrent.futures
+import dataclasses
+import functools
+import itertools
+import pathlib
+import time
+from typing import Dict
+from typing import Generator
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
 from typing import Tuple
 
 from PIL import Image
+from PIL import ImageSequence
 
+from . import instrumentation
 from .ciphers import Encipherer
 from .ocr import OCR
+from .outputs import OutputInput
 from .outputs import PipelineOutput
 from .reconstructor import ReconstructedImage
 from .reconstructor import Reconstructor
+from .utils.font_utils import get_font_from_bounding_box
+from .utils.image_buffer import ImageBuffer
+from .utils.image_buffer import MAPPED_EXTENSIONS
 from ocr_cipher_solver.data_formats import PositionalCharacterSet
 
 
+@dataclasses.dataclass
+class PipelineResult:
+    """Result of running the pipeline on a single image."""
+    source: Optional[pathlib.Path]
+    enciphered_char_set: PositionalCharacterSet
+    reconstructed_image: Optional[ReconstructedImage]
+    elapsed: float
+    report: Optional[instrumentation.RunReport] = None
+
+    @property
+    def num_chars(self) -> int:
+        """Number of characters recognized in the image."""
+        return len(self.enciphered_char_set)
+
+
+def page_source(img_path: pathlib.Path, index: int) -> pathlib.Path:
+    """Names page of a multi-page image file, for outputs to name their results after.
+
+    Parameters
+    ----------
+    img_path : pathlib.Path
+        path of multi-page image file
+    index : int
+        index of page in file
+
+    Returns
+    -------
+    pathlib.Path
+        path of file, with the (one-based) page number appended to its name
+    """
+    return img_path.with_name(f'{img_path.stem}_page_{index + 1}{img_path.suffix}')
+
+
+def iter_frames(img_paths: Iterable[pathlib.Path]) -> Iterator[Tuple[pathlib.Path, int]]:
+    """Splits image files into their frames, so each page of a multi-page file is its own item.
+
+    Files are opened lazily, one at a time, and only their headers are read.
+
+    Parameters
+    ----------
+    img_paths : Iterable[pathlib.Path]
+        paths of image files
+
+    Yields
+    ------
+    Tuple[pathlib.Path, int]
+        path of image file and index of frame, for every frame of every file
+    """
+    for img_path in img_paths:
+        num_frames = 1
+        if img_path.suffix.lower() not in MAPPED_EXTENSIONS:
+            with Image.open(img_path) as input_image:
+                num_frames = getattr(input_image, 'n_frames', 1)
+        for index in range(num_frames):
+            yield img_path, index
+
+
 class ImagePipeline:
     """Defines the image processing pipeline for the OCR cipher solver."""
 
@@ -19,7 +94,9 @@ class ImagePipeline:
         ocr: OCR,
         encipherer: Encipherer,
         reconstructor: Reconstructor,
-        outputs: Tuple[PipelineOutput],
+        outputs: Tuple[PipelineOutput, ...],
+        instrument: bool = False,
+        reconstruct: Optional[bool] = None,
     ):
         """Creates an image pipeline with the provided encipherer, OCR, and Reconstructor.
 
@@ -31,36 +108,313 @@ class ImagePipeline:
             encipherer to use for image transformation
         reconstructor : Reconstructor
             image reconstructor to use for pipeline
-        outputs : Tuple[PipelineOutput]
+        outputs : Tuple[PipelineOutput, ...]
             tuple of pipeline output steps, to run at end of pipeline
+        instrument : bool
+            whether to attach a report of stage timings, cache hit rates, and memory use to
+            each result
+        reconstruct : Optional[bool]
+            whether to reconstruct images, by default only if an output head uses images (or there
+            are no output heads, so results carry the reconstructed image)
         """
         # set pipeline stages
         self._ocr = ocr
         self._encipherer = encipherer
         self._reconstructor = reconstructor
         self._outputs = outputs
+        self._instrument = instrument
+        if reconstruct is None:
+            reconstruct = not outputs or any(
+                OutputInput.Image in output.inputs for output in outputs
+            )
+        self._reconstruct = reconstruct
+
+    @property
+    def ocr(self) -> OCR:
+        """OCR stage of pipeline."""
+        return self._ocr
+
+    @property
+    def encipherer(self) -> Encipherer:
+        """Encipherer stage of pipeline."""
+        return self._encipherer
+
+    @property
+    def reconstructor(self) -> Reconstructor:
+        """Reconstructor stage of pipeline."""
+        return self._reconstructor
+
+    @property
+    def outputs(self) -> Tuple[PipelineOutput, ...]:
+        """Output heads of pipeline."""
+        return self._outputs
+
+    @property
+    def reconstructs(self) -> bool:
+        """Whether pipeline reconstructs images (otherwise, output heads only get characters)."""
+        return self._reconstruct
 
-    def run_pipeline(self, input_image: Image.Image):
+    def run_pipeline(
+        self, input_image: Image.Image, source: Optional[pathlib.Path] = None,
+    ) -> PipelineResult:
         """Runs pipeline, feeding results forward through stages.
 
         Parameters
         ----------
         input_image : Image.Image
             image to run pipeline with
+        source : Optional[pathlib.Path]
+            path the image was loaded from, passed on to output heads
+
+        Returns
+        -------
+        PipelineResult
+            enciphered character set and reconstructed image for the input image
+        """
+        if not self._instrument:
+            return self._run_stages(input_image, source)
+
+        # time stages, and count cache lookups made while running them
+        cache_counts = self._cache_counts()
+        with instrumentation.collect_timings() as timings:
+            result = self._run_stages(input_image, source)
+
+        caches = {}
+        for name, (hits, misses) in self._cache_counts().items():
+            hits_before, misses_before = cache_counts[name]
+            caches[name] = instrumentation.CacheStats(hits - hits_before, misses - misses_before)
+
+        result.report = instrumentation.RunReport(
+            source=source,
+            num_chars=result.num_chars,
+            elapsed=result.elapsed,
+            stages=timings.stages,
+            caches=caches,
+            peak_rss=instrumentation.peak_rss(),
+        )
+        return result
+
+    def _run_stages(
+        self, input_image: Image.Image, source: Optional[pathlib.Path],
+    ) -> PipelineResult:
+        """Runs pipeline stages, timing them if the run is instrumented.
+
+        Parameters
+        ----------
+        input_image : Image.Image
+            image to run pipeline with
+        source : Optional[pathlib.Path]
+            path the image was loaded from, passed on to output heads
+
+        Returns
+        -------
+        PipelineResult
+            enciphered character set and reconstructed image for the input image
         """
+        start = time.perf_counter()
+
         # run ocr
-        positional_char_set: PositionalCharacterSet = self._ocr.run(input_image)
+        with instrumentation.timed('ocr'):
+            positional_char_set: PositionalCharacterSet = self._ocr.run(input_image)
 
         # run encipherer
-        enciphered_positional_char_set: PositionalCharacterSet = self._encipherer.run(
-            positional_char_set,
-        )
+        with instrumentation.timed('encipher'):
+            enciphered_positional_char_set: PositionalCharacterSet = self._encipherer.run(
+                positional_char_set,
+            )
 
-        # run reconstructor
-        reconstructed_image: ReconstructedImage = self._reconstructor.run(
-            enciphered_positional_char_set, input_image,
-        )
+        # run reconstructor, unless nothing uses the reconstructed image
+        reconstructed_image: Optional[ReconstructedImage] = None
+        if self._reconstruct:
+            with instrumentation.timed('reconstruct'):
+                reconstructed_image = self._reconstructor.run(
+                    enciphered_positional_char_set, input_image, input_char_set=positional_char_set,
+                )
 
         # run output heads
         for output in self._outputs:
-            output.run(reconstructed_image, enciphered_positional_char_set)
+            with instrumentation.timed(f'output.{type(output).__name__}'):
+                output.run(
+                    reconstructed_image, enciphered_positional_char_set, source=source,
+                    input_char_set=positional_char_set,
+                )
+
+        return PipelineResult(
+            source=source,
+            enciphered_char_set=enciphered_positional_char_set,
+            reconstructed_image=reconstructed_image,
+            elapsed=time.perf_counter() - start,
+        )
+
+    def _cache_counts(self) -> Dict[str, Tuple[int, int]]:
+        """Gets hits and misses of the caches used by pipeline stages so far.
+
+        Returns
+        -------
+        Dict[str, Tuple[int, int]]
+            hits and misses of each cache, by cache name
+        """
+        font_cache_info = get_font_from_bounding_box.cache_info()
+        counts = {'font': (font_cache_info.hits, font_cache_info.misses)}
+
+        if isinstance(self._reconstructor, Reconstructor):
+            glyph_cache_info = self._reconstructor.glyph_cache_info()
+            counts['glyph'] = (glyph_cache_info.hits, glyph_cache_info.misses)
+        if self._ocr.cache is not None:
+            counts['ocr'] = (self._ocr.cache.hits, self._ocr.cache.misses)
+
+        return counts
+
+    async def arun(
+        self,
+        input_image: Image.Image,
+        source: Optional[pathlib.Path] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ) -> PipelineResult:
+        """Runs pipeline without blocking the event loop, running its stages in an executor.
+
+        Parameters
+        ----------
+        input_image : Image.Image
+            image to run pipeline with
+        source : Optional[pathlib.Path]
+            path the image was loaded from, passed on to output heads
+        executor : Optional[concurrent.futures.Executor]
+            executor to run stages in, by default the event loop's default executor
+
+        Returns
+        -------
+        PipelineResult
+            enciphered character set and reconstructed image for the input image
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(self.run_pipeline, input_image, source=source),
+        )
+
+    def run_file(self, img_path: pathlib.Path, index: int = 0) -> PipelineResult:
+        """Opens image file and runs pipeline on one of its frames.
+
+        Parameters
+        ----------
+        img_path : pathlib.Path
+            path of image to run pipeline with
+        index : int
+            index of frame to run pipeline with, pages of multi-page files get sources named
+            after their page (see page_source)
+
+        Returns
+        -------
+        PipelineResult
+            result of running pipeline on frame
+        """
+        start = time.perf_counter()
+
+        # decode frame of image and run pipeline
+        input_image, source = self.read_frame(img_path, index)
+        result = self.run_pipeline(input_image, source=source)
+
+        # include decoding time in elapsed time
+        result.elapsed = time.perf_counter() - start
+        if result.report is not None:
+            result.report.elapsed = result.elapsed
+        return result
+
+    def run_frames(self, img_path: pathlib.Path) -> Iterator[PipelineResult]:
+        """Opens image file and runs pipeline on each of its frames (e.g. pages of a TIFF file).
+
+        Frames are decoded lazily, one at a time, so only a single page is held in memory. Pages of
+        multi-page files get sources named after their page (see page_source). Frames are read
+        into the same image object, so reconstructed images of a reconstructor drawing in place
+        are only valid until the next page is read.
+
+        Parameters
+        ----------
+        img_path : pathlib.Path
+            path of image to run pipeline with
+
+        Yields
+        ------
+        PipelineResult
+            result of running pipeline on each frame, in order
+        """
+        start = time.perf_counter()
+        for index, (frame, num_frames) in enumerate(self._read_frames(img_path)):
+            source = img_path if num_frames == 1 else page_source(img_path, index)
+            result = self.run_pipeline(frame, source=source)
+
+            # include decoding time in elapsed time
+            result.elapsed = time.perf_counter() - start
+            if result.report is not None:
+                result.report.elapsed = result.elapsed
+            yield result
+            start = time.perf_counter()
+
+    @classmethod
+    def read_frame(cls, img_path: pathlib.Path, index: int = 0) -> Tuple[Image.Image, pathlib.Path]:
+        """Decodes one frame of image file, closing the file once done.
+
+        Parameters
+        ----------
+        img_path : pathlib.Path
+            path of image to read
+        index : int
+            index of frame to read
+
+        Returns
+        -------
+        Tuple[Image.Image, pathlib.Path]
+            decoded frame, and the source it is named after (see page_source)
+        """
+        frames = cls._read_frames(img_path)
+        try:
+            frame_and_count = next(itertools.islice(frames, index, None), None)
+            if frame_and_count is None:
+                raise ValueError(f'{img_path} has no frame {index}.')
+            frame, num_frames = frame_and_count
+            frame.load()
+        finally:
+            frames.close()
+
+        return frame, img_path if num_frames == 1 else page_source(img_path, index)
+
+    @staticmethod
+    def _read_frames(img_path: pathlib.Path) -> Generator[Tuple[Image.Image, int], None, None]:
+        """Reads frames of image file one at a time, memory-mapping pixels of raw image files.
+
+        Parameters
+        ----------
+        img_path : pathlib.Path
+            path of image to read
+
+        Yields
+        ------
+        Tuple[Image.Image, int]
+            each frame, and the number of frames in the file
+        """
+        if img_path.suffix.lower() in MAPPED_EXTENSIONS:
+            yield ImageBuffer.open(img_path).to_image(), 1
+            return
+
+        with Image.open(img_path) as input_image:
+            num_frames = getattr(input_image, 'n_frames', 1)
+            for frame in ImageSequence.Iterator(input_image):
+                yield frame, num_frames
+
+    def run_many(self, img_paths: Iterable[pathlib.Path]) -> Iterator[PipelineResult]:
+        """Runs pipeline on every frame of many image files, reusing the same pipeline stages.
+
+        Images are opened lazily, one at a time, so only a single page is held in memory.
+
+        Parameters
+        ----------
+        img_paths : Iterable[pathlib.Path]
+            paths of images to run pipeline with
+
+        Yields
+        ------
+        PipelineResult
+            result of running pipeline on each frame of each image, in input order
+        """
+        for img_path in img_paths:
+            yield from self.run_frames(img_path)
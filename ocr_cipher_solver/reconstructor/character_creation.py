@@ -0,0 +1,55 @@
+"""Defines creation of pre-rendered character glyphs."""
+from typing import NamedTuple
+from typing import Tuple
+
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFont
+
+from ocr_cipher_solver.data_formats import RGBA
+
+
+class Glyph(NamedTuple):
+    """Rasterized character, ready to be pasted onto an image."""
+    bitmap: Image.Image
+    mask: Image.Image
+    offset: Tuple[int, int]
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether glyph has no pixels (e.g. whitespace)."""
+        return self.mask.width == 0 or self.mask.height == 0
+
+
+def create_glyph(char: str, font: ImageFont.FreeTypeFont, fill_color: RGBA) -> Glyph:
+    """Rasterizes character into a solid color bitmap and an alpha mask.
+
+    Pasting the bitmap through the mask at the glyph offset reproduces ImageDraw.text.
+
+    Parameters
+    ----------
+    char : str
+        character to rasterize
+    font : ImageFont.FreeTypeFont
+        font to rasterize character with
+    fill_color : RGBA
+        color of character
+
+    Returns
+    -------
+    Glyph
+        rasterized character
+    """
+    # get glyph extent, relative to text origin
+    left, top, right, bottom = font.getbbox(char)
+
+    # rasterize character into alpha mask, scaled by fill color alpha
+    mask = Image.new('L', (max(right - left, 0), max(bottom - top, 0)))
+    ImageDraw.Draw(mask).text((-left, -top), char, font=font, fill=255)
+    if fill_color[3] != 255:
+        mask = mask.point(lambda p: p * fill_color[3] // 255)
+
+    # create solid color bitmap to paste through mask
+    bitmap = Image.new('RGB', mask.size, fill_color[:3])
+
+    return Glyph(bitmap, mask, (left, top))
@@ -0,0 +1,86 @@
+"""Defines a bounded LRU cache for pre-rendered glyphs."""
+import collections
+from typing import Callable
+from typing import Generic
+from typing import Hashable
+from typing import NamedTuple
+from typing import OrderedDict
+from typing import TypeVar
+
+
+T = TypeVar('T')
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics, mirroring functools.lru_cache's cache_info()."""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class GlyphCache(Generic[T]):
+    """Bounded least-recently-used cache with hit and miss counters."""
+
+    def __init__(self, maxsize: int = 1024):
+        """Creates empty glyph cache.
+
+        Parameters
+        ----------
+        maxsize : int
+            maximum number of entries to keep, least recently used entries are evicted first
+        """
+        if maxsize < 1:
+            raise ValueError(f'Cache size must be positive, got {maxsize}.')
+
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, T] = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, create: Callable[[], T]) -> T:
+        """Gets cached entry, creating (and caching) it if not present.
+
+        Parameters
+        ----------
+        key : Hashable
+            key of cache entry
+        create : Callable[[], T]
+            function to create entry on a cache miss
+
+        Returns
+        -------
+        T
+            cached entry
+        """
+        try:
+            entry = self._entries[key]
+        except KeyError:
+            self._misses += 1
+        else:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        # create entry, evicting least recently used entry if full
+        entry = self._entries[key] = create()
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+        return entry
+
+    def cache_info(self) -> CacheInfo:
+        """Gets cache statistics.
+
+        Returns
+        -------
+        CacheInfo
+            number of hits, misses, maximum size, and current size of cache
+        """
+        return CacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+    def cache_clear(self):
+        """Clears cache entries and statistics."""
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
@@ -1,25 +1,82 @@
-from typing import Dict
+from typing import List
+from typing import Optional
 from typing import Tuple
 
 from PIL import Image
 from PIL import ImageDraw
 
+from ocr_cipher_solver import instrumentation
 from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.data_formats import RGBA
 from ocr_cipher_solver.data_formats.bounding_box import BoundingBox
 from ocr_cipher_solver.data_formats.bounding_box import Coords
 from ocr_cipher_solver.data_formats.positional_character import PositionalCharacter
-from ocr_cipher_solver.utils.color_utils import get_fg_bg_colors_from_img_section
+from ocr_cipher_solver.reconstructor.character_creation import create_glyph
+from ocr_cipher_solver.reconstructor.character_creation import Glyph
+from ocr_cipher_solver.reconstructor.glyph_cache import CacheInfo
+from ocr_cipher_solver.reconstructor.glyph_cache import GlyphCache
+from ocr_cipher_solver.reconstructor.text_runs import fit_run_font
+from ocr_cipher_solver.reconstructor.text_runs import group_runs
+from ocr_cipher_solver.reconstructor.text_runs import RunLevel
+from ocr_cipher_solver.reconstructor.text_runs import runs_to_char_set
+from ocr_cipher_solver.reconstructor.text_runs import TextRun
+from ocr_cipher_solver.utils.color_utils import get_fg_bg_colors_from_img
 from ocr_cipher_solver.utils.font_utils import get_font_from_bounding_box
 
 
 ReconstructedImage = Image.Image
 
+# colors to use when colors are not sampled from the input image
+DEFAULT_TEXT_COLOR: RGBA = (0, 0, 0, 255)
+DEFAULT_BACKGROUND_COLOR: RGBA = (255, 255, 255, 255)
+
 
 class Reconstructor:
     """Handles reconstructing of image from input and ciphered character set."""
 
+    def __init__(
+        self,
+        glyph_cache_size: int = 1024,
+        sample_colors: bool = True,
+        in_place: bool = False,
+        run_level: Optional[RunLevel] = None,
+    ):
+        """Creates reconstructor.
+
+        Parameters
+        ----------
+        glyph_cache_size : int
+            maximum number of rendered glyphs (character, font size, colors) to keep cached
+        sample_colors : bool
+            whether to sample text and background colors of each character from the input image,
+            otherwise characters are drawn black on white
+        in_place : bool
+            whether to draw onto RGB input images instead of copies of them, which saves copying
+            large images but modifies the input
+        run_level : Optional[RunLevel]
+            level to group characters into runs at (words or lines), each run being drawn with one
+            font, background fill and text call, by default characters are drawn one by one
+        """
+        self._glyph_cache: GlyphCache[Glyph] = GlyphCache(glyph_cache_size)
+        self._sample_colors = sample_colors
+        self._in_place = in_place
+        self._run_level = run_level
+
+    def glyph_cache_info(self) -> CacheInfo:
+        """Gets glyph cache statistics, for sizing the cache.
+
+        Returns
+        -------
+        CacheInfo
+            number of hits, misses, maximum size, and current size of glyph cache
+        """
+        return self._glyph_cache.cache_info()
+
     def run(
-        self, ciphered_char_set: PositionalCharacterSet, input_image: Image.Image,
+        self,
+        ciphered_char_set: PositionalCharacterSet,
+        input_image: Image.Image,
+        input_char_set: Optional[PositionalCharacterSet] = None,
     ) -> ReconstructedImage:
         """Runs reconstruction on image.
 
@@ -29,61 +86,143 @@ class Reconstructor:
             enciphered character set to overlay on image
         input_image : Image.Image
             image to use as base for reconstructed image
+        input_char_set : Optional[PositionalCharacterSet]
+            character set the ciphered set was enciphered from, if given only characters the
+            cipher changed are redrawn (an unchanged character overlapped by a changed one may be
+            partly covered by the changed character's background)
 
         Returns
         -------
         ReconstructedImage
             image created from overlaying ciphered characters on input image
         """
-        reconstructed_img: Image.Image = input_image.copy().convert(mode='RGB')
-        drawable_img: ImageDraw.ImageDraw = ImageDraw.Draw(reconstructed_img, 'RGBA')
-        for char in ciphered_char_set:
-            self._draw_rect(char.bounding_box, drawable_img)
+        changed = None if input_char_set is None else ciphered_char_set.changed_from(input_char_set)
+
+        # group characters into runs, keeping (whole) runs with changed characters, or keep only
+        # changed characters
+        runs: Optional[List[TextRun]] = None
+        if self._run_level is not None:
+            runs = group_runs(ciphered_char_set, self._run_level)
+            if changed is not None:
+                runs = [run for run in runs if changed[run.indices].any()]
+            boxes = runs_to_char_set(runs, ciphered_char_set.image_shape)
+        elif changed is not None:
+            ciphered_char_set = boxes = ciphered_char_set[changed]
+        else:
+            boxes = ciphered_char_set
+
+        # get colors for text, background (sampled before anything is drawn over the input)
+        with instrumentation.timed('reconstruct.colors'):
+            colors = self._get_colors(boxes, input_image)
+
+        # draw onto input image if allowed, otherwise onto an RGB copy (convert always copies)
+        if self._in_place and input_image.mode == 'RGB':
+            reconstructed_img: Image.Image = input_image
+        else:
+            reconstructed_img = input_image.convert(mode='RGB')
+        if not len(boxes):
+            return reconstructed_img
 
-        for char in ciphered_char_set:
-            self._draw_char(char, drawable_img, reconstructed_img.info)
+        drawable_img: ImageDraw.ImageDraw = ImageDraw.Draw(reconstructed_img, 'RGBA')
+        with instrumentation.timed('reconstruct.draw_rects'):
+            for box, (_, background_color) in zip(boxes, colors):
+                self._draw_rect(box.bounding_box, drawable_img, background_color)
+
+        with instrumentation.timed('reconstruct.draw_chars'):
+            if runs is not None:
+                for run, (text_color, _) in zip(runs, colors):
+                    self._draw_run(run, reconstructed_img, text_color)
+            else:
+                for char, (text_color, _) in zip(ciphered_char_set, colors):
+                    self._draw_char(char, reconstructed_img, text_color)
 
         return reconstructed_img
 
-    @staticmethod
-    def _draw_char(char: PositionalCharacter, drawable_img: ImageDraw.ImageDraw, img_info: Dict):
-        """Draws character and returns resultant image.
+    def _get_colors(
+        self, char_set: PositionalCharacterSet, input_image: Image.Image,
+    ) -> List[Tuple[RGBA, RGBA]]:
+        """Gets text and background colors for each character.
+
+        Parameters
+        ----------
+        char_set : PositionalCharacterSet
+            characters to get colors for
+        input_image : Image.Image
+            image to sample colors from
+
+        Returns
+        -------
+        List[Tuple[RGBA, RGBA]]
+            text and background color of each character
+        """
+        default_colors = (DEFAULT_TEXT_COLOR, DEFAULT_BACKGROUND_COLOR)
+        if not self._sample_colors:
+            return [default_colors] * len(char_set)
+
+        return get_fg_bg_colors_from_img(
+            input_image, char_set, default_colors,
+        )
+
+    def _draw_char(self, char: PositionalCharacter, img: Image.Image, text_color: RGBA):
+        """Draws character onto image, using a cached glyph where possible.
 
         Parameters
         ----------
         char : PositionalCharacter
             positional character to draw on image
-        drawable_img : ImageDraw.ImageDraw
+        img : Image.Image
             image to draw on
-        img_info : Dict
-            img information dict
+        text_color : RGBA
+            color to draw character in
         """
-        # get colors for text, background
-        # text_color, fill_color = get_fg_bg_colors_from_img_section(img, char.bounding_box)
-        text_color, fill_color = (255, 255, 255, 255), (0, 0, 0, 255)
-
         # get font for character
-        font = get_font_from_bounding_box(char.bounding_box.width, char.character)
+        with instrumentation.timed('reconstruct.fit_font'):
+            font = get_font_from_bounding_box(char.bounding_box.width, char.character)
 
-        # get font offset for character
-        offset = font.getoffset(char.character)
+        # get rendered glyph for character
+        glyph = self._glyph_cache.get(
+            (char.character, font.size, text_color),
+            lambda: create_glyph(char.character, font, text_color),
+        )
+        if glyph.is_empty:
+            return
 
-        # apply offset to bounding box
-        bbox = char.bounding_box.to_ltrb(coords=Coords.TopLeft)[:2]
-        offset_x = bbox[0] - offset[0]
-        offset_y = bbox[1] - offset[1]
+        # paste glyph so its offset lands on the top left corner of the bounding box
+        left, top = char.bounding_box.to_ltrb(coords=Coords.TopLeft)[:2]
+        img.paste(glyph.bitmap, (left, top), glyph.mask)
 
-        # draw character on image and return
-        drawable_img.text(
-            (offset_x, offset_y),
-            char.character,
-            font=font,
-            fill=fill_color,
-            stroke_fill=text_color,
+    def _draw_run(self, run: TextRun, img: Image.Image, text_color: RGBA):
+        """Draws run of characters onto image in a single font, using a cached glyph where possible.
+
+        Parameters
+        ----------
+        run : TextRun
+            run of characters to draw on image
+        img : Image.Image
+            image to draw on
+        text_color : RGBA
+            color to draw run in
+        """
+        # get font for run
+        with instrumentation.timed('reconstruct.fit_font'):
+            font = fit_run_font(run)
+
+        # get run rendered as one glyph (words repeat, so are often cached)
+        glyph = self._glyph_cache.get(
+            (run.text, font.size, text_color),
+            lambda: create_glyph(run.text, font, text_color),
         )
+        if glyph.is_empty:
+            return
+
+        # paste glyph at the left of the bounding box, with the font's baseline on the run's
+        # (so runs on a line line up, whatever their letters)
+        ascent = font.getmetrics()[0]
+        top = img.height - run.baseline - ascent + glyph.offset[1]
+        img.paste(glyph.bitmap, (run.bounding_box.left, top), glyph.mask)
 
     @staticmethod
-    def _draw_rect(bbox: BoundingBox, drawable_img: ImageDraw.ImageDraw):
+    def _draw_rect(bbox: BoundingBox, drawable_img: ImageDraw.ImageDraw, fill_color: RGBA):
         """Draws rectangle on image in bounding box.
 
         Parameters
@@ -92,9 +231,9 @@ class Reconstructor:
             bounding box to draw rect in
         drawable_img : ImageDraw.ImageDraw
             image to draw rect onto
+        fill_color : RGBA
+            color to fill rect with
         """
-        fill_color = (255, 255, 255, 255)
-
         drawable_img.rectangle(
             bbox.to_ltrb(coords=Coords.TopLeft),
             fill=fill_color,
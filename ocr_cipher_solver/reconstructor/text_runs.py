@@ -0,0 +1,163 @@
+"""Defines grouping of characters into runs (words or lines) that are drawn with one font."""
+import enum
+import functools
+from typing import List
+from typing import NamedTuple
+from typing import Tuple
+
+import numpy as np
+from PIL import ImageFont
+
+from ocr_cipher_solver.data_formats import BoundingBox
+from ocr_cipher_solver.data_formats import PositionalCharacter
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.utils.font_utils import get_font
+from ocr_cipher_solver.utils.font_utils import get_font_from_bounding_box
+from ocr_cipher_solver.utils.font_utils import get_font_metrics
+
+
+class RunLevel(enum.Enum):
+    """Levels characters can be grouped at."""
+    Word = enum.auto()
+    Line = enum.auto()
+
+
+class TextRun(NamedTuple):
+    """Characters on the same line, drawn together."""
+    text: str
+    indices: np.ndarray
+    bounding_box: BoundingBox
+    baseline: int
+
+
+def group_runs(
+    char_set: PositionalCharacterSet,
+    level: RunLevel = RunLevel.Word,
+    word_gap: float = 0.4,
+    line_overlap: float = 0.5,
+) -> List[TextRun]:
+    """Groups characters into words or lines, by clustering their bounding boxes.
+
+    Characters are taken in reading order (the order tesseract outputs them in). A character
+    continues the run before it if it lies to the right of the previous character and overlaps the
+    run vertically, and (for words, or for lines, by more than a few character heights) isn't
+    separated from it by a gap.
+
+    Parameters
+    ----------
+    char_set : PositionalCharacterSet
+        characters to group, in reading order
+    level : RunLevel
+        whether to group characters into words or lines
+    word_gap : float
+        gap between characters, relative to run height, above which they are in separate words
+    line_overlap : float
+        vertical overlap with the run, relative to the smaller height, above which a character is
+        on the same line as the run
+
+    Returns
+    -------
+    List[TextRun]
+        runs of characters, lines with a space between words, with their baseline in the same
+        coordinates as bounding boxes
+    """
+    runs: List[TextRun] = []
+    if not len(char_set):
+        return runs
+
+    text = char_set.text
+    lefts = char_set.left.tolist()
+    rights = (char_set.left + char_set.width).tolist()
+    tops = char_set.top.tolist()
+    bottoms = (char_set.top - char_set.height).tolist()
+
+    def add_run(start: int, end: int, run_text: str):
+        left, top = min(lefts[start:end]), max(tops[start:end])
+        runs.append(TextRun(
+            run_text,
+            np.arange(start, end),
+            BoundingBox(
+                left, top, max(rights[start:end]) - left, top - min(bottoms[start:end]),
+                char_set.img_width, char_set.img_height,
+            ),
+            # most characters sit on the baseline, only a few descend below it
+            int(np.median(bottoms[start:end])),
+        ))
+
+    # extend run while characters continue it, with run extent kept in bottom left coordinates
+    start, run_text = 0, text[0]
+    run_top, run_bottom = tops[0], bottoms[0]
+    for i in range(1, len(text)):
+        run_height = run_top - run_bottom
+        overlap = min(run_top, tops[i]) - max(run_bottom, bottoms[i])
+        gap = lefts[i] - rights[i - 1]
+
+        same_line = (
+            overlap >= line_overlap * min(run_height, tops[i] - bottoms[i])
+            and gap >= -0.5 * run_height
+        )
+        new_word = gap > word_gap * run_height
+        if not same_line or (new_word and level == RunLevel.Word) or gap > 3 * run_height:
+            add_run(start, i, run_text)
+            start, run_text = i, text[i]
+            run_top, run_bottom = tops[i], bottoms[i]
+            continue
+
+        run_text += f' {text[i]}' if new_word else text[i]
+        run_top, run_bottom = max(run_top, tops[i]), min(run_bottom, bottoms[i])
+
+    add_run(start, len(text), run_text)
+    return runs
+
+
+def runs_to_char_set(runs: List[TextRun], image_shape: Tuple[int, int]) -> PositionalCharacterSet:
+    """Creates character set of run bounding boxes, labelled with their first character.
+
+    Parameters
+    ----------
+    runs : List[TextRun]
+        runs to convert
+    image_shape : Tuple[int, int]
+        shape of image
+
+    Returns
+    -------
+    PositionalCharacterSet
+        one character per run, in the run's bounding box (e.g. for sampling colors)
+    """
+    return PositionalCharacterSet.from_characters(
+        [PositionalCharacter(run.text[0], run.bounding_box) for run in runs], image_shape,
+    )
+
+
+def fit_run_font(run: TextRun) -> ImageFont.FreeTypeFont:
+    """Fits font to run, so that its text is at most as wide as its bounding box.
+
+    Parameters
+    ----------
+    run : TextRun
+        run to fit font to
+
+    Returns
+    -------
+    ImageFont.FreeTypeFont
+        font fitted to run
+    """
+    return _fit_font(run.text, run.bounding_box.width)
+
+
+@functools.lru_cache(maxsize=1024)
+def _fit_font(text: str, width: int) -> ImageFont.FreeTypeFont:
+    """Fits font to text, cached as words (and their widths) repeat across a page."""
+    # estimate from average character width, then shrink until text fits (if the font isn't
+    # monospace)
+    font = get_font_from_bounding_box(max(1, round(width / len(text))), 'M')
+    font_size, font_path = font.size, get_font_metrics().font_path
+    while font_size > 1:
+        left, _, right, _ = font.getbbox(text)
+        if right - left <= width:
+            break
+        font_size -= 1
+        font = get_font(font_size, font_path)
+
+    return font
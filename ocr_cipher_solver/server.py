@@ -0,0 +1,544 @@
+"""Defines a local HTTP service that runs uploaded images through a pool of warm pipelines."""
+import argparse
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import http
+import http.server
+import io
+import json
+import pathlib
+import queue
+import threading
+import time
+import urllib.parse
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Type
+
+from PIL import Image
+
+from .ciphers import AtbashCipher
+from .ciphers import CaesarianCipher
+from .ciphers import Encipherer
+from .ciphers import KeywordCipher
+from .ciphers.identity import IdentityEncipherer
+from .data_formats import PositionalCharacterSet
+from .ocr import OCR
+from .ocr_cache import DEFAULT_CACHE_DIR
+from .ocr_cache import OCRCache
+from .pipeline import ImagePipeline
+from .pipeline import PipelineResult
+from .reconstructor import Reconstructor
+from .solvers import CaesarSolver
+from .solvers import QuadgramModel
+from .solvers import SubstitutionSolver
+from .utils import font_utils
+
+
+# upper bounds (in seconds) of request latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# largest accepted upload, in bytes
+DEFAULT_MAX_UPLOAD_SIZE = 64 * 1024 * 1024
+
+
+class ServiceUnavailableError(Exception):
+    """Raised when every pipeline is busy and the request can't wait any longer."""
+
+
+class PipelinePool:
+    """Pool of preloaded pipelines, each always run on its own thread.
+
+    Running a pipeline on the same thread every time keeps per-thread resources (such as
+    in-process OCR engines) loaded across requests.
+    """
+
+    def __init__(self, create_pipeline: Callable[[], ImagePipeline], size: int):
+        """Creates pipeline pool.
+
+        Parameters
+        ----------
+        create_pipeline : Callable[[], ImagePipeline]
+            creates one pipeline of the pool, pipelines don't share stages
+        size : int
+            number of pipelines, which is the number of requests processed at once
+        """
+        if size < 1:
+            raise ValueError(f'Pipeline pool size must be positive, got {size}.')
+
+        self.size = size
+        self._idle: queue.Queue = queue.Queue()
+        self._executors: List[concurrent.futures.ThreadPoolExecutor] = []
+        self._pipelines: List[ImagePipeline] = []
+        for index in range(size):
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f'pipeline-{index}',
+            )
+            self._executors.append(executor)
+            self._pipelines.append(create_pipeline())
+            self._idle.put((self._pipelines[-1], executor))
+
+    def warm(self, warm_image: Image.Image):
+        """Runs every pipeline's OCR stage once, on its own thread, to load OCR resources.
+
+        Parameters
+        ----------
+        warm_image : Image.Image
+            image to run OCR on
+        """
+        pooled = [self._idle.get() for _ in range(self.size)]
+        try:
+            concurrent.futures.wait([
+                executor.submit(pipeline.ocr.run, warm_image) for pipeline, executor in pooled
+            ])
+        finally:
+            for entry in pooled:
+                self._idle.put(entry)
+
+    def run(
+        self,
+        encipherer: Encipherer,
+        input_image: Image.Image,
+        timeout: Optional[float] = None,
+        reconstruct: bool = True,
+    ) -> PipelineResult:
+        """Runs an idle pipeline with encipherer on image, waiting for one to become idle.
+
+        Parameters
+        ----------
+        encipherer : Encipherer
+            encipherer to run in place of the pooled pipeline's encipherer
+        input_image : Image.Image
+            image to run pipeline with
+        timeout : Optional[float]
+            seconds to wait for an idle pipeline, by default forever
+        reconstruct : bool
+            whether to reconstruct the image (otherwise, only characters are enciphered)
+
+        Returns
+        -------
+        PipelineResult
+            result of running pipeline on image
+        """
+        with self._acquire(timeout) as (pipeline, executor):
+            request_pipeline = ImagePipeline(
+                pipeline.ocr, encipherer, pipeline.reconstructor, pipeline.outputs,
+                reconstruct=reconstruct,
+            )
+            return executor.submit(request_pipeline.run_pipeline, input_image).result()
+
+    def close(self):
+        """Shuts down the pool's threads, then closes the pipelines' OCR stages."""
+        for executor in self._executors:
+            executor.shutdown()
+        for pipeline in self._pipelines:
+            pipeline.ocr.close()
+
+    @contextlib.contextmanager
+    def _acquire(
+        self, timeout: Optional[float],
+    ) -> Iterator[Tuple[ImagePipeline, concurrent.futures.ThreadPoolExecutor]]:
+        """Takes an idle pipeline and its thread, returning them to the pool once done."""
+        try:
+            entry = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise ServiceUnavailableError(f'No pipeline became idle within {timeout}s.') from None
+
+        try:
+            yield entry
+        finally:
+            self._idle.put(entry)
+
+
+class ServiceMetrics:
+    """Request counts and latencies, rendered in the Prometheus text format."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """Creates empty metrics.
+
+        Parameters
+        ----------
+        buckets : Sequence[float]
+            upper bounds (in seconds) of latency histogram buckets, in increasing order
+        """
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, int], int] = collections.Counter()
+        self._bucket_counts: Dict[str, List[int]] = {}
+        self._latency_sums: Dict[str, float] = collections.defaultdict(float)
+        self._in_flight = 0
+
+    @contextlib.contextmanager
+    def track_in_flight(self) -> Iterator[None]:
+        """Counts a request as in flight while the context is active."""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def observe(self, endpoint: str, status: int, latency: float):
+        """Records a completed request.
+
+        Parameters
+        ----------
+        endpoint : str
+            path of request
+        status : int
+            HTTP status code of response
+        latency : float
+            seconds taken to respond
+        """
+        with self._lock:
+            self._requests[endpoint, int(status)] += 1
+            bucket_counts = self._bucket_counts.setdefault(endpoint, [0] * (len(self._buckets) + 1))
+            bucket_counts[bisect.bisect_left(self._buckets, latency)] += 1
+            self._latency_sums[endpoint] += latency
+
+    def render(self) -> str:
+        """Renders metrics in the Prometheus text exposition format.
+
+        Returns
+        -------
+        str
+            request counts, latency histograms, and in-flight requests
+        """
+        with self._lock:
+            lines = ['# TYPE ocr_cipher_solver_requests_total counter']
+            for (endpoint, status), count in sorted(self._requests.items()):
+                lines.append(
+                    f'ocr_cipher_solver_requests_total{{endpoint="{endpoint}",status="{status}"}} '
+                    f'{count}',
+                )
+
+            lines.append('# TYPE ocr_cipher_solver_request_seconds histogram')
+            for endpoint, bucket_counts in sorted(self._bucket_counts.items()):
+                labels = f'endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, count in zip(self._buckets + (float('inf'),), bucket_counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(
+                        f'ocr_cipher_solver_request_seconds_bucket{{{labels},le="{le}"}} '
+                        f'{cumulative}',
+                    )
+                lines.append(
+                    f'ocr_cipher_solver_request_seconds_sum{{{labels}}} '
+                    f'{self._latency_sums[endpoint]:.6f}',
+                )
+                lines.append(f'ocr_cipher_solver_request_seconds_count{{{labels}}} {cumulative}')
+
+            lines.append('# TYPE ocr_cipher_solver_requests_in_flight gauge')
+            lines.append(f'ocr_cipher_solver_requests_in_flight {self._in_flight}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def create_encipherer(params: Dict[str, str]) -> Encipherer:
+    """Creates the encipherer (or solver) requested by query parameters.
+
+    Parameters
+    ----------
+    params : Dict[str, str]
+        query parameters: solve (caesar or substitution), or cipher (caesar, atbash, keyword, or
+        identity) with shift or keyword
+
+    Returns
+    -------
+    Encipherer
+        requested encipherer
+    """
+    solve = params.get('solve')
+    cipher = params.get('cipher', 'caesar')
+    if solve == 'caesar':
+        return CaesarSolver()
+    elif solve == 'substitution':
+        return SubstitutionSolver(language_model=_get_quadgram_model())
+    elif solve is not None:
+        raise ValueError(f'Unknown solver {solve!r}.')
+    elif cipher == 'caesar':
+        return CaesarianCipher(shift=int(params.get('shift', 0)))
+    elif cipher == 'atbash':
+        return AtbashCipher()
+    elif cipher == 'keyword':
+        return KeywordCipher(params.get('keyword', ''))
+    elif cipher == 'identity':
+        return IdentityEncipherer()
+
+    raise ValueError(f'Unknown cipher {cipher!r}.')
+
+
+_quadgram_model: Optional[QuadgramModel] = None
+
+
+def _get_quadgram_model() -> QuadgramModel:
+    """Gets quadgram model shared by substitution solvers, loading it on first use."""
+    global _quadgram_model
+    if _quadgram_model is None:
+        _quadgram_model = QuadgramModel.load()
+    return _quadgram_model
+
+
+def char_set_to_json(char_set: PositionalCharacterSet) -> dict:
+    """Converts character set to a JSON-serializable dictionary.
+
+    Parameters
+    ----------
+    char_set : PositionalCharacterSet
+        character set to convert
+
+    Returns
+    -------
+    dict
+        text and image size, with every character and its bounding box (in BoundingBox
+        coordinates)
+    """
+    return {
+        'text': char_set.text,
+        'image_size': list(char_set.image_shape),
+        'chars': [
+            {'char': char, 'left': left, 'top': top, 'width': width, 'height': height}
+            for char, left, top, width, height in zip(
+                char_set.text, char_set.left.tolist(), char_set.top.tolist(),
+                char_set.width.tolist(), char_set.height.tolist(),
+            )
+        ],
+    }
+
+
+class PipelineRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Handles requests to a PipelineServer.
+
+    POST /encipher runs the uploaded image (the raw request body) through a pipeline, responding
+    with the reconstructed PNG, or with the characters as JSON if format=json. Cipher options are
+    given as query parameters. GET /metrics responds with Prometheus metrics, GET /health with ok.
+    """
+    server: 'PipelineServer'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/health':
+            self._respond(url.path, http.HTTPStatus.OK, 'text/plain', b'ok\n')
+        elif url.path == '/metrics':
+            # don't count scraping metrics in request metrics
+            metrics = self.server.metrics.render().encode()
+            self._send(http.HTTPStatus.OK, 'text/plain; version=0.0.4', metrics)
+        else:
+            self._respond(url.path, http.HTTPStatus.NOT_FOUND, 'text/plain', b'not found\n')
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != '/encipher':
+            self._respond(url.path, http.HTTPStatus.NOT_FOUND, 'text/plain', b'not found\n', start)
+            return
+
+        with self.server.metrics.track_in_flight():
+            status, content_type, body = self._encipher(url.query)
+        self._respond(url.path, status, content_type, body, start)
+
+    def log_message(self, format: str, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _encipher(self, query: str) -> Tuple[http.HTTPStatus, str, bytes]:
+        """Runs uploaded image through a pooled pipeline.
+
+        Parameters
+        ----------
+        query : str
+            query string of request
+
+        Returns
+        -------
+        Tuple[http.HTTPStatus, str, bytes]
+            status, content type, and body of response
+        """
+        params = dict(urllib.parse.parse_qsl(query))
+
+        # the body isn't read if its length is missing, invalid or too large, so the connection
+        # can't be reused
+        content_length = self.headers.get('Content-Length')
+        if content_length is None:
+            self.close_connection = True
+            return http.HTTPStatus.LENGTH_REQUIRED, 'text/plain', b'Content-Length required\n'
+        try:
+            length = int(content_length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            return http.HTTPStatus.BAD_REQUEST, 'text/plain', b'invalid Content-Length\n'
+        if length > self.server.max_upload_size:
+            self.close_connection = True
+            return http.HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'text/plain', b'upload too large\n'
+
+        upload = self.rfile.read(length)
+        try:
+            encipherer = create_encipherer(params)
+            with Image.open(io.BytesIO(upload)) as input_image:
+                input_image.load()
+        except Image.DecompressionBombError as e:
+            return http.HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'text/plain', f'{e}\n'.encode()
+        except (ValueError, OSError) as e:
+            return http.HTTPStatus.BAD_REQUEST, 'text/plain', f'{e}\n'.encode()
+
+        # JSON responses only need the enciphered characters, not the reconstructed image
+        as_json = params.get('format', 'png') == 'json'
+        try:
+            result = self.server.pool.run(
+                encipherer, input_image, timeout=self.server.queue_timeout, reconstruct=not as_json,
+            )
+        except ServiceUnavailableError as e:
+            return http.HTTPStatus.SERVICE_UNAVAILABLE, 'text/plain', f'{e}\n'.encode()
+        except Exception as e:
+            self.log_error('pipeline failed: %r', e)
+            return http.HTTPStatus.INTERNAL_SERVER_ERROR, 'text/plain', f'{e}\n'.encode()
+
+        if as_json:
+            return (
+                http.HTTPStatus.OK, 'application/json',
+                json.dumps(char_set_to_json(result.enciphered_char_set)).encode(),
+            )
+
+        assert result.reconstructed_image is not None
+        png = io.BytesIO()
+        result.reconstructed_image.save(png, format='PNG')
+        return http.HTTPStatus.OK, 'image/png', png.getvalue()
+
+    def _respond(
+        self,
+        endpoint: str,
+        status: http.HTTPStatus,
+        content_type: str,
+        body: bytes,
+        start: Optional[float] = None,
+    ):
+        """Sends response and records it in the server's metrics."""
+        self._send(status, content_type, body)
+        if start is not None:
+            self.server.metrics.observe(endpoint, status, time.perf_counter() - start)
+
+    def _send(self, status: http.HTTPStatus, content_type: str, body: bytes):
+        """Sends response."""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PipelineServer(http.server.ThreadingHTTPServer):
+    """HTTP server running uploaded images through a pool of warm pipelines."""
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        pool: PipelinePool,
+        queue_timeout: Optional[float] = 30.0,
+        max_upload_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+        quiet: bool = False,
+    ):
+        """Creates pipeline server.
+
+        Parameters
+        ----------
+        address : Tuple[str, int]
+            host and port to listen on
+        pool : PipelinePool
+            pipelines to run requests with, its size limits the number of requests run at once
+        queue_timeout : Optional[float]
+            seconds a request waits for an idle pipeline before being rejected with 503
+        max_upload_size : int
+            largest accepted upload in bytes, larger uploads are rejected with 413
+        quiet : bool
+            whether to skip logging requests
+        """
+        super().__init__(address, PipelineRequestHandler)
+        self.pool = pool
+        self.queue_timeout = queue_timeout
+        self.max_upload_size = max_upload_size
+        self.quiet = quiet
+        self.metrics = ServiceMetrics()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Runs pipeline server until interrupted.
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        command line arguments, by default those of the process
+    """
+    parser = argparse.ArgumentParser(prog='OCR Cipher Solver serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument(
+        '--pool_size', type=int, default=2,
+        help='number of warm pipelines, which is the number of requests processed at once',
+    )
+    parser.add_argument(
+        '--queue_timeout', type=float, default=30.0,
+        help='seconds a request waits for an idle pipeline before being rejected',
+    )
+    parser.add_argument(
+        '--ocr_cache_dir', type=pathlib.Path, default=DEFAULT_CACHE_DIR, metavar='DIR',
+    )
+    parser.add_argument('--no_ocr_cache', action='store_true')
+    parser.add_argument(
+        '--ocr_backend', choices=('pytesseract', 'libtesseract'), default='pytesseract',
+        help='run the tesseract binary per image, or keep tesseract loaded in-process',
+    )
+    parser.add_argument('--no_sample_colors', action='store_true')
+    parser.add_argument('--font_metrics', type=pathlib.Path, metavar='NPZ')
+    parser.add_argument('--quiet', action='store_true', help="don't log requests")
+    args = parser.parse_args(argv)
+
+    # load (or build) font metrics once, before any request needs them
+    if args.font_metrics is not None:
+        font_utils.set_font_metrics(font_utils.FontMetrics.load_or_build(args.font_metrics))
+    else:
+        font_utils.get_font_metrics().warm()
+
+    ocr_backend: Type[OCR] = OCR
+    if args.ocr_backend == 'libtesseract':
+        from .libtesseract import LibTesseractOCR
+
+        ocr_backend = LibTesseractOCR
+
+    def create_pipeline() -> ImagePipeline:
+        return ImagePipeline(
+            ocr_backend(cache=None if args.no_ocr_cache else OCRCache(args.ocr_cache_dir)),
+            IdentityEncipherer(),
+            Reconstructor(sample_colors=not args.no_sample_colors, in_place=True),
+            (),
+        )
+
+    pool = PipelinePool(create_pipeline, args.pool_size)
+    pool.warm(Image.new('RGB', (32, 32), 'white'))
+
+    address = (args.host, args.port)
+    with PipelineServer(address, pool, args.queue_timeout, quiet=args.quiet) as server:
+        host, port = server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        print(f'serving on http://{host}:{port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
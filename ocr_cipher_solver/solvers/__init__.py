@@ -0,0 +1,4 @@
+from .caesar_solver import CaesarSolver
+from .language_model import QuadgramModel
+from .language_model import UnigramModel
+from .substitution_solver import SubstitutionSolver
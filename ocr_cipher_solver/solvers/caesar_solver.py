@@ -0,0 +1,61 @@
+"""Defines a brute-force Caesar cipher solver."""
+from typing import Optional
+
+import numpy as np
+
+from ocr_cipher_solver.ciphers import CaesarianCipher
+from ocr_cipher_solver.ciphers import Encipherer
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.solvers.language_model import letter_indices
+from ocr_cipher_solver.solvers.language_model import UnigramModel
+
+
+class CaesarSolver(Encipherer):
+    """Deciphers Caesar-enciphered text by scoring every shift with a language model."""
+
+    def __init__(self, language_model: Optional[UnigramModel] = None):
+        """Creates Caesar solver.
+
+        Parameters
+        ----------
+        language_model : Optional[UnigramModel]
+            model to score candidate plain texts with, by default English letter frequencies
+        """
+        self._language_model = language_model or UnigramModel()
+        self.shift: Optional[int] = None
+
+    def score_shifts(self, pos_char_set: PositionalCharacterSet) -> np.ndarray:
+        """Scores the plain text produced by every shift.
+
+        Parameters
+        ----------
+        pos_char_set : PositionalCharacterSet
+            enciphered character set
+
+        Returns
+        -------
+        np.ndarray
+            language model score of each candidate plain text, indexed by shift
+        """
+        return self._language_model.score_rotations(letter_indices(pos_char_set.codepoints))
+
+    def run(self, pos_char_set: PositionalCharacterSet) -> PositionalCharacterSet:
+        """Finds the best scoring shift and deciphers character set with it.
+
+        The shift found is stored in the shift attribute.
+
+        Parameters
+        ----------
+        pos_char_set : PositionalCharacterSet
+            enciphered character set
+
+        Returns
+        -------
+        PositionalCharacterSet
+            deciphered character set
+        """
+        if not isinstance(pos_char_set, PositionalCharacterSet):
+            pos_char_set = PositionalCharacterSet.from_characters(pos_char_set)
+
+        self.shift = int(np.argmax(self.score_shifts(pos_char_set)))
+        return CaesarianCipher(self.shift).run(pos_char_set)
@@ -0,0 +1,178 @@
+"""Defines language models used to score candidate plain texts."""
+from __future__ import annotations
+
+import gzip
+import math
+import pathlib
+import string
+from typing import Sequence
+
+import numpy as np
+
+
+NUM_LETTERS = len(string.ascii_lowercase)
+NUM_QUADGRAMS = NUM_LETTERS ** 4
+
+# English quadgram counts, built with scripts/build_quadgram_model.py
+QUADGRAM_DATA_PATH = pathlib.Path(__file__).parent.joinpath('data', 'english_quadgrams.txt.gz')
+
+# relative frequencies (in percent) of letters a-z in English text
+ENGLISH_LETTER_FREQUENCIES = (
+    8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153, 0.772, 4.025, 2.406,
+    6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+)
+
+
+def letter_indices(codepoints: np.ndarray) -> np.ndarray:
+    """Gets alphabet indices (0-25) of the ASCII letters in array of codepoints, ignoring case.
+
+    Parameters
+    ----------
+    codepoints : np.ndarray
+        array of unicode codepoints
+
+    Returns
+    -------
+    np.ndarray
+        alphabet index of each letter, in order, with non-letters dropped
+    """
+    # fold uppercase letters onto lowercase ones
+    codepoints = np.asarray(codepoints, dtype=np.int64)
+    is_upper = (codepoints >= ord('A')) & (codepoints <= ord('Z'))
+    indices = np.where(is_upper, codepoints + (ord('a') - ord('A')), codepoints) - ord('a')
+
+    return indices[(indices >= 0) & (indices < NUM_LETTERS)]
+
+
+class UnigramModel:
+    """Scores text by the log-likelihood of its letters under a letter frequency distribution."""
+
+    def __init__(self, frequencies: Sequence[float] = ENGLISH_LETTER_FREQUENCIES):
+        """Creates unigram model.
+
+        Parameters
+        ----------
+        frequencies : Sequence[float]
+            relative frequencies of letters a-z, by default those of English
+        """
+        probs = np.asarray(frequencies, dtype=np.float64)
+        if probs.shape != (NUM_LETTERS,):
+            raise ValueError(f'Expected {NUM_LETTERS} letter frequencies, got {probs.shape}.')
+
+        self.log_probs = np.log(probs / probs.sum())
+
+    def score_rotations(self, letters: np.ndarray) -> np.ndarray:
+        """Scores every rotation of the letters at once.
+
+        Parameters
+        ----------
+        letters : np.ndarray
+            alphabet indices of letters to score
+
+        Returns
+        -------
+        np.ndarray
+            log-likelihood of the letters rotated by each shift, indexed by shift
+        """
+        # score[shift] = sum over letters of log prob of (letter + shift), computed from letter
+        # counts
+        counts = np.bincount(letters, minlength=NUM_LETTERS)
+        shifts = np.arange(NUM_LETTERS)
+        rotated = (shifts[:, np.newaxis] + shifts[np.newaxis, :]) % NUM_LETTERS
+        return self.log_probs[rotated] @ counts
+
+
+def quadgram_indices(letters: np.ndarray) -> np.ndarray:
+    """Gets index of every (overlapping) quadgram of letters.
+
+    Parameters
+    ----------
+    letters : np.ndarray
+        alphabet indices of letters
+
+    Returns
+    -------
+    np.ndarray
+        quadgram indices (base 26 numbers of the four letters), one per quadgram
+    """
+    letters = np.asarray(letters, dtype=np.int64)
+    if len(letters) < 4:
+        return np.zeros(0, dtype=np.int64)
+
+    return (
+        letters[:-3] * NUM_LETTERS ** 3 + letters[1:-2] * NUM_LETTERS ** 2
+        + letters[2:-1] * NUM_LETTERS + letters[3:]
+    )
+
+
+class QuadgramModel:
+    """Scores text by the log-likelihood of its letter quadgrams."""
+
+    def __init__(self, log_probs: np.ndarray, plain_text_score: float):
+        """Creates quadgram model.
+
+        Parameters
+        ----------
+        log_probs : np.ndarray
+            log probability of every quadgram, indexed by quadgram index
+        plain_text_score : float
+            mean log probability of a quadgram of typical plain text
+        """
+        if log_probs.shape != (NUM_QUADGRAMS,):
+            raise ValueError(
+                f'Expected {NUM_QUADGRAMS} quadgram log probabilities, got {log_probs.shape}.',
+            )
+
+        self.log_probs = log_probs
+        self.plain_text_score = plain_text_score
+
+    @classmethod
+    def load(cls, path: pathlib.Path = QUADGRAM_DATA_PATH) -> QuadgramModel:
+        """Loads quadgram model from (gzipped) file of quadgram counts.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            path of quadgram counts file, by default the English quadgrams shipped with the package
+
+        Returns
+        -------
+        QuadgramModel
+            loaded quadgram model
+        """
+        header = {}
+        quadgrams = []
+        counts = []
+        with gzip.open(path, 'rt', encoding='ascii') as quadgram_file:
+            for line in quadgram_file:
+                key, value = line.lstrip('# ').split()
+                if line.startswith('#'):
+                    header[key] = float(value)
+                else:
+                    quadgrams.append(key.lower())
+                    counts.append(int(value))
+
+        # unseen quadgrams are given a small probability, below that of any seen quadgram
+        total = header.get('total', sum(counts))
+        log_probs = np.full(NUM_QUADGRAMS, math.log(0.01 / total), dtype=np.float32)
+        indices = quadgram_indices(letter_indices(np.frombuffer(
+            ''.join(quadgrams).encode('ascii'), dtype=np.uint8,
+        )))[::4]
+        log_probs[indices] = np.log(np.asarray(counts, dtype=np.float64) / total)
+
+        return cls(log_probs, header.get('mean_log_prob', float(np.mean(log_probs[indices]))))
+
+    def score(self, letters: np.ndarray) -> float:
+        """Scores letters.
+
+        Parameters
+        ----------
+        letters : np.ndarray
+            alphabet indices of letters to score
+
+        Returns
+        -------
+        float
+            log-likelihood of the letters' quadgrams
+        """
+        return float(self.log_probs[quadgram_indices(letters)].sum())
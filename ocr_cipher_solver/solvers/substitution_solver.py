@@ -0,0 +1,288 @@
+"""Defines a monoalphabetic substitution cipher solver."""
+import concurrent.futures
+import itertools
+import os
+import string
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+import numpy as np
+
+from ocr_cipher_solver.ciphers import Encipherer
+from ocr_cipher_solver.ciphers import SubstitutionCipher
+from ocr_cipher_solver.ciphers.substitution import alphabet_mapping
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.solvers.language_model import letter_indices
+from ocr_cipher_solver.solvers.language_model import NUM_LETTERS
+from ocr_cipher_solver.solvers.language_model import QuadgramModel
+
+
+# every pair of letters that can be swapped in a key
+_LETTER_PAIRS = np.array(list(itertools.combinations(range(NUM_LETTERS), 2)))
+
+# value of each letter position in a quadgram index
+_QUADGRAM_PLACE_VALUES = NUM_LETTERS ** np.arange(3, -1, -1)
+
+# quadgram model owned by the current worker process, set once by the pool initializer
+_worker_model: Optional[QuadgramModel] = None
+
+
+class SolverResult(NamedTuple):
+    """Result of a single hill climbing run."""
+    key: np.ndarray
+    score: float
+
+
+class _CipherQuadgrams:
+    """Distinct quadgrams of a cipher text, indexed by the cipher letters they contain."""
+
+    def __init__(self, letters: np.ndarray):
+        """Finds distinct quadgrams of cipher text.
+
+        Parameters
+        ----------
+        letters : np.ndarray
+            alphabet indices of cipher text letters
+        """
+        windows = np.stack([letters[i:len(letters) - 3 + i] for i in range(4)], axis=1)
+        self.quadgrams, self.counts = np.unique(windows, axis=0, return_counts=True)
+
+        # rows of quadgrams containing each cipher letter
+        self.rows_with_letter: List[np.ndarray] = [
+            np.flatnonzero((self.quadgrams == letter).any(axis=1)) for letter in range(NUM_LETTERS)
+        ]
+
+    def contributions(self, key: np.ndarray, log_probs: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Scores quadgrams deciphered with key.
+
+        Parameters
+        ----------
+        key : np.ndarray
+            plain letter of each cipher letter
+        log_probs : np.ndarray
+            quadgram log probabilities
+        rows : np.ndarray
+            rows of quadgrams to score
+
+        Returns
+        -------
+        np.ndarray
+            score contribution of each quadgram (log probability times number of occurrences)
+        """
+        plain = key[self.quadgrams[rows]]
+        indices = plain @ _QUADGRAM_PLACE_VALUES
+        return log_probs[indices] * self.counts[rows]
+
+
+def _hill_climb(letters: np.ndarray, model: QuadgramModel, seed: int) -> SolverResult:
+    """Finds key by swapping pairs of key letters while the score improves, from a random key.
+
+    Each swap only rescores the quadgrams containing one of the two swapped cipher letters.
+
+    Parameters
+    ----------
+    letters : np.ndarray
+        alphabet indices of cipher text letters
+    model : QuadgramModel
+        model to score deciphered quadgrams with
+    seed : int
+        seed of random starting key and swap order
+
+    Returns
+    -------
+    SolverResult
+        best key found (plain letter of each cipher letter) and its score
+    """
+    rng = np.random.default_rng(seed)
+    cipher_quadgrams = _CipherQuadgrams(letters)
+    all_rows = np.arange(len(cipher_quadgrams.counts))
+
+    key = rng.permutation(NUM_LETTERS)
+    contributions = cipher_quadgrams.contributions(key, model.log_probs, all_rows)
+
+    improved = True
+    while improved:
+        improved = False
+        for a, b in rng.permutation(_LETTER_PAIRS):
+            rows = np.union1d(
+                cipher_quadgrams.rows_with_letter[a], cipher_quadgrams.rows_with_letter[b],
+            )
+            if len(rows) == 0:
+                continue
+
+            # rescore only the affected quadgrams with the swapped key
+            key[[a, b]] = key[[b, a]]
+            new_contributions = cipher_quadgrams.contributions(key, model.log_probs, rows)
+            if new_contributions.sum() > contributions[rows].sum():
+                contributions[rows] = new_contributions
+                improved = True
+            else:
+                key[[a, b]] = key[[b, a]]
+
+    return SolverResult(key, float(contributions.sum()))
+
+
+def _init_worker(model: QuadgramModel):
+    """Initializes worker process with the quadgram model.
+
+    Parameters
+    ----------
+    model : QuadgramModel
+        model to score deciphered quadgrams with
+    """
+    global _worker_model
+    _worker_model = model
+
+
+def _hill_climb_in_worker(letters: np.ndarray, seed: int) -> SolverResult:
+    """Runs hill climbing with the worker's quadgram model.
+
+    Parameters
+    ----------
+    letters : np.ndarray
+        alphabet indices of cipher text letters
+    seed : int
+        seed of random starting key and swap order
+
+    Returns
+    -------
+    SolverResult
+        best key found and its score
+    """
+    assert _worker_model is not None, 'worker quadgram model was not initialized'
+    return _hill_climb(letters, _worker_model, seed)
+
+
+class SubstitutionSolver(Encipherer):
+    """Deciphers monoalphabetic substitution ciphers with quadgram-scored hill climbing."""
+
+    def __init__(
+        self,
+        language_model: Optional[QuadgramModel] = None,
+        num_restarts: int = 16,
+        num_workers: Optional[int] = 1,
+        stop_score: Optional[float] = None,
+        seed: int = 0,
+    ):
+        """Creates substitution solver.
+
+        Parameters
+        ----------
+        language_model : Optional[QuadgramModel]
+            model to score candidate plain texts with, by default English quadgrams
+        num_restarts : int
+            number of hill climbing runs from random keys
+        num_workers : Optional[int]
+            number of worker processes to run restarts in (None for the number of CPUs), restarts
+            run in this process if one
+        stop_score : Optional[float]
+            mean quadgram score at which a key is accepted without waiting for remaining restarts,
+            by default slightly below the model's plain text score
+        seed : int
+            seed of first restart, restarts use consecutive seeds
+        """
+        if num_restarts < 1:
+            raise ValueError(f'num_restarts must be positive, got {num_restarts}.')
+
+        self._language_model = language_model or QuadgramModel.load()
+        self._num_restarts = num_restarts
+        self._num_workers = num_workers or os.cpu_count() or 1
+        self._stop_score = (
+            stop_score if stop_score is not None else 1.1 * self._language_model.plain_text_score
+        )
+        self._seed = seed
+        self.key: Optional[Dict[str, str]] = None
+
+        # pool restarts run in, started on first use and kept for later cipher texts
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+
+    def close(self):
+        """Shuts down the worker processes restarts run in, if they were started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def solve(self, letters: np.ndarray) -> SolverResult:
+        """Finds best scoring key for cipher text letters.
+
+        Parameters
+        ----------
+        letters : np.ndarray
+            alphabet indices of cipher text letters
+
+        Returns
+        -------
+        SolverResult
+            best key found (plain letter of each cipher letter) and its score
+        """
+        if len(letters) < 4:
+            return SolverResult(np.arange(NUM_LETTERS), 0.0)
+
+        stop_score = self._stop_score * (len(letters) - 3)
+        seeds = range(self._seed, self._seed + self._num_restarts)
+
+        best: Optional[SolverResult] = None
+        if self._num_workers == 1:
+            for seed in seeds:
+                result = _hill_climb(letters, self._language_model, seed)
+                best = result if best is None or result.score > best.score else best
+                if best.score >= stop_score:
+                    break
+        else:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self._num_workers,
+                    initializer=_init_worker,
+                    initargs=(self._language_model,),
+                )
+
+            futures = [
+                self._executor.submit(_hill_climb_in_worker, letters, seed) for seed in seeds
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                best = result if best is None or result.score > best.score else best
+                if best.score >= stop_score:
+                    # stop early, skipping restarts that haven't started yet
+                    for pending_future in futures:
+                        pending_future.cancel()
+                    break
+
+        assert best is not None
+        return best
+
+    def run(self, pos_char_set: PositionalCharacterSet) -> PositionalCharacterSet:
+        """Finds the best scoring key and deciphers character set with it.
+
+        The key found is stored in the key attribute, mapping cipher letters to plain letters.
+
+        Parameters
+        ----------
+        pos_char_set : PositionalCharacterSet
+            enciphered character set
+
+        Returns
+        -------
+        PositionalCharacterSet
+            deciphered character set
+        """
+        if not isinstance(pos_char_set, PositionalCharacterSet):
+            pos_char_set = PositionalCharacterSet.from_characters(pos_char_set)
+
+        result = self.solve(letter_indices(pos_char_set.codepoints))
+        cipher = SubstitutionCipher(
+            alphabet_mapping(''.join(string.ascii_lowercase[plain] for plain in result.key)),
+        )
+        self.key = {
+            cipher_letter: plain_letter
+            for cipher_letter, plain_letter in cipher.mapping.items() if cipher_letter.islower()
+        }
+
+        return cipher.run(pos_char_set)
@@ -0,0 +1,318 @@
+"""Defines a streaming image pipeline, overlapping its stages across images with threads."""
+import dataclasses
+import pathlib
+import queue
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generator
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from PIL import Image
+
+from .pipeline import ImagePipeline
+from .pipeline import PipelineResult
+from .pipeline import iter_frames
+
+
+# names of the streaming pipeline stages, in order
+STAGES = ('decode', 'ocr', 'encipher', 'reconstruct', 'output')
+
+# seconds between checks of whether the pipeline was stopped, while blocked
+_POLL_INTERVAL = 0.1
+
+# marks that a stage will receive no more work items
+_DONE = object()
+
+
+@dataclasses.dataclass
+class _WorkItem:
+    """Frame of an image file moving through the stages of a streaming pipeline."""
+    index: int
+    img_path: Optional[pathlib.Path]
+    start: float
+    frame: int = 0
+    source: Optional[pathlib.Path] = None
+    image: Optional[Image.Image] = None
+    char_set: Any = None
+    enciphered_char_set: Any = None
+    reconstructed_image: Any = None
+    error: Optional[BaseException] = None
+
+
+class StreamingImagePipeline:
+    """Runs an image pipeline over many images, with each stage in its own worker threads.
+
+    Stages are connected by bounded queues, so while one image is being reconstructed and saved,
+    the next ones are being decoded and read. The number of images in the pipeline at once is
+    bounded, which applies backpressure to decoding when later stages fall behind.
+
+    Stage objects are shared by the threads of a stage, so a stage given more than one worker must
+    be thread-safe.
+    """
+
+    def __init__(
+        self,
+        pipeline: ImagePipeline,
+        stage_workers: Optional[Dict[str, int]] = None,
+        queue_size: int = 2,
+        max_in_flight: Optional[int] = None,
+        ordered: bool = True,
+    ):
+        """Creates streaming pipeline runner.
+
+        Parameters
+        ----------
+        pipeline : ImagePipeline
+            pipeline whose stages to run
+        stage_workers : Optional[Dict[str, int]]
+            number of worker threads of each stage (decode, ocr, encipher, reconstruct, and output),
+            by default one per stage
+        queue_size : int
+            maximum number of images waiting between two stages
+        max_in_flight : Optional[int]
+            maximum number of images decoded but not yet consumed, by default enough to keep every
+            worker and queue busy
+        ordered : bool
+            whether to yield results in input order (otherwise, as they complete)
+        """
+        stage_workers = stage_workers or {}
+        unknown_stages = set(stage_workers) - set(STAGES)
+        if unknown_stages:
+            raise ValueError(
+                f'Unknown pipeline stages {sorted(unknown_stages)}, expected any of {STAGES}.',
+            )
+
+        self._pipeline = pipeline
+        self._stage_workers = {stage: stage_workers.get(stage, 1) for stage in STAGES}
+        self._queue_size = queue_size
+        self._max_in_flight = max_in_flight or (
+            sum(self._stage_workers.values()) + queue_size * len(STAGES)
+        )
+        self._ordered = ordered
+
+        if min(self._stage_workers.values()) < 1 or queue_size < 1 or self._max_in_flight < 1:
+            raise ValueError(
+                'Stage workers, queue size and max_in_flight must be positive, got '
+                f'{self._stage_workers}, {queue_size} and {self._max_in_flight}.',
+            )
+
+    def run_many(
+        self, img_paths: Iterable[pathlib.Path],
+    ) -> Generator[PipelineResult, None, None]:
+        """Runs pipeline on every frame of many image files, overlapping stages across frames.
+
+        Parameters
+        ----------
+        img_paths : Iterable[pathlib.Path]
+            paths of images to run pipeline with, consumed lazily as work completes
+
+        Yields
+        ------
+        PipelineResult
+            result of running pipeline on each frame of each image, in input order if ordered is
+            set
+        """
+        stop = threading.Event()
+        in_flight = threading.Semaphore(self._max_in_flight)
+
+        # one queue in front of each stage, and one for finished images
+        queues: List[queue.Queue] = [queue.Queue(self._queue_size) for _ in STAGES]
+        queues.append(queue.Queue())
+
+        threads = [threading.Thread(
+            target=self._feed, args=(img_paths, queues[0], in_flight, stop), daemon=True,
+        )]
+        remaining_workers = list(self._stage_workers.values())
+        lock = threading.Lock()
+        for stage_index, stage in enumerate(STAGES):
+            threads.extend(
+                threading.Thread(
+                    target=self._run_stage,
+                    args=(stage_index, queues, remaining_workers, lock, stop),
+                    name=f'pipeline-{stage}-{worker_index}',
+                    daemon=True,
+                )
+                for worker_index in range(self._stage_workers[stage])
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            for item in self._collect(queues[-1]):
+                in_flight.release()
+                if item.error is not None:
+                    raise item.error
+
+                yield PipelineResult(
+                    source=item.source,
+                    enciphered_char_set=item.enciphered_char_set,
+                    reconstructed_image=item.reconstructed_image,
+                    elapsed=time.perf_counter() - item.start,
+                )
+        finally:
+            # let workers skip remaining images, and drain finished ones so no worker stays blocked
+            stop.set()
+            for item in iter(queues[-1].get, _DONE):
+                pass
+            for thread in threads:
+                thread.join()
+
+    def _feed(
+        self,
+        img_paths: Iterable[pathlib.Path],
+        first_queue: queue.Queue,
+        in_flight: threading.Semaphore,
+        stop: threading.Event,
+    ):
+        """Feeds frames of image files into the first stage, while fewer than max_in_flight are
+        in flight.
+
+        Parameters
+        ----------
+        img_paths : Iterable[pathlib.Path]
+            paths of images to run pipeline with
+        first_queue : queue.Queue
+            queue in front of the first stage
+        in_flight : threading.Semaphore
+            semaphore counting images that can still be fed
+        stop : threading.Event
+            set when the consumer stops early or fails
+        """
+        num_fed = 0
+        try:
+            for img_path, frame in iter_frames(img_paths):
+                while not in_flight.acquire(timeout=_POLL_INTERVAL):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+
+                first_queue.put(
+                    _WorkItem(num_fed, img_path, time.perf_counter(), frame=frame),
+                )
+                num_fed += 1
+        except Exception as e:
+            # pass failure to list (or count frames of) images on to the consumer, after the images
+            # before it
+            first_queue.put(_WorkItem(num_fed, None, time.perf_counter(), error=e))
+        finally:
+            for _ in range(self._stage_workers[STAGES[0]]):
+                first_queue.put(_DONE)
+
+    def _run_stage(
+        self,
+        stage_index: int,
+        queues: List[queue.Queue],
+        remaining_workers: List[int],
+        lock: threading.Lock,
+        stop: threading.Event,
+    ):
+        """Runs a stage on work items until its input is exhausted.
+
+        Items that already failed, or arrive after the pipeline was stopped, are passed on without
+        being processed. The last worker of a stage to finish tells the next stage it is done.
+
+        Parameters
+        ----------
+        stage_index : int
+            index of stage to run
+        queues : List[queue.Queue]
+            queues in front of every stage, followed by the queue of finished items
+        remaining_workers : List[int]
+            number of workers of each stage still running
+        lock : threading.Lock
+            lock guarding remaining_workers
+        stop : threading.Event
+            set when the consumer stops early or fails
+        """
+        run_step = self._steps()[stage_index]
+        in_queue, out_queue = queues[stage_index], queues[stage_index + 1]
+
+        for item in iter(in_queue.get, _DONE):
+            if item.error is None and not stop.is_set():
+                try:
+                    run_step(item)
+                except Exception as e:
+                    item.error = e
+            out_queue.put(item)
+
+        with lock:
+            remaining_workers[stage_index] -= 1
+            last_worker = remaining_workers[stage_index] == 0
+        if last_worker:
+            is_last_stage = stage_index == len(STAGES) - 1
+            for _ in range(1 if is_last_stage else self._stage_workers[STAGES[stage_index + 1]]):
+                out_queue.put(_DONE)
+
+    def _collect(self, results_queue: queue.Queue) -> Iterator[_WorkItem]:
+        """Takes finished items from the results queue, reordering them if ordered is set.
+
+        Parameters
+        ----------
+        results_queue : queue.Queue
+            queue of finished items
+
+        Yields
+        ------
+        _WorkItem
+            finished items, in input order if ordered is set
+        """
+        pending: Dict[int, _WorkItem] = {}
+        next_index = 0
+        for item in iter(results_queue.get, _DONE):
+            if not self._ordered:
+                yield item
+                continue
+
+            pending[item.index] = item
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+
+        # put back end marker, for the drain on shutdown
+        results_queue.put(_DONE)
+
+    def _steps(self) -> Tuple[Callable[[_WorkItem], None], ...]:
+        """Gets the step each stage runs on a work item, in stage order."""
+        pipeline = self._pipeline
+
+        def decode(item: _WorkItem):
+            assert item.img_path is not None
+            item.image, item.source = pipeline.read_frame(item.img_path, item.frame)
+
+        def ocr(item: _WorkItem):
+            assert item.image is not None
+            item.char_set = pipeline.ocr.run(item.image)
+
+            # release input image early if it isn't reconstructed
+            if not pipeline.reconstructs:
+                item.image = None
+
+        def encipher(item: _WorkItem):
+            item.enciphered_char_set = pipeline.encipherer.run(item.char_set)
+
+        def reconstruct(item: _WorkItem):
+            if pipeline.reconstructs:
+                assert item.image is not None
+                item.reconstructed_image = pipeline.reconstructor.run(
+                    item.enciphered_char_set, item.image, input_char_set=item.char_set,
+                )
+
+        def output(item: _WorkItem):
+            for output_head in pipeline.outputs:
+                output_head.run(
+                    item.reconstructed_image, item.enciphered_char_set, source=item.source,
+                    input_char_set=item.char_set,
+                )
+
+            # release input image, only the result is kept
+            item.image = None
+
+        return decode, ocr, encipher, reconstruct, output
@@ -0,0 +1,207 @@
+"""Defines an OCR stage that reads large images in overlapping tiles, in parallel."""
+import concurrent.futures
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+from .data_formats import PositionalCharacterSet
+from .ocr import OCR
+from .ocr_cache import OCRCache
+
+
+class Tile(NamedTuple):
+    """Region of an image read as one OCR call, and the part of it whose characters are kept.
+
+    Both are given as left, upper, right, and lower pixel coordinates. Cores of all tiles of an
+    image partition it.
+    """
+    box: Tuple[int, int, int, int]
+    core: Tuple[int, int, int, int]
+
+
+def _split_axis(length: int, tile_size: int, overlap: int) -> Iterator[Tuple[int, int, int, int]]:
+    """Splits an image axis into overlapping tile spans.
+
+    Parameters
+    ----------
+    length : int
+        length of axis
+    tile_size : int
+        maximum length of a tile's core
+    overlap : int
+        length each tile extends past its core into its neighbours
+
+    Yields
+    ------
+    Tuple[int, int, int, int]
+        start and end of each tile, then start and end of its core
+    """
+    num_tiles = max(1, -(-length // tile_size))
+    bounds = np.linspace(0, length, num_tiles + 1).round().astype(int).tolist()
+    for core_start, core_end in zip(bounds[:-1], bounds[1:]):
+        yield max(0, core_start - overlap), min(length, core_end + overlap), core_start, core_end
+
+
+class TiledOCR(OCR):
+    """OCR stage that splits an image into overlapping tiles and reads them in parallel.
+
+    Each character is kept by the tile whose core contains the center of its bounding box, so
+    characters read twice in overlapping regions are only kept once. Characters are ordered tile by
+    tile, in rows from the top of the image.
+
+    Tiles are read by the same threads for every image, so per-thread resources of the OCR stage
+    reading tiles (such as in-process OCR engines) are reused until close is called. Threads aren't
+    pickled, so a copy of this stage sent to a worker process starts its own.
+    """
+
+    def __init__(
+        self,
+        ocr: Optional[OCR] = None,
+        tile_size: int = 1024,
+        overlap: int = 64,
+        num_workers: Optional[int] = None,
+        cache: Optional[OCRCache] = None,
+    ):
+        """Creates tiled OCR stage.
+
+        Parameters
+        ----------
+        ocr : Optional[OCR]
+            OCR stage to read each tile with, by default pytesseract
+        tile_size : int
+            maximum width and height of the region owned by a tile
+        overlap : int
+            number of pixels each tile extends past its region, should be larger than characters
+        num_workers : Optional[int]
+            number of threads reading tiles, by default chosen by ThreadPoolExecutor
+        cache : Optional[OCRCache]
+            cache of (whole image) OCR results
+        """
+        super().__init__(cache=cache)
+        self._ocr = ocr or OCR()
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.num_workers = num_workers
+
+        if tile_size < 1 or overlap < 0:
+            raise ValueError(f'Invalid tiling, tile size {tile_size} with overlap {overlap}.')
+
+        self._init_executor()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['_executor']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._init_executor()
+
+    def cache_config(self) -> Tuple[str, ...]:
+        """Gets everything besides the image that OCR results depend on, used in cache keys.
+
+        Returns
+        -------
+        Tuple[str, ...]
+            tiling, followed by the configuration of the OCR stage reading tiles
+        """
+        tiling = (type(self).__name__, str(self.tile_size), str(self.overlap))
+        return tiling + self._ocr.cache_config()
+
+    def close(self):
+        """Stops the threads reading tiles, then closes the OCR stage reading tiles."""
+        self._executor.shutdown()
+        self._ocr.close()
+        self._init_executor()
+
+    def tiles(self, image_size: Tuple[int, int]) -> Iterator[Tile]:
+        """Splits an image into tiles.
+
+        Parameters
+        ----------
+        image_size : Tuple[int, int]
+            width and height of image
+
+        Yields
+        ------
+        Tile
+            tiles covering image, in rows from the top of the image
+        """
+        width, height = image_size
+        rows = list(_split_axis(height, self.tile_size, self.overlap))
+        columns = list(_split_axis(width, self.tile_size, self.overlap))
+        for upper, lower, core_upper, core_lower in rows:
+            for left, right, core_left, core_right in columns:
+                yield Tile(
+                    (left, upper, right, lower), (core_left, core_upper, core_right, core_lower),
+                )
+
+    def _recognize(self, input_image: Image.Image) -> PositionalCharacterSet:
+        """Recognizes characters in every tile of image, mapping them to image coordinates.
+
+        Parameters
+        ----------
+        input_image : Image.Image
+            image to run OCR on
+
+        Returns
+        -------
+        PositionalCharacterSet
+            character set read from image, with positions
+        """
+        tiles = list(self.tiles(input_image.size))
+        if len(tiles) == 1:
+            return self._ocr.run(input_image)
+
+        # decode image once, before tiles are cropped from it concurrently
+        input_image.load()
+        tile_char_sets = self._executor.map(lambda tile: self._read_tile(input_image, tile), tiles)
+        return PositionalCharacterSet.concatenate(tile_char_sets, input_image.size)
+
+    def _init_executor(self):
+        """Creates the pool of threads reading tiles, which start once tiles are read."""
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.num_workers, thread_name_prefix='tiled_ocr',
+        )
+
+    def _read_tile(self, input_image: Image.Image, tile: Tile) -> PositionalCharacterSet:
+        """Recognizes characters in tile, keeping those owned by the tile.
+
+        Parameters
+        ----------
+        input_image : Image.Image
+            image to run OCR on
+        tile : Tile
+            tile of image to read
+
+        Returns
+        -------
+        PositionalCharacterSet
+            characters owned by tile, with positions in image coordinates
+        """
+        left, _, _, lower = tile.box
+        char_set = self._ocr.run(input_image.crop(tile.box))
+
+        # move boxes from tile to image coordinates, tops are measured from the bottom edge
+        char_set = PositionalCharacterSet(
+            char_set.codepoints,
+            char_set.left + left,
+            char_set.top + (input_image.height - lower),
+            char_set.width,
+            char_set.height,
+            *input_image.size,
+        )
+
+        # keep characters centered in the tile's core
+        core_left, core_upper, core_right, core_lower = tile.core
+        center_x = char_set.left + char_set.width / 2
+        center_y = input_image.height - (char_set.top - char_set.height / 2)
+        owned = (
+            (center_x >= core_left) & (center_x < core_right)
+            & (center_y >= core_upper) & (center_y < core_lower)
+        )
+        return char_set[owned]
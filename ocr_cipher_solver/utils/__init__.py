@@ -1,2 +1,5 @@
+from .color_utils import get_fg_bg_colors_from_img
 from .color_utils import get_fg_bg_colors_from_img_section
 from .conversion_utils import convert_to_pos_char_set
+from .file_utils import find_images
+from .image_buffer import ImageBuffer
@@ -1,85 +1,136 @@
-import collections
-from typing import DefaultDict
-from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 import numpy as np
 from PIL import Image
-from PIL import ImageChops
-from PIL import ImageFilter
-from PIL import ImageOps
 
 from ocr_cipher_solver.data_formats import BoundingBox
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
 from ocr_cipher_solver.data_formats import RGBA
+from ocr_cipher_solver.utils.image_buffer import image_pixels
 
 
-def _downsample_rgba(color: RGBA, downsample_fac: int) -> RGBA:
-    """Downsamples color.
+def _pack_rgba(pixels: np.ndarray) -> np.ndarray:
+    """Packs RGB or RGBA pixels into single uint32 keys.
 
     Parameters
     ----------
-    color : RGBA
-        color to downsample
-    downsample_fac : int
-        factor to downsample color by
+    pixels : np.ndarray
+        array of RGB or RGBA pixels, with channels along the last axis (RGB pixels are opaque)
+
+    Returns
+    -------
+    np.ndarray
+        uint32 array of packed colors, with the channel axis removed
+    """
+    pixels = pixels.astype(np.uint32)
+    alpha = pixels[..., 3] if pixels.shape[-1] == 4 else np.uint32(255)
+    return (pixels[..., 0] << 24) | (pixels[..., 1] << 16) | (pixels[..., 2] << 8) | alpha
+
+
+def _unpack_rgba(colors: np.ndarray) -> np.ndarray:
+    """Unpacks uint32 color keys into RGBA pixels.
+
+    Parameters
+    ----------
+    colors : np.ndarray
+        uint32 array of packed colors
+
+    Returns
+    -------
+    np.ndarray
+        array of RGBA pixels, with channels along a new last axis
+    """
+    return np.stack([(colors >> shift) & 0xFF for shift in (24, 16, 8, 0)], axis=-1)
+
+
+def _to_rgba(color: np.uint32) -> RGBA:
+    """Converts packed color key to RGBA tuple.
+
+    Parameters
+    ----------
+    color : np.uint32
+        packed color
 
     Returns
     -------
     RGBA
-        downsampled color tuple
+        color tuple
     """
-    return (
-        (color[0] // downsample_fac) * downsample_fac,
-        (color[1] // downsample_fac) * downsample_fac,
-        (color[2] // downsample_fac) * downsample_fac,
-        (color[3] // downsample_fac) * downsample_fac,
-    )
+    r, g, b, a = (int(channel) for channel in _unpack_rgba(np.asarray(color, dtype=np.uint32)))
+    return r, g, b, a
 
 
-def _downsample_colors(colors: List[Tuple[int, RGBA]], downsample_fac: int) -> Dict[RGBA, int]:
+def _downsample_rgba(colors: np.ndarray, downsample_fac: int) -> np.ndarray:
+    """Downsamples packed colors.
+
+    Parameters
+    ----------
+    colors : np.ndarray
+        uint32 array of packed colors to downsample
+    downsample_fac : int
+        factor to downsample colors by
+
+    Returns
+    -------
+    np.ndarray
+        uint32 array of packed downsampled colors
+    """
+    return _pack_rgba((_unpack_rgba(colors) // downsample_fac) * downsample_fac)
+
+
+def _downsample_colors(
+    colors: np.ndarray, counts: np.ndarray, downsample_fac: int,
+) -> Tuple[np.ndarray, np.ndarray]:
     """Downsamples colors to smooth color spectrum
 
     Parameters
     ----------
-    colors : List[Tuple[int, RGBA]]
-        list of colors in image, with their number of instances
+    colors : np.ndarray
+        packed colors in image, in order of first appearance
+    counts : np.ndarray
+        number of instances of each color
     downsample_fac : int
         factor to downsample colors by
 
     Returns
     -------
-    Dict[RGBA, int]
-        dictionary of downsampled colors and their number of occurrences
+    Tuple[np.ndarray, np.ndarray]
+        downsampled colors and their number of occurrences, most common first (ties broken by
+        order of first appearance)
     """
-    # downsample colors
-    downsampled_colors = [
-        (num_occurs, _downsample_rgba(color, downsample_fac))
-        for num_occurs, color in colors
-    ]
+    # downsample colors and sum occurrences of each downsampled color
+    downsampled_colors, first_index, inverse = np.unique(
+        _downsample_rgba(colors, downsample_fac), return_index=True, return_inverse=True,
+    )
+    downsampled_counts = np.bincount(
+        inverse.ravel(), weights=counts, minlength=len(downsampled_colors),
+    )
 
-    # create histogram dictionary
-    color_hist: DefaultDict[RGBA, int] = collections.defaultdict(int)
-    for num_occurs, color in downsampled_colors:
-        color_hist[color] += num_occurs
+    # order by first appearance, then (stably) by number of occurrences
+    order = np.argsort(first_index)
+    order = order[np.argsort(-downsampled_counts[order], kind='stable')]
 
-    # return histogram dict
-    return dict(sorted(color_hist.items(), key=lambda x: x[1], reverse=True))
+    return downsampled_colors[order], downsampled_counts[order]
 
 
 def _get_original_color(
-    downsampled_color: RGBA,
-    original_colors: List[Tuple[int, RGBA]],
+    downsampled_color: np.uint32,
+    original_colors: np.ndarray,
+    original_counts: np.ndarray,
     downsample_fac: int,
 ) -> RGBA:
     """Gets original color with most occurrences that maps into downsampled color.
 
     Parameters
     ----------
-    downsampled_color : RGBA
-        downsampled color to find mappings to
-    original_colors : List[Tuple[int, RGBA]]
-        original (non-downsampled) colors from image and their occurrences
+    downsampled_color : np.uint32
+        packed downsampled color to find mappings to
+    original_colors : np.ndarray
+        original (non-downsampled) packed colors from image, in order of first appearance
+    original_counts : np.ndarray
+        number of occurrences of each original color
     downsample_fac : int
         factor to downsample colors by (to check mappings)
 
@@ -88,91 +139,89 @@ def _get_original_color(
     RGBA
         original color that maps into downsampled color
     """
-    # filter original colors to only ones that map into downsampled color
-    matching_colors = [
-        (num_occurrences, color)
-        for num_occurrences, color in original_colors
-        if _downsample_rgba(color, downsample_fac) == downsampled_color
-    ]
+    # mask out original colors that don't map into downsampled color
+    matches = _downsample_rgba(original_colors, downsample_fac) == downsampled_color
 
     # get and return highest occurring original color maching the downsampled color
-    return max(matching_colors, key=lambda x: x[0])[1]
+    return _to_rgba(original_colors[np.argmax(np.where(matches, original_counts, -1))])
 
 
-def _invert_mask(mask: Image.Image) -> Image.Image:
-    """Inverts mask.
+def _get_text_mask(img: Image.Image) -> Image.Image:
+    """Gets mask of pixels colors are tallied from (currently every pixel of the image).
 
     Parameters
     ----------
-    mask : Image.Image
-        mask to invert
+    img : Image.Image
+        image to get text mask for
 
     Returns
     -------
     Image.Image
-        inverted image mask
+        text mask of image
     """
-    return ImageOps.invert(mask.convert('L')).convert('1')
+    return Image.new('1', (img.width, img.height), color=1)
 
 
-def _get_text_mask(img: Image.Image, kernel_size_fac: float, pixel_thresh: int) -> Image.Image:
-    """Gets text mask using high-pass filter.
+def _get_colors(
+    img: np.ndarray, mask: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Gets colors from masked image.
 
     Parameters
     ----------
-    img : Image.Image
-        image to get text mask for
-    kernel_size_fac : float
-        factor of the size of the smallest dimension of the image to use for Gaussian kernel
-    pixel_thresh : int
-        pixel lut threshold to include in text mask (lower -> more sensitive)
+    img : np.ndarray
+        packed colors of image to get colors from
+    mask : Optional[np.ndarray]
+        mask to apply to image when getting colors, by default all pixels are counted
 
     Returns
     -------
-    Image.Image
-        text mask constructed from image
+    Tuple[np.ndarray, np.ndarray]
+        packed colors in image, in order of first appearance, and their number of masked pixels
     """
-    # find kernel size (factor of the size of the smallest dimension of the image)
-    kernel_size = max(int(kernel_size_fac * min(img.width, img.height)), 1)
-
-    # get difference between image and smoothed image
-    raw_diff = ImageChops.difference(
-        img, img.filter(ImageFilter.GaussianBlur(radius=kernel_size)),
+    # tally packed colors, counting only masked pixels
+    colors, first_index, inverse, counts = np.unique(
+        img.ravel(), return_index=True, return_inverse=True, return_counts=True,
     )
+    if mask is not None:
+        counts = np.bincount(inverse.ravel(), weights=mask.ravel(), minlength=len(colors))
 
-    # threshold, convert to binary, and return image
-#    return raw_diff.convert('L').point(lambda p: p > pixel_thresh and 256, mode='1')
-    return Image.new('1', (img.width, img.height), color=1)
+    # order colors by first appearance
+    order = np.argsort(first_index)
+    return colors[order], counts[order]
 
 
-def _get_colors(img: Image.Image, mask: Image.Image) -> List[Tuple[int, RGBA]]:
-    """Gets colors from masked image.
+def _get_fg_bg_colors(
+    colors: np.ndarray, counts: np.ndarray, downsample_fac: int,
+) -> Tuple[RGBA, RGBA]:
+    """Gets foreground (text) and background colors from color histogram.
 
     Parameters
     ----------
-    img : Image.Image
-        image to get colors from
-    mask : Image.Image
-        mask to apply to image when getting colors
+    colors : np.ndarray
+        packed colors in image section, in order of first appearance
+    counts : np.ndarray
+        number of occurrences of each color
+    downsample_fac : int
+        factor to downsample colors by (smooths colors)
 
     Returns
     -------
-    List[Tuple[int, RGBA]]
-        list of colors in masked image
+    Tuple[RGBA, RGBA]
+        tuple of RGBA values for text color, background color
     """
-    # init colors dict
-    colors: DefaultDict[RGBA, int] = collections.defaultdict(int)
+    # downsample pixel values and get histogram
+    downsampled_colors, _ = _downsample_colors(colors, counts, downsample_fac)
 
-    # iterate over pixels in image and tally colors
-    for img_row, mask_row in zip(np.asarray(img), np.asarray(mask)):
-        for img_pixel, mask_pixel in zip(img_row, mask_row):
-            colors[tuple(img_pixel)] += int(mask_pixel)
+    # pick the most common colors for fg, bg (same color for both if section is a single color)
+    bg = downsampled_colors[0]
+    fg = downsampled_colors[1] if len(downsampled_colors) > 1 else bg
 
-    # convert colors dict to list of tuples and return
-    return [
-        (freq, color)
-        for color, freq in colors.items()
-    ]
+    # map fg and bg back into original colors (most prevalent original color in subset)
+    return (
+        _get_original_color(fg, colors, counts, downsample_fac),
+        _get_original_color(bg, colors, counts, downsample_fac),
+    )
 
 
 def get_fg_bg_colors_from_img_section(
@@ -199,22 +248,122 @@ def get_fg_bg_colors_from_img_section(
     cropped_img: Image.Image = img.crop(
         (left, img.height - top, right, img.height - bottom),
     ).convert('RGBA')
+    if cropped_img.width == 0 or cropped_img.height == 0:
+        raise ValueError(f'Cannot get colors from empty bounding box {bounding_box}.')
 
     # get foreground and background masked images
-    text_mask: Image.Image = _get_text_mask(cropped_img, kernel_size_fac=0.05, pixel_thresh=32)
+    text_mask: Image.Image = _get_text_mask(cropped_img)
 
     # get colors for foreground, background masked images
-    colors: List[Tuple[int, RGBA]] = _get_colors(cropped_img, text_mask)
+    colors, counts = _get_colors(_pack_rgba(np.asarray(cropped_img)), np.asarray(text_mask))
 
-    # downsample pixel values and get histogram
-    downsampled_colors = _downsample_colors(colors, downsample_fac)
+    return _get_fg_bg_colors(colors, counts, downsample_fac)
 
-    # pick the most common colors for fg, bg
-    print(downsampled_colors)
-    bg, fg, *_ = downsampled_colors.keys()
 
-    # map fg and bg back into original colors (most prevalent original color in subset)
-    return (
-        _get_original_color(fg, colors, downsample_fac),
-        _get_original_color(bg, colors, downsample_fac),
+def _group_starts(groups: np.ndarray) -> np.ndarray:
+    """Finds where each group starts in an array of sorted group labels.
+
+    Parameters
+    ----------
+    groups : np.ndarray
+        sorted group labels
+
+    Returns
+    -------
+    np.ndarray
+        index of first entry of each group
+    """
+    return np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+
+
+def get_fg_bg_colors_from_img(
+    img: Image.Image,
+    char_set: PositionalCharacterSet,
+    default_colors: Tuple[RGBA, RGBA],
+    downsample_fac: int = 96,
+) -> List[Tuple[RGBA, RGBA]]:
+    """Gets foreground (text) and background colors for every character of an image at once.
+
+    The image is converted to packed colors once, and the pixels of every bounding box are labelled
+    with their character and tallied together, giving the same colors as
+    get_fg_bg_colors_from_img_section for bounding boxes inside the image.
+
+    Parameters
+    ----------
+    img : Image.Image
+        image to get colors from
+    char_set : PositionalCharacterSet
+        characters whose bounding boxes to look for colors within
+    default_colors : Tuple[RGBA, RGBA]
+        text and background colors to use for bounding boxes with no pixels inside the image
+    downsample_fac : int
+        factor to downsample colors by (smooths colors)
+
+    Returns
+    -------
+    List[Tuple[RGBA, RGBA]]
+        tuple of RGBA values for text color, background color, for each character
+    """
+    # get pixels without copying them where possible (colors are packed per section below)
+    pixels = image_pixels(img if img.mode in ('RGB', 'RGBA') else img.convert('RGBA'))
+
+    # get sections in array coordinates (bounding boxes have bottom left origin), clipped to image
+    left, top = char_set.left.astype(np.int64), char_set.top.astype(np.int64)
+    x0 = np.clip(left, 0, img.width)
+    x1 = np.clip(left + char_set.width, x0, img.width)
+    y0 = np.clip(img.height - top, 0, img.height)
+    y1 = np.clip(img.height - (top - char_set.height), y0, img.height)
+    areas = (x1 - x0) * (y1 - y0)
+
+    colors = [default_colors] * len(char_set)
+    if not areas.any():
+        return colors
+
+    # gather pixels of every section in raster order, labelled with their section
+    labels = np.repeat(np.arange(len(char_set), dtype=np.uint64), areas)
+    offsets = np.arange(areas.sum()) - np.repeat(np.cumsum(areas) - areas, areas)
+    widths = np.repeat(x1 - x0, areas)
+    section_pixels = _pack_rgba(pixels[
+        np.repeat(y0, areas) + offsets // widths, np.repeat(x0, areas) + offsets % widths,
+    ])
+
+    # tally colors of each section (every pixel counts, as in _get_text_mask)
+    section_colors, first_index, counts = np.unique(
+        (labels << np.uint64(32)) | section_pixels, return_index=True, return_counts=True,
     )
+    color_labels = section_colors >> np.uint64(32)
+    original_colors = (section_colors & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+    # downsample colors and sum occurrences of each downsampled color in each section
+    downsampled_colors, group_index = np.unique(
+        (color_labels << np.uint64(32)) | _downsample_rgba(original_colors, downsample_fac),
+        return_inverse=True,
+    )
+    group_index = group_index.ravel()
+    group_counts = np.bincount(group_index, weights=counts)
+    group_labels = (downsampled_colors >> np.uint64(32)).astype(np.int64)
+
+    # find first appearance of each downsampled color, and its most common original color
+    # (ties broken by first appearance)
+    by_first = np.lexsort((first_index, group_index))
+    group_first_index = first_index[by_first[_group_starts(group_index[by_first])]]
+    by_count = np.lexsort((first_index, -counts, group_index))
+    group_original_colors = original_colors[by_count[_group_starts(group_index[by_count])]]
+
+    # rank downsampled colors in each section, most common first (ties broken by first appearance)
+    ranked = np.lexsort((group_first_index, -group_counts, group_labels))
+    starts = _group_starts(group_labels[ranked])
+    bg_groups = ranked[starts]
+    next_groups = ranked[np.minimum(starts + 1, len(ranked) - 1)]
+
+    # pick the most common colors for fg, bg (same color for both if section is a single color)
+    fg_groups = np.where(
+        group_labels[next_groups] == group_labels[bg_groups], next_groups, bg_groups,
+    )
+
+    # map fg and bg back into original colors
+    fg_colors, bg_colors = group_original_colors[fg_groups], group_original_colors[bg_groups]
+    for label, fg, bg in zip(group_labels[bg_groups], fg_colors, bg_colors):
+        colors[label] = (_to_rgba(fg), _to_rgba(bg))
+
+    return colors
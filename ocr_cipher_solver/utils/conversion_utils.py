@@ -3,7 +3,6 @@ from typing import Dict
 from typing import List
 from typing import Tuple
 
-from ocr_cipher_solver.data_formats import PositionalCharacter
 from ocr_cipher_solver.data_formats import PositionalCharacterSet
 
 
@@ -20,9 +19,4 @@ def convert_to_pos_char_set(chars: Dict[str, List[Any]], image_shape: Tuple[int,
     PositionalCharacterSet
         converted positional character set
     """
-    return [
-        PositionalCharacter.from_tesseract_char(*tess_char, image_shape)
-        for tess_char in zip(
-            chars['char'], chars['left'], chars['bottom'], chars['right'], chars['top'],
-        )
-    ]
+    return PositionalCharacterSet.from_tesseract_chars(chars, image_shape)
@@ -0,0 +1,31 @@
+import pathlib
+from typing import Iterator
+from typing import Tuple
+
+IMAGE_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tif', '.tiff', '.gif', '.pgm', '.ppm', '.pnm',
+)
+
+
+def find_images(
+    img_dir: pathlib.Path, exclude: Tuple[str, ...] = ('_enciphered', '_solved'),
+) -> Iterator[pathlib.Path]:
+    """Finds image files in directory, skipping previously generated outputs.
+
+    Parameters
+    ----------
+    img_dir : pathlib.Path
+        directory to search for images
+    exclude : Tuple[str, ...]
+        skip files whose name contains any of these strings
+
+    Yields
+    ------
+    pathlib.Path
+        path of each image file, in sorted order
+    """
+    for img_path in sorted(img_dir.iterdir()):
+        if img_path.suffix.lower() in IMAGE_EXTENSIONS and not any(
+            pattern in img_path.name for pattern in exclude
+        ):
+            yield img_path
@@ -1,27 +1,199 @@
 import functools
+import pathlib
+import string
+from typing import Dict
+from typing import Iterable
+from typing import Optional
 
+import numpy as np
 from PIL import ImageFont
 
-from ocr_cipher_solver.data_formats import BoundingBox
 
+FONT_PATH = '/usr/share/fonts/truetype/freefont/FreeMono.ttf'
+MAX_FONT_SIZE = 127
 
-@functools.lru_cache(maxsize=256)
-def _char_width(font: ImageFont.FreeTypeFont, char: str) -> float:
-    """Finds character width (in pixels) for a given font.
+
+@functools.lru_cache(maxsize=None)
+def get_font(font_size: int, font_path: str = FONT_PATH) -> ImageFont.FreeTypeFont:
+    """Gets font of given size, loading it from disk only once per size.
 
     Parameters
     ----------
-    font : ImageFont.FreeTypeFont
-        font to find avg char width for
-    char : str
-        character to use
+    font_size : int
+        size of font
+    font_path : str
+        path of TrueType font file
 
     Returns
     -------
-    float
-        character width in pixels
+    ImageFont.FreeTypeFont
+        shared font object
     """
-    return font.getsize(char)[0]
+    return ImageFont.truetype(font_path, font_size)
+
+
+class FontMetrics:
+    """Table of character widths (in pixels) per font size, used to fit fonts to bounding boxes."""
+
+    def __init__(self, font_path: str = FONT_PATH, widths: Optional[Dict[str, np.ndarray]] = None):
+        """Creates font metrics table.
+
+        Parameters
+        ----------
+        font_path : str
+            path of TrueType font file
+        widths : Optional[Dict[str, np.ndarray]]
+            precomputed character widths for font sizes 2 to MAX_FONT_SIZE, rows for other
+            characters are computed on first use
+        """
+        self.font_path = font_path
+        self._widths: Dict[str, np.ndarray] = dict(widths or {})
+
+    def char_widths(self, char: str) -> np.ndarray:
+        """Gets widths of character for font sizes 2 to MAX_FONT_SIZE.
+
+        Widths are a running maximum over font sizes, so that they are sorted for bisection.
+
+        Parameters
+        ----------
+        char : str
+            character to get widths for
+
+        Returns
+        -------
+        np.ndarray
+            character widths, indexed by font size - 2
+        """
+        try:
+            return self._widths[char]
+        except KeyError:
+            widths = np.array([
+                get_font(font_size, self.font_path).getsize(char)[0]
+                for font_size in range(2, MAX_FONT_SIZE + 1)
+            ])
+            self._widths[char] = np.maximum.accumulate(widths)
+            return self._widths[char]
+
+    def fit_font_size(self, width: int, char: str) -> int:
+        """Finds largest font size for which character is narrower than width.
+
+        Parameters
+        ----------
+        width : int
+            width of bounding box
+        char : str
+            character to fit
+
+        Returns
+        -------
+        int
+            font size that best fits bounding box width (at least 1)
+        """
+        # number of font sizes (from 2 upwards) that fit is the best font size, minus one
+        return int(np.searchsorted(self.char_widths(char), width, side='left')) + 1
+
+    def warm(self, chars: Iterable[str] = string.printable):
+        """Computes table rows for characters ahead of time.
+
+        Parameters
+        ----------
+        chars : Iterable[str]
+            characters to compute widths for
+        """
+        for char in chars:
+            self.char_widths(char)
+
+    def save(self, path: pathlib.Path):
+        """Saves computed table rows to disk.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            path of .npz file to save table to
+        """
+        chars = sorted(self._widths)
+        np.savez(
+            path,
+            font_path=np.array(self.font_path),
+            chars=np.array([ord(char) for char in chars], dtype=np.uint32),
+            widths=np.array([self._widths[char] for char in chars]).reshape(
+                len(chars), MAX_FONT_SIZE - 1,
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> 'FontMetrics':
+        """Loads table from disk.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            path of .npz file to load table from
+
+        Returns
+        -------
+        FontMetrics
+            loaded font metrics table
+        """
+        with np.load(path, allow_pickle=False) as table:
+            return cls(
+                str(table['font_path']),
+                {chr(char): widths for char, widths in zip(table['chars'], table['widths'])},
+            )
+
+    @classmethod
+    def load_or_build(cls, path: pathlib.Path, font_path: str = FONT_PATH) -> 'FontMetrics':
+        """Loads table from disk, or builds it for printable characters and saves it if missing.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            path of .npz file to load table from or save table to
+        font_path : str
+            path of TrueType font file, used when building table
+
+        Returns
+        -------
+        FontMetrics
+            font metrics table
+        """
+        if path.exists():
+            return cls.load(path)
+
+        metrics = cls(font_path)
+        metrics.warm()
+        metrics.save(path)
+        return metrics
+
+
+_font_metrics: Optional[FontMetrics] = None
+
+
+def get_font_metrics() -> FontMetrics:
+    """Gets font metrics table used for fitting fonts, creating it if needed.
+
+    Returns
+    -------
+    FontMetrics
+        font metrics table for the default font
+    """
+    global _font_metrics
+    if _font_metrics is None:
+        _font_metrics = FontMetrics()
+    return _font_metrics
+
+
+def set_font_metrics(font_metrics: FontMetrics):
+    """Sets font metrics table used for fitting fonts (e.g. one loaded from disk).
+
+    Parameters
+    ----------
+    font_metrics : FontMetrics
+        font metrics table to use
+    """
+    global _font_metrics
+    _font_metrics = font_metrics
+    get_font_from_bounding_box.cache_clear()
 
 
 @functools.lru_cache(maxsize=256)
@@ -41,13 +213,5 @@ def get_font_from_bounding_box(width: int, char: str) -> ImageFont.FreeTypeFont:
         font object created for character
     """
     # find font that best fit bounding box width
-    best_font = ImageFont.truetype('/usr/share/fonts/truetype/freefont/FreeMono.ttf', 1)
-
-    for font_size in range(2, 128):
-        font = ImageFont.truetype('/usr/share/fonts/truetype/freefont/FreeMono.ttf', font_size)
-        if _char_width(font, char) < width:
-            best_font = font
-        else:
-            break
-
-    return best_font
+    font_metrics = get_font_metrics()
+    return get_font(font_metrics.fit_font_size(width, char), font_metrics.font_path)
@@ -0,0 +1,184 @@
+"""Defines image buffers, which decode images once into arrays that stages read without copying."""
+import pathlib
+from typing import List
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+# extensions of binary netpbm files, whose pixels can be memory-mapped
+MAPPED_EXTENSIONS = ('.pgm', '.ppm', '.pnm')
+
+# number of channels of each mode pixels are stored in
+_MODE_CHANNELS = {'L': 1, 'RGB': 3, 'RGBA': 4}
+
+# attribute holding the array behind images created by image buffers (not carried over to
+# copies of the image)
+_ARRAY_ATTRIBUTE = '_image_buffer_array'
+
+
+def _read_netpbm_header(path: pathlib.Path) -> Tuple[str, int, int, int]:
+    """Reads header of binary PGM or PPM file.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        path of netpbm file
+
+    Returns
+    -------
+    Tuple[str, int, int, int]
+        mode, width and height of image, and offset of pixels in file
+    """
+    with path.open('rb') as f:
+        head = f.read(1024)
+
+    # magic number, width, height and maximum value, separated by whitespace (and comments)
+    fields: List[bytes] = []
+    pos = 0
+    while len(fields) < 4:
+        while pos < len(head) and head[pos:pos + 1].isspace():
+            pos += 1
+        if head[pos:pos + 1] == b'#':
+            pos = head.index(b'\n', pos)
+            continue
+        end = pos
+        while end < len(head) and not head[end:end + 1].isspace():
+            end += 1
+        if end == pos or end == len(head):
+            raise ValueError(f'Invalid netpbm header in {path}.')
+        fields.append(head[pos:end])
+        pos = end
+
+    magic, width, height, max_value = fields[0], int(fields[1]), int(fields[2]), int(fields[3])
+    if magic not in (b'P5', b'P6') or max_value > 255:
+        raise ValueError(f'{path} is not an 8-bit binary PGM or PPM file.')
+
+    # a single whitespace character separates the header from the pixels
+    return ('L' if magic == b'P5' else 'RGB'), width, height, pos + 1
+
+
+class ImageBuffer:
+    """Pixels of a decoded image, held in a NumPy array (possibly memory-mapped from a file).
+
+    Stages get the array through image_pixels without copying it. Images created from the buffer
+    are marked read-only, so Pillow copies them the first time a stage draws on them, and the
+    buffer itself is never modified.
+    """
+
+    def __init__(self, array: np.ndarray):
+        """Creates image buffer.
+
+        Parameters
+        ----------
+        array : np.ndarray
+            uint8 pixels, of shape (height, width) for grayscale images, or (height, width, 3) or
+            (height, width, 4) for RGB and RGBA images
+        """
+        channels = 1 if array.ndim == 2 else array.shape[-1]
+        modes = {channels: mode for mode, channels in _MODE_CHANNELS.items()}
+        if array.dtype != np.uint8 or array.ndim not in (2, 3) or channels not in modes:
+            raise ValueError(
+                f'Image buffers hold uint8 L, RGB or RGBA pixels, got {array.dtype} pixels of '
+                f'shape {array.shape}.',
+            )
+
+        self._array = array
+        self._mode = modes[channels]
+
+    @classmethod
+    def open(cls, path: pathlib.Path) -> 'ImageBuffer':
+        """Opens image file, memory-mapping pixels of binary PGM and PPM files instead of reading.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            path of image file
+
+        Returns
+        -------
+        ImageBuffer
+            buffer of image pixels (of the first frame of multi-frame files)
+        """
+        if path.suffix.lower() not in MAPPED_EXTENSIONS:
+            with Image.open(path) as image:
+                return cls.from_image(image)
+
+        mode, width, height, offset = _read_netpbm_header(path)
+        shape = (height, width) if mode == 'L' else (height, width, _MODE_CHANNELS[mode])
+        return cls(np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=shape))
+
+    @classmethod
+    def from_image(cls, image: Image.Image) -> 'ImageBuffer':
+        """Decodes image into a buffer.
+
+        Parameters
+        ----------
+        image : Image.Image
+            image to decode, converted to RGB unless it is L, RGB or RGBA
+
+        Returns
+        -------
+        ImageBuffer
+            buffer of image pixels
+        """
+        if image.mode not in _MODE_CHANNELS:
+            image = image.convert('RGB')
+        return cls(np.asarray(image))
+
+    @property
+    def array(self) -> np.ndarray:
+        """Pixels of image, not to be modified."""
+        return self._array
+
+    @property
+    def mode(self) -> str:
+        """Mode of image (L, RGB, or RGBA)."""
+        return self._mode
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Width and height of image."""
+        return self._array.shape[1], self._array.shape[0]
+
+    def to_image(self) -> Image.Image:
+        """Creates read-only image of buffer, for stages that need a Pillow image.
+
+        L and RGBA images share the buffer's memory, RGB images are copied once (Pillow stores RGB
+        pixels with a padding byte).
+
+        Returns
+        -------
+        Image.Image
+            image of buffer, whose pixels image_pixels gets without copying until it is modified
+        """
+        if self._mode == 'RGB':
+            image = Image.fromarray(np.ascontiguousarray(self._array), 'RGB')
+            image.readonly = 1
+        else:
+            image = Image.frombuffer(
+                self._mode, self.size, np.ascontiguousarray(self._array), 'raw', self._mode, 0, 1,
+            )
+
+        setattr(image, _ARRAY_ATTRIBUTE, self._array)
+        return image
+
+
+def image_pixels(image: Image.Image) -> np.ndarray:
+    """Gets pixels of image as an array, without copying them if image came from an image buffer.
+
+    Parameters
+    ----------
+    image : Image.Image
+        image to get pixels of
+
+    Returns
+    -------
+    np.ndarray
+        pixels of image, not to be modified
+    """
+    # images are made writable (and copied) by Pillow once they are drawn on
+    array = getattr(image, _ARRAY_ATTRIBUTE, None)
+    if array is not None and image.readonly:
+        return array
+    return np.asarray(image)
@@ -0,0 +1,289 @@
+"""Benchmarks the pipeline on synthetic pages and example images, saving results as JSON.
+
+Synthetic pages are rendered with the reconstructor's font, so their characters and boxes are
+known and OCR can be replaced by ground truth on machines without tesseract.
+"""
+import datetime
+import io
+import json
+import pathlib
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import PIL
+from PIL import Image
+from PIL import ImageDraw
+
+from ocr_cipher_solver.ciphers import CaesarianCipher
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.ocr import OCR
+from ocr_cipher_solver.outputs import PipelineOutput
+from ocr_cipher_solver.pipeline import ImagePipeline
+from ocr_cipher_solver.reconstructor import Reconstructor
+from ocr_cipher_solver.utils import find_images
+from ocr_cipher_solver.utils import font_utils
+
+
+WORDS = (
+    'the of and to in is was that for it with as his on be at by had this not are but from or '
+    'have an they which one you were her all she there would their we him been has when who '
+    'will more no '
+    'if out so said what up its about into than them can only other new some could time these two '
+    'may then do first any my now such like our over man me even most made after also did many '
+    'before must through back years where much your way well down should because each just those '
+    'people how too little state good very make world still own see men work long get here between'
+).split()
+
+DEFAULT_SIZES = ((640, 480), (1654, 2339), (2480, 3508))
+DEFAULT_CHAR_COUNTS = (200, 2000)
+
+# stages faster than this (in seconds) are too noisy to flag as regressions
+MIN_COMPARED_TIME = 1e-3
+
+
+class GroundTruthOCR(OCR):
+    """OCR stage that returns the known characters of synthetic pages, without running tesseract."""
+
+    def __init__(self, char_sets: Dict[Tuple[int, int], PositionalCharacterSet]):
+        super().__init__()
+        self._char_sets = char_sets
+
+    def run(self, input_image: Image.Image) -> PositionalCharacterSet:
+        return self._char_sets[input_image.size]
+
+
+class EncodePNG(PipelineOutput):
+    """Output head that encodes the output image as PNG in memory, without disk I/O."""
+
+    def run(
+        self, output_image, enciphered_positional_character_set, source=None, input_char_set=None,
+    ):
+        output_image.save(io.BytesIO(), format='PNG')
+
+
+def render_page(
+    size: Tuple[int, int], num_chars: int, seed: int = 0,
+) -> Tuple[Image.Image, PositionalCharacterSet]:
+    """Renders a page of random words, sized so that about num_chars characters fill the page.
+
+    Returns the page and its characters (spaces excluded), with tesseract-style bounding boxes.
+    """
+    width, height = size
+    rng = random.Random(seed)
+
+    # monospace cells are about 0.6 by 1.2 font sizes, words are followed by a space
+    cell_area = width * height / (num_chars * 1.2)
+    font_size = int(min(font_utils.MAX_FONT_SIZE, max(6, (cell_area / 0.72) ** 0.5)))
+    font = font_utils.get_font(font_size)
+    advance = font.getlength('M')
+    line_height = int(font_size * 1.2)
+    margin = font_size
+
+    img = Image.new('RGB', size, (250, 248, 240))
+    draw = ImageDraw.Draw(img)
+    chars: Dict[str, List] = {'char': [], 'left': [], 'bottom': [], 'right': [], 'top': []}
+    columns = max(1, int((width - 2 * margin) // advance))
+
+    y = margin
+    while len(chars['char']) < num_chars and y + line_height <= height - margin:
+        # fill line with words
+        line = ''
+        while True:
+            word = rng.choice(WORDS)
+            if len(line) + len(word) > columns:
+                break
+            line += word + ' '
+        line = line.rstrip()
+        excess = len(chars['char']) + len(line.replace(' ', '')) - num_chars
+        line = line[:len(line) - max(0, excess)]
+
+        draw.text((margin, y), line, font=font, fill=(20, 20, 30))
+        for i, char in enumerate(line):
+            if char == ' ':
+                continue
+            left, top, right, bottom = font.getbbox(char)
+            x = margin + round(i * advance)
+            chars['char'].append(char)
+            chars['left'].append(x + left)
+            chars['right'].append(x + right)
+            chars['top'].append(height - (y + top))
+            chars['bottom'].append(height - (y + bottom))
+
+        y += line_height
+
+    return img, PositionalCharacterSet.from_tesseract_chars(chars, size)
+
+
+def time_case(pipeline: ImagePipeline, img: Image.Image, repeats: int, warmup: int) -> dict:
+    """Runs pipeline on image repeatedly, summarizing end-to-end and per-stage timings."""
+    for _ in range(warmup):
+        pipeline.run_pipeline(img)
+
+    reports = []
+    for _ in range(repeats):
+        # the pipeline is instrumented, so every run has a report
+        report = pipeline.run_pipeline(img).report
+        assert report is not None
+        reports.append(report)
+    stage_names = sorted({name for report in reports for name in report.stages})
+
+    return {
+        'image_size': list(img.size),
+        'num_chars': reports[0].num_chars,
+        'repeats': repeats,
+        'elapsed': {
+            'median': statistics.median(report.elapsed for report in reports),
+            'min': min(report.elapsed for report in reports),
+        },
+        'stages': {
+            name: {
+                'median_wall': statistics.median(report.stages[name].wall for report in reports),
+                'median_cpu': statistics.median(report.stages[name].cpu for report in reports),
+            }
+            for name in stage_names
+        },
+        'peak_rss': reports[-1].peak_rss,
+    }
+
+
+def environment() -> dict:
+    """Describes the machine and versions results were measured with."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+        'tesseract': shutil.which('tesseract') is not None,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Finds cases and stages whose median time grew by more than threshold (a fraction)."""
+    regressions = []
+    for name, case in results['cases'].items():
+        baseline_case = baseline['cases'].get(name)
+        if baseline_case is None:
+            continue
+
+        timings = [('end-to-end', case['elapsed']['median'], baseline_case['elapsed']['median'])]
+        timings += [
+            (stage, timing['median_wall'], baseline_case['stages'][stage]['median_wall'])
+            for stage, timing in case['stages'].items() if stage in baseline_case['stages']
+        ]
+        for stage, median, baseline_median in timings:
+            if baseline_median >= MIN_COMPARED_TIME and median > baseline_median * (1 + threshold):
+                regressions.append(
+                    f'{name} {stage}: {median * 1000:.2f}ms vs {baseline_median * 1000:.2f}ms '
+                    f'(+{(median / baseline_median - 1) * 100:.0f}%)',
+                )
+
+    return regressions
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    width, height = size.lower().split('x')
+    return int(width), int(height)
+
+
+def run_benchmarks(
+    sizes, char_counts, examples_dir: Optional[pathlib.Path], repeats: int, warmup: int,
+) -> dict:
+    """Benchmarks synthetic pages of every size and character count, and example images."""
+    results: Dict[str, Any] = {'environment': environment(), 'cases': {}, 'skipped': []}
+
+    # synthetic pages, read by ground truth OCR
+    pages = {
+        f'synthetic_{width}x{height}_{num_chars}': render_page((width, height), num_chars)
+        for width, height in sizes for num_chars in char_counts
+    }
+    for name, (img, char_set) in pages.items():
+        pipeline = ImagePipeline(
+            GroundTruthOCR({img.size: char_set}), CaesarianCipher(3), Reconstructor(),
+            (EncodePNG(),), instrument=True,
+        )
+        results['cases'][name] = time_case(pipeline, img, repeats, warmup)
+        print(f'{name}: {results["cases"][name]["elapsed"]["median"] * 1000:.1f}ms')
+
+    # example images, read by tesseract
+    if examples_dir is not None:
+        if shutil.which('tesseract') is None:
+            results['skipped'].append(f'{examples_dir}: tesseract is not installed')
+        else:
+            pipeline = ImagePipeline(
+                OCR(), CaesarianCipher(3), Reconstructor(), (EncodePNG(),), instrument=True,
+            )
+            for img_path in find_images(examples_dir):
+                name = f'example_{img_path.name}'
+                with Image.open(img_path) as img:
+                    img.load()
+                    results['cases'][name] = time_case(pipeline, img, repeats, warmup)
+                print(f'{name}: {results["cases"][name]["elapsed"]["median"] * 1000:.1f}ms')
+
+    for skipped in results['skipped']:
+        print(f'skipped {skipped}')
+    return results
+
+
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='OCR Cipher Solver -- Benchmark')
+
+    parser.add_argument(
+        '--sizes', type=lambda sizes: [parse_size(size) for size in sizes.split(',')],
+        default=DEFAULT_SIZES, help='comma separated page sizes, e.g. 640x480,2480x3508',
+    )
+    parser.add_argument(
+        '--chars', type=lambda counts: [int(count) for count in counts.split(',')],
+        default=DEFAULT_CHAR_COUNTS, help='comma separated character counts per synthetic page',
+    )
+    parser.add_argument(
+        '--examples', type=pathlib.Path,
+        default=pathlib.Path(__file__).parents[1].joinpath('examples'),
+        help='directory of example images to benchmark with tesseract (skipped if not installed)',
+    )
+    parser.add_argument('--no_examples', action='store_true')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--out', type=pathlib.Path, default=pathlib.Path('benchmark_results.json'))
+    parser.add_argument('--baseline', type=pathlib.Path, help='results to compare against')
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='fraction a median time may grow over the baseline before it is flagged',
+    )
+
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.sizes, args.chars, None if args.no_examples else args.examples,
+        args.repeats, args.warmup,
+    )
+    args.out.write_text(json.dumps(results, indent=2))
+    print(f'wrote results to {args.out}')
+
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        for regression in regressions:
+            print(f'regression: {regression}')
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,73 @@
+"""Builds the English quadgram model the substitution solver scores plain texts with.
+
+Quadgrams are counted over the letters of plain text corpus files, ignoring case and every other
+character, and written as a gzipped text file of quadgrams and their counts.
+"""
+import collections
+import gzip
+import io
+import math
+import pathlib
+import re
+from typing import Counter
+from typing import Iterable
+from typing import List
+
+
+def count_quadgrams(corpus_paths: Iterable[pathlib.Path]) -> Counter[str]:
+    """Counts quadgrams of the letters of every corpus file, in upper case."""
+    counts: Counter[str] = collections.Counter()
+    for corpus_path in corpus_paths:
+        letters = re.sub('[^A-Z]', '', corpus_path.read_text(errors='ignore').upper())
+        counts.update(letters[i:i + 4] for i in range(len(letters) - 3))
+    return counts
+
+
+def main(corpus_paths: List[pathlib.Path], out_path: pathlib.Path, min_count: int):
+    """Counts quadgrams of corpus files, writing those seen at least min_count times to out_path."""
+    counts = count_quadgrams(corpus_paths)
+    total = sum(counts.values())
+    kept = sorted(
+        ((quadgram, count) for quadgram, count in counts.items() if count >= min_count),
+        key=lambda item: (-item[1], item[0]),
+    )
+
+    # mean log probability of a quadgram of the corpus, used as a reference plain text score
+    mean_log_prob = (
+        sum(count * math.log(count / total) for _, count in kept)
+        / sum(count for _, count in kept)
+    )
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # write without a timestamp in the gzip header, so rebuilding gives the same file
+    with out_path.open('wb') as raw_file, gzip.GzipFile(
+        fileobj=raw_file, mode='wb', mtime=0,
+    ) as gzip_file:
+        out_file = io.TextIOWrapper(gzip_file, encoding='ascii')
+        out_file.write(f'# total {total}\n# mean_log_prob {mean_log_prob:.4f}\n')
+        for quadgram, count in kept:
+            out_file.write(f'{quadgram} {count}\n')
+        out_file.flush()
+        out_file.detach()
+
+    print(f'wrote {len(kept)} of {len(counts)} quadgrams ({total} total) to {out_path}')
+
+
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='OCR Cipher Solver -- Build Quadgram Model')
+
+    parser.add_argument('corpus_paths', type=pathlib.Path, nargs='+')
+    parser.add_argument(
+        '--out', type=pathlib.Path,
+        default=pathlib.Path(__file__).parents[1].joinpath(
+            'ocr_cipher_solver', 'solvers', 'data', 'english_quadgrams.txt.gz',
+        ),
+    )
+    parser.add_argument('--min_count', type=int, default=2)
+
+    args = parser.parse_args()
+
+    main(args.corpus_paths, args.out, args.min_count)
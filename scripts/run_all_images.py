@@ -1,12 +1,22 @@
 import pathlib
-import subprocess
 
+from ocr_cipher_solver.ciphers import CaesarianCipher
+from ocr_cipher_solver.ocr import OCR
+from ocr_cipher_solver.outputs.save_image import SaveImage
+from ocr_cipher_solver.pipeline import ImagePipeline
+from ocr_cipher_solver.reconstructor import Reconstructor
+from ocr_cipher_solver.utils import find_images
 
-def encipher_img(img_fp: pathlib.Path, shift: int):
-    save_path = img_fp.parent.joinpath(pathlib.Path(img_fp.name.rsplit(".", maxsplit=1)[0] + f"_enciphered_{shift}" + ".png"))
-    subprocess.run(
-        ["python", "-m", "ocr_cipher_solver", str(img_fp), "--shift", str(shift), "--save_path", str(save_path)]
+
+def encipher_imgs(img_dir: pathlib.Path, shift: int):
+    pipeline = ImagePipeline(
+        OCR(),
+        CaesarianCipher(shift=shift),
+        Reconstructor(),
+        (SaveImage(img_dir, suffix=f"_enciphered_{shift}"),),
     )
+    for result in pipeline.run_many(find_images(img_dir)):
+        print(f"{result.source} ({result.elapsed:.3f}s)")
 
 
 if __name__ == '__main__':
@@ -20,7 +30,4 @@ if __name__ == '__main__':
 
     args = parser.parse_args()
 
-    for img_fp in args.img_dir.glob("*"):
-        if "enciphered" not in str(img_fp):
-            print(img_fp)
-            encipher_img(img_fp, args.shift)
+    encipher_imgs(args.img_dir, args.shift)
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from ocr_cipher_solver.data_formats import BoundingBox
+from ocr_cipher_solver.data_formats import PositionalCharacter
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+
+
+TESSERACT_CHARS = {
+    'char': ['H', 'i', '!'],
+    'left': [10, 22, 30],
+    'bottom': [5, 5, 6],
+    'right': [20, 28, 33],
+    'top': [25, 21, 24],
+    'page': [0, 0, 0],
+}
+IMAGE_SHAPE = (100, 50)
+
+
+def test_from_tesseract_chars_matches_per_character_conversion():
+    """Tests that building a set from tesseract output matches converting each character."""
+    char_set = PositionalCharacterSet.from_tesseract_chars(TESSERACT_CHARS, IMAGE_SHAPE)
+
+    assert list(char_set) == [
+        PositionalCharacter.from_tesseract_char(*tess_char, IMAGE_SHAPE)
+        for tess_char in zip(
+            TESSERACT_CHARS['char'], TESSERACT_CHARS['left'], TESSERACT_CHARS['bottom'],
+            TESSERACT_CHARS['right'], TESSERACT_CHARS['top'],
+        )
+    ]
+    assert char_set.text == 'Hi!'
+
+
+def test_from_tesseract_chars_rejects_multi_character_strings():
+    """Tests that characters longer than length one are rejected, as for PositionalCharacter."""
+    with pytest.raises(ValueError):
+        PositionalCharacterSet.from_tesseract_chars(
+            dict(TESSERACT_CHARS, char=['H', 'fi', '!']), IMAGE_SHAPE,
+        )
+
+
+def test_indexing_gives_character_views_and_subsets():
+    """Tests that integer indexing gives characters and slicing gives character sets."""
+    char_set = PositionalCharacterSet.from_tesseract_chars(TESSERACT_CHARS, IMAGE_SHAPE)
+
+    assert char_set[1] == PositionalCharacter('i', BoundingBox(22, 21, 6, 16, *IMAGE_SHAPE))
+    assert char_set[1:].text == 'i!'
+    assert char_set[np.array([True, False, True])].text == 'H!'
+    assert len(char_set[:0]) == 0
+
+
+def test_with_codepoints_shares_bounding_boxes():
+    """Tests that replacing characters keeps (and doesn't copy) the bounding box columns."""
+    char_set = PositionalCharacterSet.from_tesseract_chars(TESSERACT_CHARS, IMAGE_SHAPE)
+
+    new_char_set = char_set.with_codepoints(np.array([ord('h'), ord('o'), ord('?')]))
+
+    assert new_char_set.text == 'ho?'
+    assert new_char_set.left is char_set.left and new_char_set.height is char_set.height
+    assert new_char_set != char_set
+    assert PositionalCharacterSet.from_characters(char_set) == char_set
+
+
+def test_changed_from_finds_changed_characters():
+    """Tests that characters with a new codepoint or bounding box are marked as changed."""
+    char_set = PositionalCharacterSet.from_tesseract_chars(TESSERACT_CHARS, IMAGE_SHAPE)
+    new_char_set = char_set.with_codepoints(np.array([ord('H'), ord('o'), ord('!')]))
+    new_char_set.left = new_char_set.left + np.array([0, 0, 1])
+
+    assert new_char_set.changed_from(char_set).tolist() == [False, True, True]
+    assert not char_set.changed_from(char_set).any()
+    assert char_set.changed_from(char_set[1:]).tolist() == [True, True, True]
+
+
+def test_bytes_round_trip():
+    """Tests that serializing and deserializing a set gives an equal set."""
+    char_set = PositionalCharacterSet.from_tesseract_chars(TESSERACT_CHARS, IMAGE_SHAPE)
+
+    assert PositionalCharacterSet.from_bytes(char_set.to_bytes()) == char_set
+    assert PositionalCharacterSet.from_bytes(char_set[:0].to_bytes()) == char_set[:0]
+
+
+def test_from_bytes_rejects_other_data():
+    """Tests that data that isn't a serialized set is rejected."""
+    data = PositionalCharacterSet.from_tesseract_chars(TESSERACT_CHARS, IMAGE_SHAPE).to_bytes()
+
+    with pytest.raises(ValueError):
+        PositionalCharacterSet.from_bytes(b'PNG!' + data[4:])
+    with pytest.raises(ValueError):
+        PositionalCharacterSet.from_bytes(data[:-4])
+    with pytest.raises(ValueError):
+        PositionalCharacterSet.from_bytes(data[:10])
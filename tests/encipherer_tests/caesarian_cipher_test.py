@@ -14,7 +14,9 @@ def charset_to_chars(charset: PositionalCharacterSet) -> List[Character]:
 
 
 def chars_to_charset(chars: List[Character]) -> PositionalCharacterSet:
-    return [PositionalCharacter(char, BoundingBox(0, 0, 0, 0)) for char in chars]
+    return PositionalCharacterSet.from_characters(
+        PositionalCharacter(char, BoundingBox(0, 0, 0, 0, 0, 0)) for char in chars
+    )
 
 
 @pytest.mark.parametrize(
@@ -51,3 +53,20 @@ def test_caesarian_cipher_enciphers_multiple_characters_correctly(
 
     # check that output character is as expected
     assert list(expected_output_chars) == output_chars
+
+
+@pytest.mark.parametrize(
+    ('input_chars', 'expected_output_chars', 'shift'),
+    (
+        (('A', 'z', 'Z'), ('B', 'a', 'A'), 1),
+        (('3', '.', '!'), ('3', '.', '!'), 5),
+        (('a',), ('a',), 26),
+    ),
+)
+def test_caesarian_cipher_only_rotates_letters(input_chars, expected_output_chars, shift):
+    """Tests that caesarian cipher preserves case, wraps around, and leaves non-letters alone."""
+    cipher = CaesarianCipher(shift)
+
+    output_chars = charset_to_chars(cipher.run(chars_to_charset(input_chars)))
+
+    assert list(expected_output_chars) == output_chars
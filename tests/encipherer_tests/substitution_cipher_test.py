@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from ocr_cipher_solver.ciphers import AtbashCipher
+from ocr_cipher_solver.ciphers import CaesarianCipher
+from ocr_cipher_solver.ciphers import KeywordCipher
+from ocr_cipher_solver.ciphers import SubstitutionCipher
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+
+
+def text_to_charset(text: str) -> PositionalCharacterSet:
+    num_chars = len(text)
+    return PositionalCharacterSet(
+        np.array([ord(char) for char in text], dtype=np.uint32),
+        np.arange(num_chars, dtype=np.int32),
+        np.full(num_chars, 8, dtype=np.int32),
+        np.ones(num_chars, dtype=np.int32),
+        np.full(num_chars, 8, dtype=np.int32),
+        num_chars, 8,
+    )
+
+
+@pytest.mark.parametrize(
+    ('cipher', 'plain_text', 'cipher_text'),
+    (
+        (CaesarianCipher(13), 'Hello, World 42!', 'Uryyb, Jbeyq 42!'),
+        (CaesarianCipher(-3), 'abc XYZ', 'xyz UVW'),
+        (AtbashCipher(), 'Attack at dawn.', 'Zggzxp zg wzdm.'),
+        (KeywordCipher('Zebras'), 'flee at once', 'siaa zq lkba'),
+        (SubstitutionCipher({'a': 'b', 'b': 'a', '!': '?'}), 'aabbc!', 'bbaac?'),
+        (SubstitutionCipher({}), 'unchanged', 'unchanged'),
+    ),
+)
+def test_substitution_ciphers_encipher_text(
+    cipher: SubstitutionCipher, plain_text: str, cipher_text: str,
+):
+    """Tests that character sets and plain text are enciphered with the same translation."""
+    assert cipher.translate(plain_text) == cipher_text
+    assert cipher.run(text_to_charset(plain_text)).text == cipher_text
+
+
+def test_substitution_cipher_reuses_bounding_boxes():
+    """Tests that enciphering shares the input set's bounding box columns."""
+    char_set = text_to_charset('abc')
+
+    ciphered_char_set = CaesarianCipher(1).run(char_set)
+
+    assert ciphered_char_set.left is char_set.left
+    assert ciphered_char_set.top is char_set.top
+
+
+def test_substitution_cipher_leaves_codepoints_outside_table_unchanged():
+    """Tests that codepoints above the highest mapped codepoint pass through."""
+    cipher = SubstitutionCipher({'a': 'z'})
+
+    codepoints = np.array([ord('a'), ord('é'), 0x1F600], dtype=np.uint32)
+    assert cipher.translate_codepoints(codepoints).tolist() == [
+        ord('z'), ord('é'), 0x1F600,
+    ]
+
+
+@pytest.mark.parametrize('mapping', ({'ab': 'c'}, {'a': ''}))
+def test_substitution_cipher_rejects_multi_character_mappings(mapping):
+    """Tests that only single character substitutions are accepted."""
+    with pytest.raises(ValueError):
+        SubstitutionCipher(mapping)
@@ -0,0 +1,95 @@
+import ctypes.util
+import pickle
+
+import pytest
+from PIL import Image
+from PIL import ImageDraw
+
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.libtesseract import LibTesseractOCR
+from ocr_cipher_solver.libtesseract import parse_config
+from ocr_cipher_solver.libtesseract import symbols_to_char_set
+
+
+def test_symbols_are_converted_to_tesseract_box_coordinates():
+    """Tests that top-left based symbol boxes are converted to bottom-left based tesseract boxes."""
+    char_set = symbols_to_char_set([('H', 10, 5, 20, 25), ('fi', 22, 9, 30, 25)], (100, 50))
+
+    # ligatures are split into one box per character
+    assert char_set == PositionalCharacterSet.from_tesseract_chars(
+        {
+            'char': ['H', 'f', 'i'],
+            'left': [10, 22, 26],
+            'bottom': [25, 25, 25],
+            'right': [20, 26, 30],
+            'top': [45, 41, 41],
+        },
+        (100, 50),
+    )
+
+
+def test_parse_config():
+    """Tests that page segmentation mode and variables are read from tesseract options."""
+    assert parse_config('--psm 6 -c load_system_dawg=0') == (6, {'load_system_dawg': '0'})
+    assert parse_config('') == (None, {})
+    with pytest.raises(ValueError):
+        parse_config('--oem 1')
+
+
+def test_stage_pickles_without_engines():
+    """Tests that the stage can be sent to worker processes before and after loading engines."""
+    ocr = pickle.loads(pickle.dumps(LibTesseractOCR(config='--psm 6')))
+
+    assert ocr.config == '--psm 6'
+
+
+class FakeLib:
+    """Tesseract library stub that knows no variables, recording deleted engines."""
+
+    def __init__(self):
+        self.deleted = []
+
+    def TessBaseAPICreate(self):
+        return 1
+
+    def TessBaseAPIInit3(self, engine, datapath, lang):
+        return 0
+
+    def TessBaseAPISetPageSegMode(self, engine, mode):
+        pass
+
+    def TessBaseAPISetVariable(self, engine, name, value):
+        return 0
+
+    def TessBaseAPIDelete(self, engine):
+        self.deleted.append(engine)
+
+
+def test_unknown_variables_free_the_engine():
+    """Tests that an engine failing to take the configured variables is deleted, not leaked."""
+    ocr = LibTesseractOCR(config='-c no_such_variable=1')
+    lib = FakeLib()
+    ocr._lib = lib
+
+    with pytest.raises(ValueError):
+        ocr._get_engine()
+
+    assert lib.deleted == [1]
+
+
+@pytest.mark.skipif(
+    ctypes.util.find_library('tesseract') is None, reason='libtesseract is not installed',
+)
+def test_libtesseract_reads_text():
+    """Tests that the in-process engine reads text, reusing the engine across images."""
+    ocr = LibTesseractOCR(config='--psm 7')
+    img = Image.new('L', (200, 60), 255)
+    ImageDraw.Draw(img).text((10, 10), 'HELLO', fill=0)
+
+    try:
+        texts = [ocr.run(img.resize((800, 240))).text for _ in range(2)]
+    finally:
+        ocr.close()
+
+    assert texts[0] == texts[1]
+    assert len(texts[0]) > 0
@@ -0,0 +1,160 @@
+import os
+import pathlib
+import sys
+from typing import Tuple
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.ocr import OCR
+from ocr_cipher_solver.ocr_cache import OCRCache
+
+
+def x_char_set(img_width: int, img_height: int) -> PositionalCharacterSet:
+    """Returns character set of a single 'x' in an image of the given size."""
+    return PositionalCharacterSet(
+        np.array([ord('x')], dtype=np.uint32),
+        np.array([1], dtype=np.int32),
+        np.array([9], dtype=np.int32),
+        np.array([4], dtype=np.int32),
+        np.array([8], dtype=np.int32),
+        img_width, img_height,
+    )
+
+
+class CountingOCR(OCR):
+    """OCR stage that recognizes a fixed character per image, counting how often it runs."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_recognized = 0
+
+    def cache_config(self) -> Tuple[str, ...]:
+        return type(self).__name__, 'test', self.lang, self.config
+
+    def _recognize(self, input_image: Image.Image) -> PositionalCharacterSet:
+        self.num_recognized += 1
+        return x_char_set(*input_image.size)
+
+
+def test_cached_image_skips_ocr(tmp_path: pathlib.Path):
+    """Tests that an image with the same pixels and configuration is only recognized once."""
+    cache = OCRCache(tmp_path)
+    ocr = CountingOCR(cache=cache)
+    first = ocr.run(Image.new('RGB', (16, 16), 'white'))
+    second = ocr.run(Image.new('RGB', (16, 16), 'white'))
+
+    assert first == second
+    assert ocr.num_recognized == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_key_depends_on_pixels_and_config(tmp_path: pathlib.Path):
+    """Tests that changing the image or the OCR configuration misses the cache."""
+    cache = OCRCache(tmp_path)
+    image = Image.new('RGB', (16, 16), 'white')
+    CountingOCR(cache=cache).run(image)
+
+    ocr = CountingOCR(cache=cache)
+    ocr.run(Image.new('RGB', (16, 16), 'black'))
+    ocr.run(image.convert('L'))
+    CountingOCR(lang='deu', cache=cache).run(image)
+
+    assert ocr.num_recognized == 2
+    assert cache.hits == 0
+
+
+def test_bypassed_cache_reruns_ocr(tmp_path: pathlib.Path):
+    """Tests that a bypassed cache runs OCR, but still stores the result."""
+    image = Image.new('RGB', (16, 16), 'white')
+    bypassing_ocr = CountingOCR(cache=OCRCache(tmp_path, bypass=True))
+    bypassing_ocr.run(image)
+    bypassing_ocr.run(image)
+
+    ocr = CountingOCR(cache=OCRCache(tmp_path))
+    ocr.run(image)
+
+    assert bypassing_ocr.num_recognized == 2
+    assert ocr.num_recognized == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path: pathlib.Path):
+    """Tests that results are evicted least recently used first once the cache is full."""
+    char_set = x_char_set(16, 16)
+    cache = OCRCache(tmp_path, max_size=2 * len(char_set.to_bytes()))
+
+    cache.put('aa', char_set)
+    cache.put('bb', char_set)
+    # make 'aa' the oldest entry, then use it so that 'bb' becomes least recently used
+    os.utime(tmp_path / 'aa' / 'aa.pcs', (1, 1))
+    os.utime(tmp_path / 'bb' / 'bb.pcs', (2, 2))
+    cache.get('aa')
+    cache.put('cc', char_set)
+
+    assert cache.get('aa') == char_set
+    assert cache.get('bb') is None
+    assert cache.get('cc') == char_set
+
+
+def test_cache_scans_only_when_full(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """Tests that storing results only scans the cache directory once the size limit is passed."""
+    char_set = x_char_set(16, 16)
+    cache = OCRCache(tmp_path, max_size=2 * len(char_set.to_bytes()))
+    num_evictions = []
+    evict = cache.evict
+
+    def counting_evict():
+        num_evictions.append(1)
+        evict()
+
+    monkeypatch.setattr(cache, 'evict', counting_evict)
+
+    cache.put('aa', char_set)
+    cache.put('bb', char_set)
+    assert not num_evictions
+
+    cache.put('cc', char_set)
+    assert len(num_evictions) == 1 and len(list(tmp_path.glob('*/*.pcs'))) == 2
+
+    # the running total is seeded from the entries already in the directory
+    assert OCRCache(tmp_path, max_size=cache.max_size)._size == cache.max_size
+
+
+def test_cached_tesseract_results_skip_pytesseract(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch,
+):
+    """Tests that cache hits of the pytesseract stage neither import pytesseract nor run it."""
+    tesseract = tmp_path.joinpath('tesseract')
+    tesseract.write_bytes(b'4.1')
+    monkeypatch.setattr('shutil.which', lambda name: str(tesseract))
+    monkeypatch.setitem(sys.modules, 'pytesseract', None)
+
+    image = Image.new('L', (16, 16), 255)
+    char_set = x_char_set(16, 16)
+    cache = OCRCache(tmp_path.joinpath('cache'))
+    ocr = OCR(cache=cache)
+    cache.put(cache.key(image, ocr.cache_config()), char_set)
+    assert ocr.run(image) == char_set
+
+    # replacing tesseract misses the cache
+    tesseract.write_bytes(b'5.3.0')
+    with pytest.raises(ImportError):
+        ocr.run(image)
+
+
+@pytest.mark.parametrize('size', (0, 10, 30), ids=('empty', 'partial_header', 'partial_columns'))
+def test_truncated_entries_are_misses(tmp_path: pathlib.Path, size: int):
+    """Tests that truncated (or empty) entries are treated as misses, and OCR runs again."""
+    image = Image.new('RGB', (16, 16), 'white')
+    cache = OCRCache(tmp_path)
+    ocr = CountingOCR(cache=cache)
+    ocr.run(image)
+    entry = next(tmp_path.glob('*/*.pcs'))
+    entry.write_bytes(entry.read_bytes()[:size])
+
+    ocr.run(image)
+
+    assert ocr.num_recognized == 2
+    assert (cache.hits, cache.misses) == (0, 2)
@@ -0,0 +1,90 @@
+import threading
+from typing import Any
+from typing import Dict
+from typing import List
+
+import numpy as np
+import pytest
+from PIL import Image
+from PIL import ImageDraw
+
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.ocr import OCR
+from ocr_cipher_solver.tiled_ocr import TiledOCR
+
+
+class BlobOCR(OCR):
+    """OCR stage that reads each gray level as a character, boxed by the pixels of that level."""
+
+    def _recognize(self, input_image: Image.Image) -> PositionalCharacterSet:
+        pixels = np.asarray(input_image.convert('L'))
+        chars: Dict[str, List[Any]] = {'char': [], 'left': [], 'bottom': [], 'right': [], 'top': []}
+        for level in np.unique(pixels[pixels < 255]):
+            rows, cols = np.nonzero(pixels == level)
+            chars['char'].append(chr(level))
+            chars['left'].append(cols.min())
+            chars['right'].append(cols.max() + 1)
+            chars['bottom'].append(pixels.shape[0] - rows.max() - 1)
+            chars['top'].append(pixels.shape[0] - rows.min())
+
+        return PositionalCharacterSet.from_tesseract_chars(chars, input_image.size)
+
+
+@pytest.fixture
+def page() -> Image.Image:
+    """Returns an image with a grid of character-sized blobs, each of a different gray level."""
+    img = Image.new('L', (310, 230), 255)
+    draw = ImageDraw.Draw(img)
+    for i, (x, y) in enumerate((x, y) for y in range(5, 210, 25) for x in range(5, 290, 25)):
+        draw.rectangle((x, y, x + 15, y + 19), fill=65 + i)
+    return img
+
+
+def sorted_chars(char_set: PositionalCharacterSet) -> list:
+    return sorted(zip(char_set.text, char_set.left, char_set.top, char_set.width, char_set.height))
+
+
+@pytest.mark.parametrize('tile_size', (50, 64, 100, 1000))
+def test_tiled_ocr_matches_whole_image_ocr(page: Image.Image, tile_size: int):
+    """Tests that tiled OCR finds every character exactly once, in image coordinates."""
+    expected = BlobOCR().run(page)
+
+    char_set = TiledOCR(BlobOCR(), tile_size=tile_size, overlap=24, num_workers=4).run(page)
+
+    assert sorted_chars(char_set) == sorted_chars(expected)
+    assert char_set.image_shape == page.size
+
+
+def test_tiles_cover_image():
+    """Tests that tile cores partition the image and tiles extend past them by the overlap."""
+    tiles = list(TiledOCR(tile_size=100, overlap=10).tiles((250, 120)))
+
+    assert len(tiles) == 6
+    assert tiles[0].box == (0, 0, 93, 70) and tiles[0].core == (0, 0, 83, 60)
+    assert tiles[-1].box == (157, 50, 250, 120) and tiles[-1].core == (167, 60, 250, 120)
+    cores = [tile.core for tile in tiles]
+    assert sum((right - left) * (lower - upper) for left, upper, right, lower in cores) == 250 * 120
+
+
+def test_tiled_ocr_reuses_threads(page: Image.Image):
+    """Tests that tiles of every image are read by the same threads, until the stage is closed."""
+    class ThreadRecordingOCR(BlobOCR):
+        def __init__(self):
+            super().__init__()
+            self.threads = set()
+            self.closed = False
+
+        def _recognize(self, input_image: Image.Image) -> PositionalCharacterSet:
+            self.threads.add(threading.get_ident())
+            return super()._recognize(input_image)
+
+        def close(self):
+            self.closed = True
+
+    tile_ocr = ThreadRecordingOCR()
+    ocr = TiledOCR(tile_ocr, tile_size=50, overlap=24, num_workers=2)
+    for _ in range(3):
+        ocr.run(page)
+    ocr.close()
+
+    assert len(tile_ocr.threads) <= 2 and tile_ocr.closed
@@ -0,0 +1,81 @@
+import pathlib
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+from PIL import Image
+
+from ocr_cipher_solver.ciphers.identity import IdentityEncipherer
+from ocr_cipher_solver.data_formats import BoundingBox
+from ocr_cipher_solver.data_formats import PositionalCharacter
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.ocr import OCR
+from ocr_cipher_solver.outputs import PipelineOutput
+from ocr_cipher_solver.pipeline import ImagePipeline
+from ocr_cipher_solver.reconstructor import Reconstructor
+
+
+class FakeOCR(OCR):
+    """OCR stub that recognizes one character per image, without running tesseract."""
+
+    def run(self, input_image: Image.Image) -> PositionalCharacterSet:
+        return PositionalCharacterSet.from_characters(
+            (PositionalCharacter('a', BoundingBox(0, 4, 4, 4, *input_image.size)),),
+        )
+
+
+class FakeReconstructor(Reconstructor):
+    """Reconstructor stub that returns a copy of the input image."""
+
+    def run(
+        self,
+        ciphered_char_set: PositionalCharacterSet,
+        input_image: Image.Image,
+        input_char_set: Optional[PositionalCharacterSet] = None,
+    ) -> Image.Image:
+        return input_image.copy()
+
+
+class RecordingOutput(PipelineOutput):
+    """Output head that records what it was run with."""
+
+    def __init__(self):
+        self.calls: List[Tuple[Tuple[int, int], Optional[pathlib.Path]]] = []
+
+    def run(
+        self, output_image, enciphered_positional_character_set, source=None, input_char_set=None,
+    ):
+        self.calls.append((output_image.size, source))
+
+
+@pytest.fixture
+def recording_output() -> RecordingOutput:
+    return RecordingOutput()
+
+
+@pytest.fixture
+def pipeline(recording_output: RecordingOutput) -> ImagePipeline:
+    return ImagePipeline(FakeOCR(), IdentityEncipherer(), FakeReconstructor(), (recording_output,))
+
+
+@pytest.fixture
+def img_paths(tmp_path: pathlib.Path) -> List[pathlib.Path]:
+    paths = []
+    for i, size in enumerate(((8, 8), (16, 8), (8, 16))):
+        path = tmp_path.joinpath(f'img_{i}.png')
+        Image.new('RGB', size, color=(255, 255, 255)).save(path)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def multi_page_paths(tmp_path: pathlib.Path) -> List[pathlib.Path]:
+    """Returns a three-page TIFF file, and a (memory-mapped) PPM file."""
+    tiff_path = tmp_path.joinpath('doc.tiff')
+    pages = [Image.new('RGB', (8, 8 * (i + 1)), 'white') for i in range(3)]
+    pages[0].save(tiff_path, save_all=True, append_images=pages[1:])
+
+    ppm_path = tmp_path.joinpath('raw.ppm')
+    Image.new('RGB', (16, 8), 'white').save(ppm_path)
+    return [tiff_path, ppm_path]
@@ -0,0 +1,73 @@
+import json
+import pathlib
+from typing import List
+
+from .conftest import RecordingOutput
+from ocr_cipher_solver import instrumentation
+from ocr_cipher_solver.pipeline import ImagePipeline
+
+
+def test_instrumented_pipeline_reports_every_stage(
+    pipeline: ImagePipeline, recording_output: RecordingOutput, img_paths: List[pathlib.Path],
+):
+    """Tests that instrumented runs report timings of each stage and cache lookups."""
+    instrumented_pipeline = ImagePipeline(
+        pipeline.ocr, pipeline.encipherer, pipeline.reconstructor, (recording_output,),
+        instrument=True,
+    )
+
+    report = instrumented_pipeline.run_file(img_paths[0]).report
+
+    assert report is not None
+    assert report.source == img_paths[0]
+    assert report.num_chars == 1
+    assert set(report.stages) == {'ocr', 'encipher', 'reconstruct', 'output.RecordingOutput'}
+    assert all(timing.calls == 1 and timing.wall >= 0 for timing in report.stages.values())
+    assert report.elapsed >= sum(timing.wall for timing in report.stages.values())
+    assert set(report.caches) == {'font', 'glyph'}
+    assert json.loads(report.to_json())['stages']['ocr']['calls'] == 1
+
+
+def test_pipeline_is_not_instrumented_by_default(
+    pipeline: ImagePipeline, img_paths: List[pathlib.Path],
+):
+    """Tests that no report is collected unless requested."""
+    assert pipeline.run_file(img_paths[0]).report is None
+
+
+def test_timed_only_measures_inside_collected_runs():
+    """Tests that stages are only timed while timings are collected, summing repeated calls."""
+    with instrumentation.timed('outside'):
+        pass
+
+    with instrumentation.collect_timings() as timings:
+        for _ in range(3):
+            with instrumentation.timed('stage'):
+                pass
+
+    assert list(timings.stages) == ['stage']
+    assert timings.stages['stage'].calls == 3
+
+
+def test_prometheus_export_aggregates_reports():
+    """Tests that reports are summed into Prometheus counters."""
+    reports = [
+        instrumentation.RunReport(
+            source=None,
+            num_chars=num_chars,
+            elapsed=1.0,
+            stages={'ocr': instrumentation.StageTiming(wall=0.5, cpu=0.25, calls=1)},
+            caches={'glyph': instrumentation.CacheStats(hits=num_chars - 1, misses=1)},
+            peak_rss=1024 * num_chars,
+        )
+        for num_chars in (3, 5)
+    ]
+
+    metrics = instrumentation.to_prometheus(reports)
+
+    assert 'ocr_cipher_solver_runs_total 2' in metrics
+    assert 'ocr_cipher_solver_chars_total 8' in metrics
+    assert 'ocr_cipher_solver_stage_wall_seconds_total{stage="ocr"} 1.0' in metrics
+    assert 'ocr_cipher_solver_cache_hits_total{cache="glyph"} 6' in metrics
+    assert 'ocr_cipher_solver_peak_rss_bytes 5120' in metrics
+    assert reports[0].caches['glyph'].hit_rate == 2 / 3
@@ -0,0 +1,54 @@
+import pathlib
+from typing import List
+
+import pytest
+
+from ocr_cipher_solver.parallel import ParallelImagePipeline
+from ocr_cipher_solver.pipeline import ImagePipeline
+
+
+@pytest.mark.parametrize('max_in_flight', (1, 2, None))
+def test_parallel_pipeline_returns_results_in_input_order(
+    pipeline: ImagePipeline, img_paths: List[pathlib.Path], max_in_flight: int,
+):
+    """Tests that ordered parallel runs yield one result per image, in input order."""
+    parallel_pipeline = ParallelImagePipeline(pipeline, num_workers=2, max_in_flight=max_in_flight)
+
+    results = list(parallel_pipeline.run_many(img_paths))
+
+    assert [result.source for result in results] == img_paths
+    assert all(result.reconstructed_image is None for result in results)
+
+
+def test_unordered_parallel_pipeline_returns_every_result(
+    pipeline: ImagePipeline, img_paths: List[pathlib.Path],
+):
+    """Tests that unordered parallel runs yield one result per image."""
+    parallel_pipeline = ParallelImagePipeline(pipeline, num_workers=2, ordered=False)
+
+    results = list(parallel_pipeline.run_many(img_paths))
+
+    assert sorted(str(result.source) for result in results) == sorted(map(str, img_paths))
+
+
+def test_parallel_pipeline_runs_every_page(
+    pipeline: ImagePipeline, multi_page_paths: List[pathlib.Path],
+):
+    """Tests that every page of a multi-page file is run as its own task, named after its page."""
+    parallel_pipeline = ParallelImagePipeline(pipeline, num_workers=2)
+
+    results = list(parallel_pipeline.run_many(multi_page_paths))
+
+    assert [result.source for result in results] == [
+        multi_page_paths[0].with_name(name)
+        for name in ('doc_page_1.tiff', 'doc_page_2.tiff', 'doc_page_3.tiff')
+    ] + [multi_page_paths[1]]
+    assert [result.enciphered_char_set.image_shape for result in results] == [
+        (8, 8), (8, 16), (8, 24), (16, 8),
+    ]
+
+
+def test_parallel_pipeline_rejects_empty_in_flight_limit(pipeline: ImagePipeline):
+    """Tests that an in-flight limit below one is rejected."""
+    with pytest.raises(ValueError):
+        ParallelImagePipeline(pipeline, max_in_flight=-1)
@@ -0,0 +1,132 @@
+import asyncio
+import pathlib
+from typing import List
+
+import pytest
+from PIL import Image
+from PIL import ImageSequence
+from PIL import PdfParser
+
+from .conftest import FakeOCR
+from .conftest import FakeReconstructor
+from .conftest import RecordingOutput
+from ocr_cipher_solver.ciphers.identity import IdentityEncipherer
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.outputs.save_characters import SaveCharacters
+from ocr_cipher_solver.outputs.save_pages import SavePages
+from ocr_cipher_solver.pipeline import ImagePipeline
+from ocr_cipher_solver.utils import find_images
+
+
+def test_run_many_processes_images_in_order(
+    pipeline: ImagePipeline, recording_output: RecordingOutput, img_paths: List[pathlib.Path],
+):
+    """Tests that run_many runs every image through the same pipeline, in input order."""
+    results = list(pipeline.run_many(img_paths))
+
+    assert [result.source for result in results] == img_paths
+    assert all(result.num_chars == 1 and result.elapsed >= 0 for result in results)
+    assert recording_output.calls == [
+        ((8, 8), img_paths[0]), ((16, 8), img_paths[1]), ((8, 16), img_paths[2]),
+    ]
+
+
+def test_find_images_skips_enciphered_outputs(img_paths: List[pathlib.Path]):
+    """Tests that previously generated outputs and non-image files are not picked up."""
+    img_dir = img_paths[0].parent
+    img_dir.joinpath('img_0_enciphered_3.png').touch()
+    img_dir.joinpath('img_1_solved.png').touch()
+    img_dir.joinpath('notes.txt').touch()
+
+    assert list(find_images(img_dir)) == img_paths
+
+
+def test_arun_runs_pipelines_concurrently(
+    pipeline: ImagePipeline, recording_output: RecordingOutput,
+):
+    """Tests that arun runs the pipeline off the event loop, for several images at once."""
+    async def run_all():
+        return await asyncio.gather(*(
+            pipeline.arun(Image.new('RGB', (8, 8 * (i + 1))), source=pathlib.Path(f'{i}.png'))
+            for i in range(3)
+        ))
+
+    results = asyncio.run(run_all())
+
+    assert [result.reconstructed_image.size for result in results] == [(8, 8), (8, 16), (8, 24)]
+    assert sorted(recording_output.calls) == [
+        ((8, 8), pathlib.Path('0.png')),
+        ((8, 16), pathlib.Path('1.png')),
+        ((8, 24), pathlib.Path('2.png')),
+    ]
+
+
+def test_run_frames_runs_every_page(
+    pipeline: ImagePipeline,
+    recording_output: RecordingOutput,
+    multi_page_paths: List[pathlib.Path],
+):
+    """Tests that every page of a multi-page file is run, named after its page."""
+    tiff_path = multi_page_paths[0]
+
+    results = list(pipeline.run_frames(tiff_path))
+
+    assert [result.source for result in results] == [
+        tiff_path.with_name(name)
+        for name in ('doc_page_1.tiff', 'doc_page_2.tiff', 'doc_page_3.tiff')
+    ]
+    assert [size for size, _ in recording_output.calls] == [(8, 8), (8, 16), (8, 24)]
+
+
+def test_save_pages_writes_one_multi_page_file(tmp_path: pathlib.Path):
+    """Tests that pages are appended to a single TIFF or PDF file, in order."""
+    colors = ('red', 'green', 'blue')
+    tiff_path, pdf_path = tmp_path.joinpath('out.tiff'), tmp_path.joinpath('out.pdf')
+
+    for path in (tiff_path, pdf_path):
+        save_pages = SavePages(path)
+        for color in colors:
+            save_pages.run(
+                Image.new('RGB', (8, 8), color), PositionalCharacterSet.from_characters([], (8, 8)),
+            )
+        save_pages.close()
+        assert save_pages.num_pages == 3
+
+    with Image.open(tiff_path) as tiff:
+        pixels = [frame.convert('RGB').getpixel((0, 0)) for frame in ImageSequence.Iterator(tiff)]
+    assert pixels == [(255, 0, 0), (0, 128, 0), (0, 0, 255)]
+    with PdfParser.PdfParser(str(pdf_path)) as pdf:
+        assert len(pdf.pages) == 3
+
+    with pytest.raises(ValueError):
+        SavePages(tmp_path.joinpath('out.png'))
+
+
+class FailingReconstructor(FakeReconstructor):
+    """Reconstructor stub that fails if it is run."""
+
+    def run(self, ciphered_char_set, input_image, input_char_set=None):
+        raise AssertionError('reconstructor should not run')
+
+
+def test_pipeline_skips_reconstruction_without_image_outputs(
+    tmp_path: pathlib.Path, img_paths: List[pathlib.Path], recording_output: RecordingOutput,
+):
+    """Tests that images are only reconstructed if an output head uses them."""
+    save_characters = SaveCharacters(tmp_path.joinpath('chars.jsonl'))
+    pipeline = ImagePipeline(
+        FakeOCR(), IdentityEncipherer(), FailingReconstructor(), (save_characters,),
+    )
+
+    results = list(pipeline.run_many(img_paths))
+    save_characters.close()
+
+    assert not pipeline.reconstructs
+    assert all(result.reconstructed_image is None and result.num_chars == 1 for result in results)
+    assert len(tmp_path.joinpath('chars.jsonl').read_text().splitlines()) == len(img_paths)
+
+    # output heads using images (or no output heads at all) still get reconstructed images
+    assert ImagePipeline(
+        FakeOCR(), IdentityEncipherer(), FakeReconstructor(), (save_characters, recording_output),
+    ).reconstructs
+    assert ImagePipeline(FakeOCR(), IdentityEncipherer(), FakeReconstructor(), ()).reconstructs
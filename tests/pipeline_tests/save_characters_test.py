@@ -0,0 +1,73 @@
+import json
+import pathlib
+
+import pytest
+
+from ocr_cipher_solver.ciphers import CaesarianCipher
+from ocr_cipher_solver.data_formats import BoundingBox
+from ocr_cipher_solver.data_formats import PositionalCharacter
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.outputs.save_characters import SaveCharacters
+
+
+@pytest.fixture
+def char_set() -> PositionalCharacterSet:
+    return PositionalCharacterSet.from_characters(
+        (
+            PositionalCharacter('a', BoundingBox(0, 10, 4, 8, 20, 10)),
+            PositionalCharacter('b', BoundingBox(6, 10, 4, 8, 20, 10)),
+        ),
+        (20, 10),
+    )
+
+
+def test_save_characters_appends_json_lines(
+    tmp_path: pathlib.Path, char_set: PositionalCharacterSet,
+):
+    """Tests that characters of each image are buffered, then appended as one record per image."""
+    path = tmp_path.joinpath('chars.jsonl')
+    enciphered_char_set = CaesarianCipher(shift=1).run(char_set)
+
+    # records are written once a batch is full, and the rest on close
+    save_characters = SaveCharacters(path, batch_size=2)
+    num_written = []
+    for i in range(3):
+        save_characters.run(
+            None, enciphered_char_set, source=pathlib.Path(f'{i}.png'), input_char_set=char_set,
+        )
+        num_written.append(len(path.read_text().splitlines()) if path.exists() else 0)
+    save_characters.close()
+    assert num_written == [0, 2, 2]
+
+    # records are appended by later runs
+    save_characters = SaveCharacters(path)
+    save_characters.run(None, enciphered_char_set)
+    save_characters.close()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+
+    assert len(records) == 4 and records[3]['input_text'] is None
+    assert records[0] == {
+        'source': '0.png', 'image_width': 20, 'image_height': 10, 'input_text': 'ab',
+        'output_text': 'bc', 'left': [0, 6], 'top': [10, 10], 'width': [4, 4], 'height': [8, 8],
+    }
+
+
+def test_save_characters_writes_parquet(tmp_path: pathlib.Path, char_set: PositionalCharacterSet):
+    """Tests that Parquet files get one row per character."""
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path.joinpath('chars.parquet')
+
+    save_characters = SaveCharacters(path, batch_size=1)
+    save_characters.run(None, char_set, source=pathlib.Path('a.png'), input_char_set=char_set)
+    save_characters.run(None, char_set)
+    save_characters.close()
+
+    table = pq.read_table(path).to_pydict()
+    assert table['source'] == ['a.png', 'a.png', None, None]
+    assert table['input_text'] == ['a', 'b', None, None]
+    assert table['left'] == [0, 6, 0, 6]
+
+
+def test_save_characters_rejects_unknown_formats(tmp_path: pathlib.Path):
+    with pytest.raises(ValueError):
+        SaveCharacters(tmp_path.joinpath('chars.csv'))
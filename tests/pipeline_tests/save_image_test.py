@@ -0,0 +1,68 @@
+import pathlib
+import pickle
+import threading
+
+import pytest
+from PIL import Image
+
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.outputs.save_image import SaveImage
+
+# SaveImage only writes images, so the character set passed along with them may be empty
+CHAR_SET = PositionalCharacterSet.from_characters([])
+
+
+def test_save_image_encodes_with_format_and_options(tmp_path: pathlib.Path):
+    """Tests that images are saved into a directory in the requested format."""
+    source = tmp_path.joinpath('page.png')
+    image = Image.new('RGB', (16, 8), 'red')
+
+    SaveImage(tmp_path, format='jpeg', quality=90).run(image, CHAR_SET, source=source)
+    SaveImage(tmp_path, format='ppm').run(image, CHAR_SET, source=source)
+
+    with Image.open(tmp_path.joinpath('page_enciphered.jpg')) as saved:
+        assert saved.format == 'JPEG'
+    with Image.open(tmp_path.joinpath('page_enciphered.ppm')) as saved:
+        assert saved.format == 'PPM' and saved.getpixel((0, 0)) == (255, 0, 0)
+
+    # encoder options must apply to the format
+    with pytest.raises(ValueError):
+        SaveImage(tmp_path, format='png', quality=90)
+    with pytest.raises(ValueError):
+        SaveImage(tmp_path.joinpath('out.jpg'), compress_level=1)
+    with pytest.raises(ValueError):
+        SaveImage(tmp_path, format='gif')
+
+    # images are required
+    with pytest.raises(ValueError):
+        SaveImage(tmp_path).run(None, CHAR_SET, source=source)
+
+
+def test_save_image_writes_in_background(tmp_path: pathlib.Path):
+    """Tests that queued images are written by close, as they were when queued."""
+    save_image = SaveImage(tmp_path, num_workers=2, max_in_flight=1)
+    image = Image.new('RGB', (8, 8), 'white')
+
+    for i in range(4):
+        image.paste('black' if i % 2 else 'white', (0, 0, 8, 8))
+        save_image.run(image, CHAR_SET, source=tmp_path.joinpath(f'{i}.png'))
+    save_image.close()
+
+    for i in range(4):
+        with Image.open(tmp_path.joinpath(f'{i}_enciphered.png')) as saved:
+            assert saved.getpixel((0, 0)) == ((0, 0, 0) if i % 2 else (255, 255, 255))
+
+    # background state isn't pickled, so the saver can be sent to worker processes
+    assert isinstance(pickle.loads(pickle.dumps(save_image))._lock, type(threading.Lock()))
+
+
+def test_save_image_reports_background_errors(tmp_path: pathlib.Path):
+    """Tests that errors of background writes are raised by close."""
+    save_image = SaveImage(tmp_path.joinpath('missing', 'out.png'), num_workers=1)
+    save_image.run(Image.new('RGB', (8, 8)), CHAR_SET)
+
+    with pytest.raises(RuntimeError, match='out.png'):
+        save_image.close()
+
+    # errors are only raised once
+    save_image.close()
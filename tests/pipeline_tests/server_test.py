@@ -0,0 +1,122 @@
+import http.client
+import io
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Iterator
+from typing import Optional
+
+import pytest
+from PIL import Image
+
+from .conftest import FakeOCR
+from .conftest import FakeReconstructor
+from ocr_cipher_solver.ciphers.identity import IdentityEncipherer
+from ocr_cipher_solver.pipeline import ImagePipeline
+from ocr_cipher_solver.server import PipelinePool
+from ocr_cipher_solver.server import PipelineServer
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    """Starts a pipeline server on a free port, yielding its URL."""
+    pool = PipelinePool(
+        lambda: ImagePipeline(FakeOCR(), IdentityEncipherer(), FakeReconstructor(), ()), size=2,
+    )
+    pool.warm(Image.new('RGB', (8, 8)))
+    server = PipelineServer(
+        ('127.0.0.1', 0), pool, queue_timeout=5.0, max_upload_size=1024, quiet=True,
+    )
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def png_bytes(size=(16, 8)) -> bytes:
+    png = io.BytesIO()
+    Image.new('RGB', size, 'white').save(png, format='PNG')
+    return png.getvalue()
+
+
+def post(url: str, body: bytes):
+    return urllib.request.urlopen(urllib.request.Request(url, data=body, method='POST'))
+
+
+def test_server_returns_reconstructed_png(server_url: str):
+    """Tests that an uploaded image is answered with the reconstructed image."""
+    with post(f'{server_url}/encipher?cipher=caesar&shift=3', png_bytes()) as response:
+        assert response.headers['Content-Type'] == 'image/png'
+        assert Image.open(io.BytesIO(response.read())).size == (16, 8)
+
+
+def test_server_returns_json_characters(server_url: str):
+    """Tests that format=json answers with the enciphered characters and their boxes."""
+    with post(f'{server_url}/encipher?cipher=caesar&shift=3&format=json', png_bytes()) as response:
+        body = json.load(response)
+
+    assert body['text'] == 'd'
+    assert body['image_size'] == [16, 8]
+    assert body['chars'] == [{'char': 'd', 'left': 0, 'top': 4, 'width': 4, 'height': 4}]
+
+
+@pytest.mark.parametrize('path, body, status', (
+    ('/encipher', b'not an image', 400),
+    ('/encipher?cipher=rot47', png_bytes(), 400),
+    ('/encipher', bytes(2048), 413),
+    ('/decipher', png_bytes(), 404),
+), ids=('bad_image', 'bad_cipher', 'too_large', 'bad_path'))
+def test_server_rejects_bad_requests(server_url: str, path: str, body: bytes, status: int):
+    """Tests that bad uploads, options, and paths are rejected with client errors."""
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(f'{server_url}{path}', body)
+
+    assert error.value.code == status
+
+
+@pytest.mark.parametrize('content_length, status', (
+    (None, 411),
+    ('ten', 400),
+    ('-1', 400),
+), ids=('missing', 'invalid', 'negative'))
+def test_server_rejects_bad_content_length(
+    server_url: str, content_length: Optional[str], status: int,
+):
+    """Tests that uploads without a valid Content-Length are rejected before reading them."""
+    connection = http.client.HTTPConnection(urllib.parse.urlsplit(server_url).netloc)
+    try:
+        connection.putrequest('POST', '/encipher')
+        if content_length is not None:
+            connection.putheader('Content-Length', content_length)
+        connection.endheaders()
+        assert connection.getresponse().status == status
+    finally:
+        connection.close()
+
+
+def test_server_rejects_decompression_bombs(server_url: str, monkeypatch: pytest.MonkeyPatch):
+    """Tests that images with too many pixels are rejected as too large."""
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 16)
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(f'{server_url}/encipher', png_bytes())
+
+    assert error.value.code == 413
+
+
+def test_server_reports_latency_metrics(server_url: str):
+    """Tests that requests are counted in the Prometheus metrics."""
+    for _ in range(3):
+        post(f'{server_url}/encipher', png_bytes()).close()
+
+    with urllib.request.urlopen(f'{server_url}/metrics') as response:
+        metrics = response.read().decode()
+
+    assert 'ocr_cipher_solver_requests_total{endpoint="/encipher",status="200"} 3' in metrics
+    assert 'ocr_cipher_solver_request_seconds_count{endpoint="/encipher"} 3' in metrics
+    assert 'ocr_cipher_solver_requests_in_flight 0' in metrics
@@ -0,0 +1,59 @@
+import pathlib
+import subprocess
+import sys
+from typing import Dict
+
+# import time budget of the CLI when only parsing arguments, in seconds (generous, as CI machines
+# vary, but well below the time taken to import the pipeline)
+HELP_IMPORT_BUDGET = 0.1
+
+# modules only needed once the pipeline runs
+HEAVY_MODULES = ('numpy', 'PIL.Image', 'pytesseract', 'asyncio', 'http.server', 'multiprocessing')
+
+
+def import_times(*args: str) -> Dict[str, float]:
+    """Runs the CLI with -X importtime, returning cumulative times of top level imports in seconds.
+
+    Modules imported by other modules are included in the time of the module importing them, and
+    are keyed with the indentation -X importtime gives them.
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'ocr_cipher_solver', *args],
+        cwd=pathlib.Path(__file__).parents[2], capture_output=True, text=True, check=True,
+    )
+
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name[1:].rstrip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_help_skips_heavy_imports():
+    modules = {name.strip() for name in import_times('--help')}
+
+    for module in HEAVY_MODULES:
+        assert module not in modules
+
+
+def test_help_import_budget():
+    # take the best of a few runs, so a busy machine doesn't fail the test
+    totals = []
+    for _ in range(3):
+        times = import_times('--help')
+        totals.append(sum(cumulative for name, cumulative in times.items() if name == name.strip()))
+
+    assert min(totals) <= HELP_IMPORT_BUDGET
+
+
+def test_single_image_requires_save_path(tmp_path: pathlib.Path):
+    """Tests that a single image run without anywhere to put its result is rejected up front."""
+    completed = subprocess.run(
+        [sys.executable, '-m', 'ocr_cipher_solver', str(tmp_path.joinpath('img.png'))],
+        cwd=pathlib.Path(__file__).parents[2], capture_output=True, text=True,
+    )
+
+    assert completed.returncode == 2
+    assert '--save_path is required' in completed.stderr
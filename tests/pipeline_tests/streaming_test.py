@@ -0,0 +1,134 @@
+import pathlib
+import threading
+import time
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+from PIL import Image
+
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.pipeline import ImagePipeline
+from ocr_cipher_solver.pipeline import PipelineResult
+from ocr_cipher_solver.streaming import StreamingImagePipeline
+
+from .conftest import FakeReconstructor
+from .conftest import RecordingOutput
+
+
+class SlowFirstReconstructor(FakeReconstructor):
+    """Reconstructor stub that takes longer on the first image it sees."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._first = True
+
+    def run(
+        self,
+        ciphered_char_set: PositionalCharacterSet,
+        input_image: Image.Image,
+        input_char_set: Optional[PositionalCharacterSet] = None,
+    ) -> Image.Image:
+        with self._lock:
+            first, self._first = self._first, False
+        if first:
+            time.sleep(0.2)
+        return super().run(ciphered_char_set, input_image, input_char_set)
+
+
+def image_sizes(results: Iterable[PipelineResult]) -> List[Tuple[int, int]]:
+    """Returns the size of each result's reconstructed image."""
+    sizes = []
+    for result in results:
+        assert result.reconstructed_image is not None
+        sizes.append(result.reconstructed_image.size)
+    return sizes
+
+
+@pytest.mark.parametrize('queue_size, max_in_flight', ((1, 1), (2, None)))
+def test_streaming_pipeline_returns_results_in_input_order(
+    pipeline: ImagePipeline,
+    recording_output: RecordingOutput,
+    img_paths: List[pathlib.Path],
+    queue_size: int,
+    max_in_flight: int,
+):
+    """Tests that ordered streaming runs yield one result per image, in input order."""
+    streaming_pipeline = StreamingImagePipeline(
+        pipeline, stage_workers={'ocr': 2}, queue_size=queue_size, max_in_flight=max_in_flight,
+    )
+
+    results = list(streaming_pipeline.run_many(img_paths))
+
+    assert [result.source for result in results] == img_paths
+    assert image_sizes(results) == [(8, 8), (16, 8), (8, 16)]
+    assert sorted(recording_output.calls) == sorted(
+        (Image.open(path).size, path) for path in img_paths
+    )
+
+
+def test_streaming_pipeline_runs_every_page(
+    pipeline: ImagePipeline, multi_page_paths: List[pathlib.Path],
+):
+    """Tests that every page of a multi-page file is streamed as its own item, named after it."""
+    streaming_pipeline = StreamingImagePipeline(pipeline, stage_workers={'ocr': 2})
+
+    results = list(streaming_pipeline.run_many(multi_page_paths))
+
+    assert [result.source for result in results] == [
+        multi_page_paths[0].with_name(name)
+        for name in ('doc_page_1.tiff', 'doc_page_2.tiff', 'doc_page_3.tiff')
+    ] + [multi_page_paths[1]]
+    assert image_sizes(results) == [
+        (8, 8), (8, 16), (8, 24), (16, 8),
+    ]
+
+
+def test_unordered_streaming_pipeline_yields_results_as_they_complete(
+    pipeline: ImagePipeline, img_paths: List[pathlib.Path],
+):
+    """Tests that unordered runs don't wait for a slow image before yielding later ones."""
+    slow_pipeline = ImagePipeline(pipeline.ocr, pipeline.encipherer, SlowFirstReconstructor(), ())
+    streaming_pipeline = StreamingImagePipeline(
+        slow_pipeline, stage_workers={'reconstruct': 2}, ordered=False,
+    )
+
+    results = list(streaming_pipeline.run_many(img_paths))
+
+    assert sorted(str(result.source) for result in results) == sorted(map(str, img_paths))
+    assert results[-1].source == img_paths[0]
+
+
+def test_streaming_pipeline_raises_stage_errors(
+    pipeline: ImagePipeline, img_paths: List[pathlib.Path], tmp_path: pathlib.Path,
+):
+    """Tests that a failing stage raises in the consumer, after the images before it."""
+    streaming_pipeline = StreamingImagePipeline(pipeline)
+    missing_path = tmp_path.joinpath('missing.png')
+
+    results = streaming_pipeline.run_many([img_paths[0], missing_path, img_paths[1]])
+
+    assert next(results).source == img_paths[0]
+    with pytest.raises(FileNotFoundError):
+        next(results)
+
+
+def test_streaming_pipeline_stops_when_consumer_stops(
+    pipeline: ImagePipeline, img_paths: List[pathlib.Path],
+):
+    """Tests that closing the result iterator early stops every worker thread."""
+    num_threads = threading.active_count()
+    results = StreamingImagePipeline(pipeline, max_in_flight=1).run_many(img_paths * 10)
+
+    next(results)
+    results.close()
+
+    assert threading.active_count() == num_threads
+
+
+def test_streaming_pipeline_rejects_unknown_stages(pipeline: ImagePipeline):
+    """Tests that worker counts must name existing stages."""
+    with pytest.raises(ValueError):
+        StreamingImagePipeline(pipeline, stage_workers={'resize': 2})
@@ -0,0 +1,35 @@
+import pytest
+
+from ocr_cipher_solver.reconstructor.glyph_cache import CacheInfo
+from ocr_cipher_solver.reconstructor.glyph_cache import GlyphCache
+
+
+def test_glyph_cache_creates_each_entry_once():
+    """Tests that repeated lookups reuse the cached entry and are counted as hits."""
+    cache: GlyphCache[str] = GlyphCache(maxsize=4)
+    created = []
+
+    for key in ('a', 'b', 'a', 'a', 'b'):
+        assert cache.get(key, lambda: created.append(key) or key.upper()) == key.upper()
+
+    assert created == ['a', 'b']
+    assert cache.cache_info() == CacheInfo(hits=3, misses=2, maxsize=4, currsize=2)
+
+
+def test_glyph_cache_evicts_least_recently_used_entry():
+    """Tests that the least recently used entry is evicted once the cache is full."""
+    cache: GlyphCache[int] = GlyphCache(maxsize=2)
+    cache.get('a', lambda: 1)
+    cache.get('b', lambda: 2)
+    cache.get('a', lambda: 1)
+    cache.get('c', lambda: 3)
+
+    # 'b' was evicted, so it is created again
+    assert cache.get('b', lambda: 4) == 4
+    assert cache.get('c', lambda: 5) == 3
+
+
+def test_glyph_cache_rejects_non_positive_size():
+    """Tests that a cache that can't hold any entries is rejected."""
+    with pytest.raises(ValueError):
+        GlyphCache(maxsize=0)
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from PIL import Image
+from PIL import ImageDraw
+
+from ocr_cipher_solver.data_formats import BoundingBox
+from ocr_cipher_solver.data_formats import PositionalCharacter
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.reconstructor import Reconstructor
+from ocr_cipher_solver.reconstructor.text_runs import RunLevel
+
+
+IMAGE_SHAPE = (60, 30)
+
+
+@pytest.fixture
+def input_image() -> Image.Image:
+    img = Image.new('RGB', IMAGE_SHAPE, (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((5, 5, 20, 25), fill=(0, 0, 0))
+    draw.rectangle((35, 5, 50, 25), fill=(0, 0, 0))
+    return img
+
+
+@pytest.fixture
+def char_set() -> PositionalCharacterSet:
+    return PositionalCharacterSet.from_characters(
+        (
+            PositionalCharacter('a', BoundingBox(5, 25, 16, 21, *IMAGE_SHAPE)),
+            PositionalCharacter('b', BoundingBox(35, 25, 16, 21, *IMAGE_SHAPE)),
+        ),
+        IMAGE_SHAPE,
+    )
+
+
+def test_unchanged_characters_are_not_redrawn(
+    input_image: Image.Image, char_set: PositionalCharacterSet,
+):
+    """Tests that only pixels under characters changed by the cipher are touched."""
+    ciphered_char_set = char_set.with_codepoints(np.array([ord('a'), ord('c')]))
+
+    reconstructed = np.asarray(Reconstructor().run(ciphered_char_set, input_image, char_set))
+    original = np.asarray(input_image)
+
+    assert np.array_equal(reconstructed[:, :30], original[:, :30])
+    assert not np.array_equal(reconstructed[:, 30:], original[:, 30:])
+
+    # without the input set, every character is redrawn
+    redrawn = np.asarray(Reconstructor().run(ciphered_char_set, input_image))
+    assert not np.array_equal(redrawn[:, :30], original[:, :30])
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+def test_in_place_draws_onto_input_image(
+    input_image: Image.Image, char_set: PositionalCharacterSet, in_place: bool,
+):
+    """Tests that input images are only drawn onto when in_place is set."""
+    original = np.asarray(input_image).copy()
+    ciphered_char_set = char_set.with_codepoints(np.array([ord('c'), ord('d')]))
+
+    reconstructed = Reconstructor(in_place=in_place).run(ciphered_char_set, input_image, char_set)
+
+    assert (reconstructed is input_image) == in_place
+    assert np.array_equal(np.asarray(input_image), original) != in_place
+
+
+def test_in_place_copies_non_rgb_input(input_image: Image.Image, char_set: PositionalCharacterSet):
+    """Tests that images that must be converted to RGB are left unchanged, even in place."""
+    gray_image = input_image.convert('L')
+
+    reconstructed = Reconstructor(in_place=True).run(char_set, gray_image, char_set)
+
+    assert reconstructed.mode == 'RGB' and reconstructed is not gray_image
+    assert np.array_equal(np.asarray(reconstructed.convert('L')), np.asarray(gray_image))
+
+
+def test_run_level_redraws_whole_runs_with_changes(
+    input_image: Image.Image, char_set: PositionalCharacterSet,
+):
+    """Tests that runs with a changed character are redrawn, and others are left alone."""
+    far_char_set = char_set[:1]
+    ciphered_char_set = far_char_set.with_codepoints(np.array([ord('z')]))
+
+    reconstructor = Reconstructor(run_level=RunLevel.Word)
+    unchanged = reconstructor.run(far_char_set, input_image, far_char_set)
+    changed = reconstructor.run(ciphered_char_set, input_image, far_char_set)
+
+    assert np.array_equal(np.asarray(unchanged), np.asarray(input_image))
+    assert not np.array_equal(np.asarray(changed)[:, :30], np.asarray(input_image)[:, :30])
+    assert np.array_equal(np.asarray(changed)[:, 30:], np.asarray(input_image)[:, 30:])
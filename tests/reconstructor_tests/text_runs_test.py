@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from ocr_cipher_solver.data_formats import BoundingBox
+from ocr_cipher_solver.data_formats import PositionalCharacter
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.reconstructor.text_runs import fit_run_font
+from ocr_cipher_solver.reconstructor.text_runs import group_runs
+from ocr_cipher_solver.reconstructor.text_runs import RunLevel
+
+
+IMAGE_SHAPE = (200, 100)
+
+
+def make_char_set(lines) -> PositionalCharacterSet:
+    """Lays out lines of text in 10 by 20 pixel cells, with the first line at the top."""
+    chars = []
+    for line_index, line in enumerate(lines):
+        top = IMAGE_SHAPE[1] - 10 - 30 * line_index
+        for cell, char in enumerate(line):
+            if char != ' ':
+                bounding_box = BoundingBox(5 + 10 * cell, top, 8, 20, *IMAGE_SHAPE)
+                chars.append(PositionalCharacter(char, bounding_box))
+    return PositionalCharacterSet.from_characters(chars, IMAGE_SHAPE)
+
+
+@pytest.mark.parametrize('level, expected_texts', (
+    (RunLevel.Word, ['hello', 'big', 'world', 'again']),
+    (RunLevel.Line, ['hello big world', 'again']),
+))
+def test_group_runs_splits_words_and_lines(level: RunLevel, expected_texts):
+    """Tests that characters are grouped at gaps (for words) and line breaks."""
+    char_set = make_char_set(['hello big world', 'again'])
+
+    runs = group_runs(char_set, level)
+
+    assert [run.text for run in runs] == expected_texts
+    assert np.array_equal(np.concatenate([run.indices for run in runs]), np.arange(len(char_set)))
+
+
+def test_group_runs_bounds_runs():
+    """Tests that runs are bounded by the union of their characters' bounding boxes."""
+    char_set = make_char_set(['ab cd'])
+
+    runs = group_runs(char_set, RunLevel.Word)
+
+    assert runs[1].bounding_box == BoundingBox(35, 90, 18, 20, *IMAGE_SHAPE)
+    assert runs[1].baseline == 70
+    assert group_runs(char_set[:0]) == []
+
+
+def test_fit_run_font_fits_run_width():
+    """Tests that the fitted font draws run text no wider than the run."""
+    run = group_runs(make_char_set(['hello']))[0]
+
+    left, _, right, _ = fit_run_font(run).getbbox(run.text)
+
+    assert right - left <= run.bounding_box.width
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from ocr_cipher_solver.ciphers import CaesarianCipher
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.solvers import CaesarSolver
+
+
+PLAIN_TEXT = (
+    'It was the best of times, it was the worst of times, it was the age of wisdom, '
+    'it was the age of foolishness, it was the epoch of belief.'
+)
+
+
+def text_to_charset(text: str) -> PositionalCharacterSet:
+    num_chars = len(text)
+    return PositionalCharacterSet(
+        np.array([ord(char) for char in text], dtype=np.uint32),
+        np.arange(num_chars, dtype=np.int32),
+        np.full(num_chars, 8, dtype=np.int32),
+        np.ones(num_chars, dtype=np.int32),
+        np.full(num_chars, 8, dtype=np.int32),
+        num_chars, 8,
+    )
+
+
+@pytest.mark.parametrize('shift', (0, 1, 7, 13, 25))
+def test_caesar_solver_recovers_plain_text(shift: int):
+    """Tests that the solver finds the shift that undoes the cipher."""
+    solver = CaesarSolver()
+
+    deciphered = solver.run(CaesarianCipher(shift).run(text_to_charset(PLAIN_TEXT)))
+
+    assert deciphered.text == PLAIN_TEXT
+    assert solver.shift == -shift % 26
+
+
+def test_caesar_solver_scores_every_shift():
+    """Tests that one score is computed per shift."""
+    assert CaesarSolver().score_shifts(text_to_charset('Uryyb')).shape == (26,)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from ocr_cipher_solver.ciphers import AtbashCipher
+from ocr_cipher_solver.ciphers import KeywordCipher
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
+from ocr_cipher_solver.solvers import QuadgramModel
+from ocr_cipher_solver.solvers import SubstitutionSolver
+from ocr_cipher_solver.solvers.language_model import letter_indices
+
+
+PLAIN_TEXT = (
+    'It was the best of times, it was the worst of times, it was the age of wisdom, '
+    'it was the age of foolishness, it was the epoch of belief, it was the epoch of incredulity, '
+    'it was the season of Light, it was the season of Darkness, it was the spring of hope, '
+    'it was the winter of despair, we had everything before us, we had nothing before us, '
+    'we were all going direct to Heaven, we were all going direct the other way. In short, '
+    'the period was so far like the present period, that some of its noisiest authorities '
+    'insisted on its being received, for good or for evil, in the superlative degree of '
+    'comparison only.'
+)
+
+
+def text_to_charset(text: str) -> PositionalCharacterSet:
+    num_chars = len(text)
+    return PositionalCharacterSet(
+        np.array([ord(char) for char in text], dtype=np.uint32),
+        np.arange(num_chars, dtype=np.int32),
+        np.full(num_chars, 8, dtype=np.int32),
+        np.ones(num_chars, dtype=np.int32),
+        np.full(num_chars, 8, dtype=np.int32),
+        num_chars, 8,
+    )
+
+
+def test_quadgram_model_prefers_english():
+    """Tests that English text scores higher than the same letters shuffled."""
+    model = QuadgramModel.load()
+    letters = letter_indices(text_to_charset(PLAIN_TEXT).codepoints)
+
+    assert model.score(letters) > model.score(np.random.default_rng(0).permutation(letters))
+
+
+def test_substitution_solver_recovers_keyword_cipher():
+    """Tests that the solver undoes a keyword cipher and records the key."""
+    solver = SubstitutionSolver(num_workers=1)
+
+    deciphered = solver.run(KeywordCipher('zebras').run(text_to_charset(PLAIN_TEXT)))
+
+    assert deciphered.text == PLAIN_TEXT
+    assert solver.key['z'] == 'a'
+
+
+def test_substitution_solver_recovers_atbash_cipher():
+    """Tests that the solver undoes an Atbash cipher."""
+    cipher_text = AtbashCipher().run(text_to_charset(PLAIN_TEXT))
+    deciphered = SubstitutionSolver(num_workers=1).run(cipher_text)
+
+    assert deciphered.text == PLAIN_TEXT
+
+
+def test_substitution_solver_ignores_short_text():
+    """Tests that text too short to score is left unchanged."""
+    assert SubstitutionSolver(num_workers=1).run(text_to_charset('Hi!')).text == 'Hi!'
+
+
+def test_substitution_solver_rejects_no_restarts():
+    """Tests that a solver needs at least one restart."""
+    with pytest.raises(ValueError):
+        SubstitutionSolver(num_restarts=0)
+
+
+def test_substitution_solver_reuses_worker_pool():
+    """Tests that restarts of every cipher text run in the same worker processes."""
+    solver = SubstitutionSolver(num_workers=2)
+    try:
+        cipher_text = KeywordCipher('zebras').run(text_to_charset(PLAIN_TEXT))
+        assert solver.run(cipher_text).text == PLAIN_TEXT
+        executor = solver._executor
+        assert solver.run(cipher_text).text == PLAIN_TEXT
+        assert executor is not None and solver._executor is executor
+    finally:
+        solver.close()
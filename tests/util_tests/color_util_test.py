@@ -1,5 +1,6 @@
 from typing import Tuple
 
+import numpy as np
 import pytest
 from PIL import Image
 
@@ -7,7 +8,10 @@ from .conftest import expected_colors
 from .conftest import test_bounding_boxes
 from .conftest import test_img_paths
 from ocr_cipher_solver.data_formats import BoundingBox
+from ocr_cipher_solver.data_formats import PositionalCharacter
+from ocr_cipher_solver.data_formats import PositionalCharacterSet
 from ocr_cipher_solver.data_formats import RGBA
+from ocr_cipher_solver.utils import get_fg_bg_colors_from_img
 from ocr_cipher_solver.utils import get_fg_bg_colors_from_img_section
 
 
@@ -27,3 +31,64 @@ def test_get_fg_bg_colors_from_img_section(
     expected_fg, expected_bg = expected_color
     assert fg == expected_fg, f'FG color {fg} not what was expected {expected_fg}.'
     assert bg == expected_bg, f'FG color {bg} not what was expected {expected_bg}.'
+
+
+def test_get_fg_bg_colors_picks_most_common_colors():
+    """Tests that the most common color is the background and the next most common the text."""
+    # draw 3x3 square of near-black text pixels on 6x6 white image, with one stray gray pixel
+    img = Image.new('RGB', (6, 6), color=(255, 255, 255))
+    img.paste((3, 2, 1), (0, 0, 3, 3))
+    img.putpixel((0, 0), (5, 5, 5))
+    img.putpixel((5, 5), (128, 128, 128))
+
+    fg, bg = get_fg_bg_colors_from_img_section(img, BoundingBox(0, 6, 6, 6, 6, 6))
+
+    assert fg == (3, 2, 1, 255)
+    assert bg == (255, 255, 255, 255)
+
+
+def test_get_fg_bg_colors_of_single_color_section():
+    """Tests that a single color section uses its color for both text and background."""
+    img = Image.new('RGBA', (4, 4), color=(10, 20, 30, 255))
+
+    assert get_fg_bg_colors_from_img_section(img, BoundingBox(0, 4, 4, 4, 4, 4)) == (
+        (10, 20, 30, 255), (10, 20, 30, 255),
+    )
+
+
+def test_get_fg_bg_colors_from_img_matches_per_section_colors():
+    """Tests that batched color detection matches detecting colors one section at a time."""
+    rng = np.random.default_rng(0)
+    palette = rng.integers(0, 256, (6, 3), dtype=np.uint8)
+    img = Image.fromarray(palette[rng.integers(0, len(palette), (40, 60))])
+    bounding_boxes = [
+        BoundingBox(left, top, width, height, img.width, img.height)
+        for left, top, width, height in (
+            (0, 40, 60, 40), (5, 30, 7, 12), (50, 12, 10, 12), (20, 1, 1, 1),
+        )
+    ]
+
+    char_set = PositionalCharacterSet.from_characters(
+        PositionalCharacter('a', bounding_box) for bounding_box in bounding_boxes
+    )
+
+    colors = get_fg_bg_colors_from_img(img, char_set, ((0, 0, 0, 255), (255, 255, 255, 255)))
+
+    assert colors == [
+        get_fg_bg_colors_from_img_section(img, bounding_box) for bounding_box in bounding_boxes
+    ]
+
+
+def test_get_fg_bg_colors_from_img_uses_default_colors_for_empty_sections():
+    """Tests that sections with no pixels in the image get the default colors."""
+    img = Image.new('RGB', (4, 4), color=(10, 20, 30))
+    default_colors = ((0, 0, 0, 255), (255, 255, 255, 255))
+
+    char_set = PositionalCharacterSet.from_characters((
+        PositionalCharacter('a', BoundingBox(0, 4, 0, 4, 4, 4)),
+        PositionalCharacter('b', BoundingBox(8, 4, 2, 2, 4, 4)),
+    ))
+
+    colors = get_fg_bg_colors_from_img(img, char_set, default_colors)
+
+    assert colors == [default_colors, default_colors]
@@ -16,14 +16,14 @@ test_img_paths: List[pathlib.Path] = [
 ]
 
 test_bounding_boxes: List[BoundingBox] = [
-    BoundingBox(236, 442, 12, 18),
-    BoundingBox(183, 758, 6, 9),
-    BoundingBox(309, 1169, 92, 95),
+    BoundingBox(236, 442, 12, 18, 905, 480),
+    BoundingBox(183, 758, 6, 9, 479, 771),
+    BoundingBox(309, 1169, 92, 95, 1350, 1249),
 ]
 
 expected_colors: List[Tuple[RGBA, RGBA]] = [
-    ((255, 255, 255, 255), (0, 152, 203, 255)),
-    ((1, 1, 1, 255), (255, 255, 255, 255)),
+    ((0, 152, 203, 255), (255, 255, 255, 255)),
+    ((255, 255, 255, 255), (1, 1, 1, 255)),
     ((204, 60, 61, 255), (255, 255, 255, 255)),
 ]
 
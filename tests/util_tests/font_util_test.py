@@ -0,0 +1,47 @@
+import pathlib
+
+import pytest
+from PIL import ImageFont
+
+from ocr_cipher_solver.utils.font_utils import FONT_PATH
+from ocr_cipher_solver.utils.font_utils import FontMetrics
+from ocr_cipher_solver.utils.font_utils import get_font
+from ocr_cipher_solver.utils.font_utils import MAX_FONT_SIZE
+
+
+pytestmark = pytest.mark.skipif(
+    not pathlib.Path(FONT_PATH).exists(), reason='FreeMono is not installed',
+)
+
+
+def linear_fit_font_size(width: int, char: str) -> int:
+    """Fits font size by scanning font sizes upwards, loading every font from disk."""
+    best_font_size = 1
+    for font_size in range(2, MAX_FONT_SIZE + 1):
+        if ImageFont.truetype(FONT_PATH, font_size).getsize(char)[0] < width:
+            best_font_size = font_size
+        else:
+            break
+    return best_font_size
+
+
+@pytest.mark.parametrize('char', ('a', 'M', '.', '@'))
+@pytest.mark.parametrize('width', (0, 1, 5, 12, 37, 80, 500))
+def test_fit_font_size_matches_linear_scan(width: int, char: str):
+    """Tests that bisecting the metrics table picks the same font size as a linear scan."""
+    assert FontMetrics().fit_font_size(width, char) == linear_fit_font_size(width, char)
+
+
+def test_font_metrics_round_trip_through_disk(tmp_path: pathlib.Path):
+    """Tests that a saved metrics table loads back with the same widths."""
+    metrics_path = tmp_path.joinpath('metrics.npz')
+    metrics = FontMetrics.load_or_build(metrics_path)
+    loaded_metrics = FontMetrics.load(metrics_path)
+
+    assert loaded_metrics.font_path == metrics.font_path
+    assert (loaded_metrics.char_widths('a') == metrics.char_widths('a')).all()
+
+
+def test_get_font_is_shared_per_size():
+    """Tests that fonts are only loaded once per size."""
+    assert get_font(12) is get_font(12)
@@ -0,0 +1,52 @@
+import pathlib
+
+import numpy as np
+import pytest
+from PIL import Image
+from PIL import ImageDraw
+
+from ocr_cipher_solver.ocr_cache import OCRCache
+from ocr_cipher_solver.utils import ImageBuffer
+from ocr_cipher_solver.utils.image_buffer import image_pixels
+
+
+@pytest.fixture
+def pixels() -> np.ndarray:
+    return (np.arange(20 * 30 * 3) % 251).astype(np.uint8).reshape(20, 30, 3)
+
+
+@pytest.mark.parametrize('extension, channels', (('.ppm', slice(None)), ('.pgm', 0)))
+def test_open_memory_maps_netpbm_files(
+    tmp_path: pathlib.Path, pixels: np.ndarray, extension: str, channels,
+):
+    """Tests that PPM and PGM pixels are memory-mapped, matching the decoded image."""
+    path = tmp_path.joinpath(f'img{extension}')
+    Image.fromarray(pixels[..., channels]).save(path)
+
+    image_buffer = ImageBuffer.open(path)
+
+    assert isinstance(image_buffer.array, np.memmap)
+    assert image_buffer.size == (30, 20)
+    with Image.open(path) as decoded:
+        assert np.array_equal(np.asarray(image_buffer.to_image()), np.asarray(decoded))
+
+
+def test_image_pixels_shares_buffer_until_image_is_drawn_on(pixels: np.ndarray):
+    """Tests that stages read the buffer without copies, and drawing copies the image instead."""
+    image_buffer = ImageBuffer(pixels)
+    image = image_buffer.to_image()
+
+    assert image_pixels(image) is pixels
+
+    ImageDraw.Draw(image).rectangle((0, 0, 4, 4), fill=(0, 0, 0))
+
+    assert image_pixels(image) is not pixels
+    assert image.getpixel((0, 0)) == (0, 0, 0)
+    assert pixels[0, 0].tolist() == [0, 1, 2]
+
+
+def test_cache_key_matches_decoded_image(pixels: np.ndarray):
+    """Tests that OCR cache keys don't depend on whether the image came from a buffer."""
+    image = Image.fromarray(pixels)
+
+    assert OCRCache.key(ImageBuffer(pixels).to_image(), ('ocr',)) == OCRCache.key(image, ('ocr',))